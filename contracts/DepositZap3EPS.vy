@@ -28,6 +28,11 @@ interface CurveBase:
     def coins(i: uint256) -> address: view
     def fee() -> uint256: view
 
+interface LpStaker:
+    def depositFor(_pid: uint256, _amount: uint256, _user: address): nonpayable
+    def withdrawFor(_pid: uint256, _amount: uint256, _user: address): nonpayable
+    def poolInfo(_pid: uint256) -> (address, uint256, uint256, uint256, uint256, uint256): view
+
 
 N_COINS: constant(int128) = 2
 MAX_COIN: constant(int128) = N_COINS-1
@@ -45,16 +50,34 @@ base_pool: public(address)
 coins: public(address[N_COINS])
 base_coins: public(address[BASE_N_COINS])
 
+lp_staker: public(address)
+pid: public(uint256)
+
 
 @external
-def __init__(_pool: address, _token: address):
+def __init__(_pool: address, _token: address, _lp_staker: address, _pid: uint256):
     """
     @notice Contract constructor
     @param _pool Metapool address
     @param _token Pool LP token address
+    @param _lp_staker LpTokenStaker address
+    @param _pid LpTokenStaker pool id of the LP token
     """
+    lp_token: address = ZERO_ADDRESS
+    oracle_index: uint256 = 0
+    alloc_point: uint256 = 0
+    last_reward_time: uint256 = 0
+    acc_reward_per_share: uint256 = 0
+    acc_reward_paid: uint256 = 0
+    lp_token, oracle_index, alloc_point, last_reward_time, acc_reward_per_share, acc_reward_paid = LpStaker(
+        _lp_staker
+    ).poolInfo(_pid)
+    assert lp_token == _token  # dev: wrong pid
+
     self.pool = _pool
     self.token = _token
+    self.lp_staker = _lp_staker
+    self.pid = _pid
     base_pool: address = CurveMeta(_pool).base_pool()
     self.base_pool = base_pool
 
@@ -91,14 +114,8 @@ def __init__(_pool: address, _token: address):
             assert convert(_response, bool)
 
 
-@external
-def add_liquidity(_amounts: uint256[N_ALL_COINS], _min_mint_amount: uint256) -> uint256:
-    """
-    @notice Wrap underlying coins and deposit them in the pool
-    @param _amounts List of amounts of underlying coins to deposit
-    @param _min_mint_amount Minimum amount of LP tokens to mint from the deposit
-    @return Amount of LP tokens received by depositing
-    """
+@internal
+def _add_liquidity(_amounts: uint256[N_ALL_COINS], _min_mint_amount: uint256, _user: address) -> uint256:
     meta_amounts: uint256[N_COINS] = empty(uint256[N_COINS])
     base_amounts: uint256[BASE_N_COINS] = empty(uint256[BASE_N_COINS])
     deposit_base: bool = False
@@ -122,7 +139,7 @@ def add_liquidity(_amounts: uint256[N_ALL_COINS], _min_mint_amount: uint256) ->
             coin,
             concat(
                 method_id("transferFrom(address,address,uint256)"),
-                convert(msg.sender, bytes32),
+                convert(_user, bytes32),
                 convert(self, bytes32),
                 convert(amount, bytes32),
             ),
@@ -142,7 +159,35 @@ def add_liquidity(_amounts: uint256[N_ALL_COINS], _min_mint_amount: uint256) ->
     # Transfer meta token back
     lp_token: address = self.token
     lp_amount: uint256 = ERC20(lp_token).balanceOf(self)
-    assert ERC20(lp_token).transfer(msg.sender, lp_amount)
+    assert ERC20(lp_token).transfer(_user, lp_amount)
+
+    return lp_amount
+
+
+@external
+def add_liquidity(_amounts: uint256[N_ALL_COINS], _min_mint_amount: uint256) -> uint256:
+    """
+    @notice Wrap underlying coins and deposit them in the pool
+    @param _amounts List of amounts of underlying coins to deposit
+    @param _min_mint_amount Minimum amount of LP tokens to mint from the deposit
+    @return Amount of LP tokens received by depositing
+    """
+    return self._add_liquidity(_amounts, _min_mint_amount, msg.sender)
+
+
+@external
+def add_liquidity_and_stake(_amounts: uint256[N_ALL_COINS], _min_mint_amount: uint256) -> uint256:
+    """
+    @notice Wrap underlying coins, deposit them in the pool and stake the LP tokens
+    @dev The caller must approve the LP token to the staker and this zap as its
+         operator with `LpTokenStaker.setOperator`. The LP tokens pass through the
+         caller so that the staked balance is credited to them.
+    @param _amounts List of amounts of underlying coins to deposit
+    @param _min_mint_amount Minimum amount of LP tokens to mint from the deposit
+    @return Amount of LP tokens staked
+    """
+    lp_amount: uint256 = self._add_liquidity(_amounts, _min_mint_amount, msg.sender)
+    LpStaker(self.lp_staker).depositFor(self.pid, lp_amount, msg.sender)
 
     return lp_amount
 
@@ -199,16 +244,9 @@ def remove_liquidity(_amount: uint256, _min_amounts: uint256[N_ALL_COINS]) -> ui
     return amounts
 
 
-@external
-def remove_liquidity_one_coin(_token_amount: uint256, i: int128, _min_amount: uint256) -> uint256:
-    """
-    @notice Withdraw and unwrap a single coin from the pool
-    @param _token_amount Amount of LP tokens to burn in the withdrawal
-    @param i Index value of the coin to withdraw
-    @param _min_amount Minimum amount of underlying coin to receive
-    @return Amount of underlying coin received
-    """
-    assert ERC20(self.token).transferFrom(msg.sender, self, _token_amount)
+@internal
+def _remove_liquidity_one_coin(_token_amount: uint256, i: int128, _min_amount: uint256, _user: address) -> uint256:
+    assert ERC20(self.token).transferFrom(_user, self, _token_amount)
 
     coin: address = ZERO_ADDRESS
     if i < MAX_COIN:
@@ -230,7 +268,7 @@ def remove_liquidity_one_coin(_token_amount: uint256, i: int128, _min_amount: ui
         coin,
         concat(
             method_id("transfer(address,uint256)"),
-            convert(msg.sender, bytes32),
+            convert(_user, bytes32),
             convert(coin_amount, bytes32),
         ),
         max_outsize=32,
@@ -242,6 +280,34 @@ def remove_liquidity_one_coin(_token_amount: uint256, i: int128, _min_amount: ui
     return coin_amount
 
 
+@external
+def remove_liquidity_one_coin(_token_amount: uint256, i: int128, _min_amount: uint256) -> uint256:
+    """
+    @notice Withdraw and unwrap a single coin from the pool
+    @param _token_amount Amount of LP tokens to burn in the withdrawal
+    @param i Index value of the coin to withdraw
+    @param _min_amount Minimum amount of underlying coin to receive
+    @return Amount of underlying coin received
+    """
+    return self._remove_liquidity_one_coin(_token_amount, i, _min_amount, msg.sender)
+
+
+@external
+def unstake_and_remove_liquidity_one_coin(_token_amount: uint256, i: int128, _min_amount: uint256) -> uint256:
+    """
+    @notice Unstake LP tokens, then withdraw and unwrap a single coin from the pool
+    @dev The caller must approve the LP token to this zap and the zap as its
+         operator with `LpTokenStaker.setOperator`
+    @param _token_amount Amount of LP tokens to unstake and burn in the withdrawal
+    @param i Index value of the coin to withdraw
+    @param _min_amount Minimum amount of underlying coin to receive
+    @return Amount of underlying coin received
+    """
+    LpStaker(self.lp_staker).withdrawFor(self.pid, _token_amount, msg.sender)
+
+    return self._remove_liquidity_one_coin(_token_amount, i, _min_amount, msg.sender)
+
+
 @external
 def remove_liquidity_imbalance(_amounts: uint256[N_ALL_COINS], _max_burn_amount: uint256) -> uint256:
     """
@@ -71,6 +71,10 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
     mapping(address => Balances) private balances;
     mapping(address => LockedBalance[]) private userLocks;
     mapping(address => LockedBalance[]) private userEarnings;
+    // Index of the first live entry in `userLocks` / `userEarnings`. Entries are
+    // consumed from the front, so everything before the head can be skipped.
+    mapping(address => uint256) private userLocksHead;
+    mapping(address => uint256) private userEarningsHead;
 
     /* ========== CONSTRUCTOR ========== */
 
@@ -176,7 +180,7 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
     function unlockedBalance(address user) view external returns (uint256 amount) {
         amount = balances[user].unlocked;
         LockedBalance[] storage earnings = userEarnings[msg.sender];
-        for (uint i = 0; i < earnings.length; i++) {
+        for (uint i = userEarningsHead[msg.sender]; i < earnings.length; i++) {
             if (earnings[i].unlockTime > block.timestamp) {
                 break;
             }
@@ -195,7 +199,7 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
     ) {
         LockedBalance[] storage earnings = userEarnings[user];
         uint256 idx;
-        for (uint i = 0; i < earnings.length; i++) {
+        for (uint i = userEarningsHead[user]; i < earnings.length; i++) {
             if (earnings[i].unlockTime > block.timestamp) {
                 if (idx == 0) {
                     earningsData = new LockedBalance[](earnings.length - i);
@@ -219,7 +223,7 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
     ) {
         LockedBalance[] storage locks = userLocks[user];
         uint256 idx;
-        for (uint i = 0; i < locks.length; i++) {
+        for (uint i = userLocksHead[user]; i < locks.length; i++) {
             if (locks[i].unlockTime > block.timestamp) {
                 if (idx == 0) {
                     lockData = new LockedBalance[](locks.length - i);
@@ -234,6 +238,111 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
         return (balances[user].locked, unlockable, locked, lockData);
     }
 
+    // Index of the first entry from `head` that is still locked. Entries are sorted by
+    // unlock time, so this does not depend on how many unlocked entries are left.
+    function _firstLocked(
+        LockedBalance[] storage entries,
+        uint256 head
+    ) internal view returns (uint256) {
+        uint256 high = entries.length;
+        while (head < high) {
+            uint256 mid = (head + high) / 2;
+            if (entries[mid].unlockTime > block.timestamp) {
+                high = mid;
+            } else {
+                head = mid + 1;
+            }
+        }
+        return head;
+    }
+
+    function _page(
+        LockedBalance[] storage entries,
+        uint256 start,
+        uint256 limit
+    ) internal view returns (LockedBalance[] memory page) {
+        uint256 end = Math.min(start.add(limit), entries.length);
+        if (start >= end) {
+            return page;
+        }
+        page = new LockedBalance[](end - start);
+        for (uint i = start; i < end; i++) {
+            page[i - start] = entries[i];
+        }
+        return page;
+    }
+
+    // Sum, count and first unlock time of the entries from `start`
+    function _summary(
+        LockedBalance[] storage entries,
+        uint256 start
+    ) internal view returns (uint256 amount, uint256 count, uint256 nextUnlockTime) {
+        uint256 length = entries.length;
+        for (uint i = start; i < length; i++) {
+            amount = amount.add(entries[i].amount);
+        }
+        if (start < length) {
+            nextUnlockTime = entries[start].unlockTime;
+        }
+        return (amount, length - start, nextUnlockTime);
+    }
+
+    // Up to `limit` of the entries returned by `earnedBalances`, starting at `offset`
+    function earnedBalancesPage(
+        address user,
+        uint256 offset,
+        uint256 limit
+    ) view external returns (LockedBalance[] memory earningsData) {
+        LockedBalance[] storage earnings = userEarnings[user];
+        uint256 start = _firstLocked(earnings, userEarningsHead[user]).add(offset);
+        return _page(earnings, start, limit);
+    }
+
+    // Up to `limit` of the entries returned by `lockedBalances`, starting at `offset`
+    function lockedBalancesPage(
+        address user,
+        uint256 offset,
+        uint256 limit
+    ) view external returns (LockedBalance[] memory lockData) {
+        LockedBalance[] storage locks = userLocks[user];
+        uint256 start = _firstLocked(locks, userLocksHead[user]).add(offset);
+        return _page(locks, start, limit);
+    }
+
+    // Totals of `earnedBalances` without the entries. `total` is the amount still
+    // subject to the penalty and `unlocked` the earned amount that is not.
+    // Entries unlock weekly, so this reads at most `lockDuration / rewardsDuration + 1` of them
+    function earnedBalancesSummary(
+        address user
+    ) view external returns (
+        uint256 total,
+        uint256 unlocked,
+        uint256 entries,
+        uint256 nextUnlockTime
+    ) {
+        LockedBalance[] storage earnings = userEarnings[user];
+        uint256 start = _firstLocked(earnings, userEarningsHead[user]);
+        (total, entries, nextUnlockTime) = _summary(earnings, start);
+        return (total, balances[user].earned.sub(total), entries, nextUnlockTime);
+    }
+
+    // Totals of `lockedBalances` without the entries
+    function lockedBalancesSummary(
+        address user
+    ) view external returns (
+        uint256 total,
+        uint256 unlockable,
+        uint256 locked,
+        uint256 entries,
+        uint256 nextUnlockTime
+    ) {
+        LockedBalance[] storage locks = userLocks[user];
+        uint256 start = _firstLocked(locks, userLocksHead[user]);
+        total = balances[user].locked;
+        (locked, entries, nextUnlockTime) = _summary(locks, start);
+        return (total, total.sub(locked), locked, entries, nextUnlockTime);
+    }
+
     // Final balance received and penalty balance paid by user upon calling exit
     function withdrawableBalance(
         address user
@@ -245,7 +354,7 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
         if (bal.earned > 0) {
             uint256 amountWithoutPenalty;
             uint256 length = userEarnings[user].length;
-            for (uint i = 0; i < length; i++) {
+            for (uint i = userEarningsHead[user]; i < length; i++) {
                 uint256 earnedAmount = userEarnings[user][i].amount;
                 if (earnedAmount == 0) continue;
                 if (userEarnings[user][i].unlockTime > block.timestamp) {
@@ -274,7 +383,7 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
             bal.locked = bal.locked.add(amount);
             uint256 unlockTime = block.timestamp.div(rewardsDuration).mul(rewardsDuration).add(lockDuration);
             uint256 idx = userLocks[msg.sender].length;
-            if (idx == 0 || userLocks[msg.sender][idx-1].unlockTime < unlockTime) {
+            if (idx == userLocksHead[msg.sender] || userLocks[msg.sender][idx-1].unlockTime < unlockTime) {
                 userLocks[msg.sender].push(LockedBalance({amount: amount, unlockTime: unlockTime}));
             } else {
                 userLocks[msg.sender][idx-1].amount = userLocks[msg.sender][idx-1].amount.add(amount);
@@ -284,6 +393,9 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
         }
         stakingToken.safeTransferFrom(msg.sender, address(this), amount);
         emit Staked(msg.sender, amount);
+        if (lock) {
+            emit Locked(msg.sender, amount);
+        }
     }
 
     // Mint new tokens
@@ -299,13 +411,14 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
         LockedBalance[] storage earnings = userEarnings[user];
         uint256 idx = earnings.length;
 
-        if (idx == 0 || earnings[idx-1].unlockTime < unlockTime) {
+        if (idx == userEarningsHead[user] || earnings[idx-1].unlockTime < unlockTime) {
             earnings.push(LockedBalance({amount: amount, unlockTime: unlockTime}));
         } else {
             earnings[idx-1].amount = earnings[idx-1].amount.add(amount);
         }
         stakingToken.mint(address(this), amount);
         emit Staked(user, amount);
+        emit Minted(user, amount);
     }
 
     // Withdraw staked tokens
@@ -323,7 +436,8 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
             require(bal.earned >= remaining, "Insufficient unlocked balance");
             bal.unlocked = 0;
             bal.earned = bal.earned.sub(remaining);
-            for (uint i = 0; ; i++) {
+            uint256 head = userEarningsHead[msg.sender];
+            for (uint i = head; ; i++) {
                 uint256 earnedAmount = userEarnings[msg.sender][i].amount;
                 if (earnedAmount == 0) continue;
                 if (penaltyAmount == 0 && userEarnings[msg.sender][i].unlockTime > block.timestamp) {
@@ -331,13 +445,15 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
                     require(bal.earned >= remaining, "Insufficient balance after penalty");
                     bal.earned = bal.earned.sub(remaining);
                     if (bal.earned == 0) {
-                        delete userEarnings[msg.sender];
+                        userEarningsHead[msg.sender] = userEarnings[msg.sender].length;
                         break;
                     }
                     remaining = remaining.mul(2);
                 }
                 if (remaining <= earnedAmount) {
                     userEarnings[msg.sender][i].amount = earnedAmount.sub(remaining);
+                    if (remaining == earnedAmount) i++;
+                    if (i != head) userEarningsHead[msg.sender] = i;
                     break;
                 } else {
                     delete userEarnings[msg.sender][i];
@@ -352,6 +468,7 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
         stakingToken.safeTransfer(msg.sender, amount);
         if (penaltyAmount > 0) {
             _notifyReward(address(stakingToken), penaltyAmount);
+            emit PenaltyPaid(msg.sender, penaltyAmount);
         }
         emit Withdrawn(msg.sender, amount);
     }
@@ -369,10 +486,32 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
         }
     }
 
+    // Claim pending staking rewards for the given reward tokens only
+    // Balances are unchanged by a claim, so the other reward tokens can be left
+    // for the next full update without affecting what the user has earned
+    function getReward(address[] calldata _rewardTokens) external nonReentrant {
+        Balances storage bal = balances[msg.sender];
+        for (uint i; i < _rewardTokens.length; i++) {
+            address _rewardsToken = _rewardTokens[i];
+            require(rewardData[_rewardsToken].lastUpdateTime > 0, "Unknown reward token");
+            if (_rewardsToken == address(stakingToken)) {
+                _checkpoint(msg.sender, _rewardsToken, bal.locked, lockedSupply);
+            } else {
+                _checkpoint(msg.sender, _rewardsToken, bal.total, totalSupply);
+            }
+            uint256 reward = rewards[msg.sender][_rewardsToken];
+            if (reward > 0) {
+                rewards[msg.sender][_rewardsToken] = 0;
+                IERC20(_rewardsToken).safeTransfer(msg.sender, reward);
+                emit RewardPaid(msg.sender, _rewardsToken, reward);
+            }
+        }
+    }
+
     // Withdraw full unlocked balance and claim pending rewards
     function exit() external updateReward(msg.sender) {
         (uint256 amount, uint256 penaltyAmount) = withdrawableBalance(msg.sender);
-        delete userEarnings[msg.sender];
+        userEarningsHead[msg.sender] = userEarnings[msg.sender].length;
         Balances storage bal = balances[msg.sender];
         bal.total = bal.total.sub(bal.unlocked).sub(bal.earned);
         bal.unlocked = 0;
@@ -382,7 +521,9 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
         stakingToken.safeTransfer(msg.sender, amount);
         if (penaltyAmount > 0) {
             _notifyReward(address(stakingToken), penaltyAmount);
+            emit PenaltyPaid(msg.sender, penaltyAmount);
         }
+        emit Withdrawn(msg.sender, amount);
         getReward();
     }
 
@@ -392,21 +533,26 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
         Balances storage bal = balances[msg.sender];
         uint256 amount;
         uint256 length = locks.length;
+        uint256 head = userLocksHead[msg.sender];
+        require(head < length);
         if (locks[length-1].unlockTime <= block.timestamp) {
             amount = bal.locked;
-            delete userLocks[msg.sender];
+            userLocksHead[msg.sender] = length;
         } else {
-            for (uint i = 0; i < length; i++) {
+            uint i = head;
+            for (; i < length; i++) {
                 if (locks[i].unlockTime > block.timestamp) break;
                 amount = amount.add(locks[i].amount);
                 delete locks[i];
             }
+            if (i != head) userLocksHead[msg.sender] = i;
         }
         bal.locked = bal.locked.sub(amount);
         bal.total = bal.total.sub(amount);
         totalSupply = totalSupply.sub(amount);
         lockedSupply = lockedSupply.sub(amount);
         stakingToken.safeTransfer(msg.sender, amount);
+        emit ExpiredLocksWithdrawn(msg.sender, amount);
     }
 
     /* ========== RESTRICTED FUNCTIONS ========== */
@@ -446,36 +592,45 @@ contract MultiFeeDistribution is ReentrancyGuard, Ownable {
     /* ========== MODIFIERS ========== */
 
     modifier updateReward(address account) {
-        address token = address(stakingToken);
+        uint256 locked;
         uint256 balance;
-        uint256 supply = lockedSupply;
-        rewardData[token].rewardPerTokenStored = _rewardPerToken(token, supply);
-        rewardData[token].lastUpdateTime = lastTimeRewardApplicable(token);
         if (account != address(0)) {
-            // Special case, use the locked balances and supply for stakingReward rewards
-            rewards[account][token] = _earned(account, token, balances[account].locked, supply);
-            userRewardPerTokenPaid[account][token] = rewardData[token].rewardPerTokenStored;
+            locked = balances[account].locked;
             balance = balances[account].total;
         }
+        // Special case, use the locked balances and supply for stakingReward rewards
+        _checkpoint(account, address(stakingToken), locked, lockedSupply);
 
-        supply = totalSupply;
+        uint256 supply = totalSupply;
         for (uint i = 1; i < rewardTokens.length; i++) {
-            token = rewardTokens[i];
-            rewardData[token].rewardPerTokenStored = _rewardPerToken(token, supply);
-            rewardData[token].lastUpdateTime = lastTimeRewardApplicable(token);
-            if (account != address(0)) {
-                rewards[account][token] = _earned(account, token, balance, supply);
-                userRewardPerTokenPaid[account][token] = rewardData[token].rewardPerTokenStored;
-            }
+            _checkpoint(account, rewardTokens[i], balance, supply);
         }
         _;
     }
 
+    // Bring one reward token up to date, and the rewards of `account` for it
+    // unless `account` is the zero address
+    function _checkpoint(address account, address token, uint256 balance, uint256 supply) internal {
+        rewardData[token].rewardPerTokenStored = _rewardPerToken(token, supply);
+        rewardData[token].lastUpdateTime = lastTimeRewardApplicable(token);
+        if (account != address(0)) {
+            rewards[account][token] = _earned(account, token, balance, supply);
+            userRewardPerTokenPaid[account][token] = rewardData[token].rewardPerTokenStored;
+        }
+    }
+
     /* ========== EVENTS ========== */
 
     event RewardAdded(uint256 reward);
+    // `Staked` is emitted for every addition to the total balance, followed by
+    // `Locked` or `Minted` when the amount is locked or earned instead of unlocked
     event Staked(address indexed user, uint256 amount);
+    event Locked(address indexed user, uint256 amount);
+    event Minted(address indexed user, uint256 amount);
+    // Withdrawals of unlocked and earned tokens, the penalty is taken from earned tokens
     event Withdrawn(address indexed user, uint256 amount);
+    event PenaltyPaid(address indexed user, uint256 amount);
+    event ExpiredLocksWithdrawn(address indexed user, uint256 amount);
     event RewardPaid(address indexed user, address indexed rewardsToken, uint256 reward);
     event RewardsDurationUpdated(address token, uint256 newDuration);
     event Recovered(address token, uint256 amount);
@@ -3,16 +3,27 @@ pragma solidity 0.7.6;
 
 interface IStableSwap {
     function withdraw_admin_fees() external;
+    function admin_balances(uint256 i) external view returns (uint256);
+    function fee_converter() external view returns (address);
+}
+
+interface IFeeConverter {
+    function setNotifyDeferred(bool deferred) external;
 }
 
 
 contract FeeClaimer {
 
+    uint256 constant MAX_COINS = 8;
+
     address owner;
     IStableSwap[] public pools;
+    // minimum admin balance of each coin for a pool to be harvested, by pool index
+    mapping(uint256 => uint256[]) public minAdminBalances;
 
     event FeeClaimSuccess(IStableSwap pool);
     event FeeClaimRevert(IStableSwap pool);
+    event FeeClaimSkipped(IStableSwap pool);
 
     constructor() public {
         owner = msg.sender;
@@ -36,4 +47,91 @@ contract FeeClaimer {
             pools.push(_pools[i]);
         }
     }
+
+    function poolCount() external view returns (uint256) {
+        return pools.length;
+    }
+
+    // Coins without a minimum are harvested once they hold any admin balance
+    function setMinAdminBalances(uint256 _index, uint256[] calldata _minimums) external {
+        require(msg.sender == owner);
+        require(_index < pools.length);
+        minAdminBalances[_index] = _minimums;
+    }
+
+    // A pool is harvestable once the admin balance of any coin reaches its minimum
+    function isHarvestable(uint256 _index) public view returns (bool) {
+        IStableSwap pool = pools[_index];
+        uint256[] storage minimums = minAdminBalances[_index];
+        for (uint i = 0; i < MAX_COINS; i++) {
+            try pool.admin_balances(i) returns (uint256 balance) {
+                uint256 minimum = i < minimums.length ? minimums[i] : 0;
+                if (balance > 0 && balance >= minimum) return true;
+            } catch {
+                break;
+            }
+        }
+        return false;
+    }
+
+    // Indexes of all harvestable pools, to be passed to `harvest`
+    function harvestablePools() external view returns (uint256[] memory indexes) {
+        uint256 length = pools.length;
+        indexes = new uint256[](length);
+        uint256 count;
+        for (uint i = 0; i < length; i++) {
+            if (isHarvestable(i)) {
+                indexes[count] = i;
+                count++;
+            }
+        }
+        assembly { mstore(indexes, count) }
+        return indexes;
+    }
+
+    /**
+        @notice Withdraw admin fees from the pools at `_indexes` that are harvestable
+        @dev Fee converters that support it defer their notifications until every
+             pool has been harvested, so each reward token is notified only once
+     */
+    function harvest(uint256[] calldata _indexes) external {
+        address[] memory converters = new address[](_indexes.length);
+        bool[] memory deferred = new bool[](_indexes.length);
+        uint256 count;
+
+        for (uint i = 0; i < _indexes.length; i++) {
+            IStableSwap pool = pools[_indexes[i]];
+            if (!isHarvestable(_indexes[i])) {
+                emit FeeClaimSkipped(pool);
+                continue;
+            }
+
+            address converter = pool.fee_converter();
+            bool seen;
+            for (uint j = 0; j < count; j++) {
+                if (converters[j] == converter) {
+                    seen = true;
+                    break;
+                }
+            }
+            if (!seen) {
+                converters[count] = converter;
+                try IFeeConverter(converter).setNotifyDeferred(true) {
+                    deferred[count] = true;
+                } catch {}
+                count++;
+            }
+
+            try pool.withdraw_admin_fees() {
+                emit FeeClaimSuccess(pool);
+            } catch {
+                emit FeeClaimRevert(pool);
+            }
+        }
+
+        // not caught, a converter must never be left deferring its notifications
+        for (uint i = 0; i < count; i++) {
+            if (deferred[i]) IFeeConverter(converters[i]).setNotifyDeferred(false);
+        }
+    }
 }
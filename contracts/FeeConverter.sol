@@ -25,7 +25,63 @@ interface IPancakeRouter {
 }
 
 
-contract FeeConverter {
+// While a `FeeClaimer` harvests many pools, notifications are deferred and each
+// coin is notified once when the claimer ends the harvest.
+abstract contract DeferredNotify {
+
+    address owner;
+    address public feeClaimer;
+    bool public notifyDeferred;
+    IERC20[] pendingNotify;
+
+    event NotifyFailed(IERC20 coin);
+
+    constructor() public {
+        owner = msg.sender;
+    }
+
+    function setFeeClaimer(address claimer) external {
+        require (msg.sender == owner);
+        require (feeClaimer == address(0));
+        feeClaimer = claimer;
+    }
+
+    function setNotifyDeferred(bool deferred) external {
+        require (msg.sender == feeClaimer);
+        notifyDeferred = deferred;
+        if (!deferred) {
+            for (uint i = 0; i < pendingNotify.length; i++) {
+                IERC20 coin = pendingNotify[i];
+                // a failing coin keeps its balance until the next notify
+                try this.notifyPending(coin) {} catch {
+                    emit NotifyFailed(coin);
+                }
+            }
+            delete pendingNotify;
+        }
+    }
+
+    // Only called by `setNotifyDeferred`, so that one failing coin does not revert the others
+    function notifyPending(IERC20 coin) external {
+        require (msg.sender == address(this));
+        if (coin.balanceOf(address(this)) > 0) _notify(coin);
+    }
+
+    // Returns true if the notification for `coin` was deferred
+    function _deferNotify(IERC20 coin) internal returns (bool) {
+        if (!notifyDeferred) return false;
+        for (uint i = 0; i < pendingNotify.length; i++) {
+            if (pendingNotify[i] == coin) return true;
+        }
+        pendingNotify.push(coin);
+        return true;
+    }
+
+    function _notify(IERC20 coin) internal virtual;
+}
+
+
+contract FeeConverter is DeferredNotify {
     using SafeERC20 for IERC20;
 
     address public feeDistributor;
@@ -45,6 +101,10 @@ contract FeeConverter {
     }
 
     function notify(IERC20 coin) external {
+        if (!_deferNotify(coin)) _notify(coin);
+    }
+
+    function _notify(IERC20 coin) internal override {
         uint256 balance = coin.balanceOf(address(this));
         coin.safeApprove(feeDistributor, balance);
         IMultiFeeDistribution(feeDistributor).notifyRewardAmount(coin, balance);
@@ -53,7 +113,7 @@ contract FeeConverter {
 }
 
 
-contract MetapoolFeeConverter {
+contract MetapoolFeeConverter is DeferredNotify {
     using SafeERC20 for IERC20;
 
     address public feeDistributor;
@@ -76,16 +136,20 @@ contract MetapoolFeeConverter {
         outputCoin = basePool.coins(0);
 
         basePool.remove_liquidity_one_coin(balance, 0, 0);
-        balance = outputCoin.balanceOf(address(this));
-        outputCoin.approve(feeDistributor, balance);
-        IMultiFeeDistribution(feeDistributor).notifyRewardAmount(outputCoin, balance);
+        if (!_deferNotify(outputCoin)) _notify(outputCoin);
+    }
+
+    function _notify(IERC20 coin) internal override {
+        uint256 balance = coin.balanceOf(address(this));
+        coin.approve(feeDistributor, balance);
+        IMultiFeeDistribution(feeDistributor).notifyRewardAmount(coin, balance);
     }
 
 }
 
 
 
-contract PancakeFeeConverter {
+contract PancakeFeeConverter is DeferredNotify {
     using SafeERC20 for IERC20;
 
     address public feeDistributor;
@@ -112,6 +176,10 @@ contract PancakeFeeConverter {
     }
 
     function notify(IERC20 coin) public {
+        if (!_deferNotify(coin)) _notify(coin);
+    }
+
+    function _notify(IERC20 coin) internal override {
         uint256 balance = coin.balanceOf(address(this));
         IERC20[] memory path = routerPath;
         path[0] = coin;
@@ -35,6 +35,7 @@ contract LpTokenStaker is Ownable {
         uint256 allocPoint; // How many allocation points assigned to this pool.
         uint256 lastRewardTime; // Last second that reward distribution occurs.
         uint256 accRewardPerShare; // Accumulated rewards per share, times 1e12. See below.
+        uint256 accRewardPaid; // Global accumulator value at the last update, see `_updatePool`.
     }
     // Info about token emissions for a given time period.
     struct EmissionPoint {
@@ -60,6 +61,22 @@ contract LpTokenStaker is Ownable {
     // List of Chainlink oracle addresses.
     Oracle[] public oracles;
 
+    // Rewards are tracked globally and each pool is brought up to date only when it is
+    // touched, so the cost of an action does not depend on the number of pools.
+    // Sum of allocation points of the pools priced by each oracle, excluding pid 0.
+    uint256[] public oracleAllocPoint;
+    // Accumulated rewards per allocation point for pools priced by each oracle, times 1e36.
+    uint256[] public accRewardPerAllocPoint;
+    // Accumulated rewards for the pool at pid 0.
+    uint256 public fixedPoolReward;
+    // Last second that the global accumulators were updated.
+    uint256 public lastRewardTime;
+
+    // Contracts allowed to deposit and withdraw on behalf of a user, such as deposit zaps.
+    // Staked tokens always move through the user's wallet so that reward-bearing LP tokens
+    // credit the deposit to the user.
+    mapping(address => mapping(address => bool)) public operators;
+
     event Deposit(address indexed user, uint256 indexed pid, uint256 amount);
     event Withdraw(address indexed user, uint256 indexed pid, uint256 amount);
     event EmergencyWithdraw(
@@ -67,6 +84,7 @@ contract LpTokenStaker is Ownable {
         uint256 indexed pid,
         uint256 amount
     );
+    event OperatorSet(address indexed user, address indexed operator, bool approved);
 
     constructor(
         uint128[] memory _startTimeOffset,
@@ -84,6 +102,9 @@ contract LpTokenStaker is Ownable {
         }
         // Pool values are based on USD so the first oracle is 0x00 and the price is always $1
         oracles.push(Oracle(0));
+        oracleAllocPoint.push(0);
+        accRewardPerAllocPoint.push(0);
+        lastRewardTime = block.timestamp;
         // The first pool receives special treatment, it always has 20% of the totalAllocPoint
         poolInfo.push(
             PoolInfo({
@@ -91,7 +112,8 @@ contract LpTokenStaker is Ownable {
                 oracleIndex: 0,
                 allocPoint: 0,
                 lastRewardTime: block.timestamp,
-                accRewardPerShare: 0
+                accRewardPerShare: 0,
+                accRewardPaid: 0
             })
         );
     }
@@ -111,14 +133,15 @@ contract LpTokenStaker is Ownable {
     // XXX DO NOT add the same LP token more than once. Rewards will be messed up if you do.
     function addPool(IERC20 _lpToken, uint256 _oracleIndex) public onlyOwner {
         require(_oracleIndex < oracles.length);
-        _massUpdatePools();
+        _updateRewards();
         poolInfo.push(
             PoolInfo({
                 lpToken: _lpToken,
                 oracleIndex: _oracleIndex,
                 allocPoint: 0,
                 lastRewardTime: block.timestamp,
-                accRewardPerShare: 0
+                accRewardPerShare: 0,
+                accRewardPaid: accRewardPerAllocPoint[_oracleIndex]
             })
         );
     }
@@ -127,65 +150,147 @@ contract LpTokenStaker is Ownable {
     function addOracle(Oracle _oracle) external onlyOwner {
         _oracle.latestAnswer();  // Validates that this is actually an oracle!
         oracles.push(_oracle);
+        oracleAllocPoint.push(0);
+        accRewardPerAllocPoint.push(0);
     }
 
-    // Calculate the final allocation points for each pool.
+    // Calculate the total allocation points.
     // This is the main logical deviation from the original MasterChef contract.
     // The pool at pid 0 always recieves exactly 20% of the allocation points.
     // All remaining pools receive an "equal" allocation, based on their rough value in USD
     // For pools handling USD-based Ellipsis LP tokens the value per token is assumed as $1,
     // for non-USD pools a rate is queried from a Chainlink oracle.
-    function _getAllocPoints() internal view returns (uint256[] memory allocPoints, uint256 totalAP) {
+    // Allocation points are summed per oracle, so this only iterates the oracles.
+    function _getAllocPoints() internal view returns (uint256[] memory latestPrices, uint256 totalAP) {
         // Get the oracle prices. Oracle[0] is USD and fixed at $1 (100000000)
-        uint256[] memory latestPrices = new uint256[](oracles.length);
+        uint256 length = oracles.length;
+        latestPrices = new uint256[](length);
         latestPrices[0] = 100000000;
-        for (uint256 i = 1; i < oracles.length; i++) {
+        totalAP = oracleAllocPoint[0].mul(latestPrices[0]);
+        for (uint256 i = 1; i < length; i++) {
+            uint256 allocPoint = oracleAllocPoint[i];
+            if (allocPoint == 0) continue;
             latestPrices[i] = uint256(oracles[i].latestAnswer());
-        }
-
-        // Apply oracle prices to calculate final allocation points for each pool
-        uint256 length = poolInfo.length;
-        allocPoints = new uint256[](length);
-        for (uint256 pid = 1; pid < length; ++pid) {
-            PoolInfo storage pool = poolInfo[pid];
-            allocPoints[pid] = pool.allocPoint.mul(latestPrices[pool.oracleIndex]);
-            totalAP = totalAP.add(allocPoints[pid]);
+            totalAP = totalAP.add(allocPoint.mul(latestPrices[i]));
         }
         // Special treatment for pool 0 to always have 20%
         totalAP = totalAP.mul(100).div(80);
-        allocPoints[0] = totalAP.div(5);
 
-        return (allocPoints, totalAP);
+        return (latestPrices, totalAP);
+    }
+
+    // Rewards accrued since `lastRewardTime`, as the increase of `accRewardPerAllocPoint`
+    // for each oracle and the increase of `fixedPoolReward`.
+    function _pendingRewards() internal view returns (uint256[] memory accIncrease, uint256 fixedIncrease) {
+        accIncrease = new uint256[](oracles.length);
+        if (block.timestamp <= lastRewardTime) {
+            return (accIncrease, 0);
+        }
+        (uint256[] memory latestPrices, uint256 totalAP) = _getAllocPoints();
+        if (totalAP == 0) {
+            return (accIncrease, 0);
+        }
+        uint256 reward = block.timestamp.sub(lastRewardTime).mul(rewardsPerSecond);
+        for (uint256 i = 0; i < accIncrease.length; i++) {
+            accIncrease[i] = reward.mul(latestPrices[i]).mul(1e36).div(totalAP);
+        }
+        fixedIncrease = reward.mul(totalAP.div(5)).div(totalAP);
+        return (accIncrease, fixedIncrease);
+    }
+
+    // Rewards for a pool between its last update and the given accumulator value
+    function _poolReward(uint256 _pid, PoolInfo storage pool, uint256 _acc) internal view returns (uint256) {
+        uint256 accrued = _acc.sub(pool.accRewardPaid);
+        if (_pid == 0) {
+            return accrued;
+        }
+        return pool.allocPoint.mul(accrued).div(1e36);
     }
 
     function poolLength() external view returns (uint256) {
         return poolInfo.length;
     }
 
+    // Current accRewardPerShare of a pool, given the pending global accumulator increases
+    function _currentAccRewardPerShare(
+        uint256 _pid,
+        uint256[] memory _accIncrease,
+        uint256 _fixedIncrease
+    ) internal view returns (uint256) {
+        PoolInfo storage pool = poolInfo[_pid];
+        uint256 acc;
+        if (_pid == 0) {
+            acc = fixedPoolReward.add(_fixedIncrease);
+        } else {
+            acc = accRewardPerAllocPoint[pool.oracleIndex].add(_accIncrease[pool.oracleIndex]);
+        }
+        uint256 accRewardPerShare = pool.accRewardPerShare;
+        uint256 lpSupply = pool.lpToken.balanceOf(address(this));
+        if (acc > pool.accRewardPaid && lpSupply != 0) {
+            uint256 reward = _poolReward(_pid, pool, acc);
+            accRewardPerShare = accRewardPerShare.add(reward.mul(1e12).div(lpSupply));
+        }
+        return accRewardPerShare;
+    }
+
+    function _claimable(uint256 _pid, address _user, uint256 _accRewardPerShare) internal view returns (uint256) {
+        UserInfo storage user = userInfo[_pid][_user];
+        return user.amount.mul(_accRewardPerShare).div(1e12).sub(user.rewardDebt);
+    }
+
     // View function to see pending reward tokens on frontend.
     function claimableReward(uint256 _pid, address _user)
         external
         view
         returns (uint256)
     {
-        (uint256[] memory allocPoints, uint256 totalAP) = _getAllocPoints();
-        PoolInfo storage pool = poolInfo[_pid];
-        UserInfo storage user = userInfo[_pid][_user];
-        uint256 accRewardPerShare = pool.accRewardPerShare;
-        uint256 lpSupply = pool.lpToken.balanceOf(address(this));
-        if (block.timestamp > pool.lastRewardTime && lpSupply != 0 && totalAP != 0) {
-            uint256 duration = block.timestamp.sub(pool.lastRewardTime);
-            uint256 reward = duration.mul(rewardsPerSecond).mul(allocPoints[_pid]).div(totalAP);
-            accRewardPerShare = accRewardPerShare.add(reward.mul(1e12).div(lpSupply));
+        (uint256[] memory accIncrease, uint256 fixedIncrease) = _pendingRewards();
+        return _claimable(_pid, _user, _currentAccRewardPerShare(_pid, accIncrease, fixedIncrease));
+    }
+
+    // Pending rewards of one user in several pools. Oracle prices are only read once.
+    function claimableRewards(address _user, uint256[] calldata _pids)
+        external
+        view
+        returns (uint256[] memory claimable)
+    {
+        (uint256[] memory accIncrease, uint256 fixedIncrease) = _pendingRewards();
+        claimable = new uint256[](_pids.length);
+        for (uint256 i = 0; i < _pids.length; i++) {
+            uint256 accRewardPerShare = _currentAccRewardPerShare(_pids[i], accIncrease, fixedIncrease);
+            claimable[i] = _claimable(_pids[i], _user, accRewardPerShare);
         }
-        return user.amount.mul(accRewardPerShare).div(1e12).sub(user.rewardDebt);
+        return claimable;
     }
 
-    // Update reward variables for all pools
-    function _massUpdatePools() internal {
-        (uint256[] memory allocPoints, uint256 totalAP) = _getAllocPoints();
-        for (uint256 pid = 0; pid < allocPoints.length; ++pid) {
-            _updatePool(pid, allocPoints[pid], totalAP);
+    // Pending rewards of several users in one pool. Oracle prices are only read once.
+    function claimableRewardsMany(uint256 _pid, address[] calldata _users)
+        external
+        view
+        returns (uint256[] memory claimable)
+    {
+        (uint256[] memory accIncrease, uint256 fixedIncrease) = _pendingRewards();
+        uint256 accRewardPerShare = _currentAccRewardPerShare(_pid, accIncrease, fixedIncrease);
+        claimable = new uint256[](_users.length);
+        for (uint256 i = 0; i < _users.length; i++) {
+            claimable[i] = _claimable(_pid, _users[i], accRewardPerShare);
+        }
+        return claimable;
+    }
+
+    // Update the global reward accumulators
+    function _updateRewards() internal {
+        if (block.timestamp > lastRewardTime) {
+            (uint256[] memory accIncrease, uint256 fixedIncrease) = _pendingRewards();
+            for (uint256 i = 0; i < accIncrease.length; i++) {
+                if (accIncrease[i] > 0) {
+                    accRewardPerAllocPoint[i] = accRewardPerAllocPoint[i].add(accIncrease[i]);
+                }
+            }
+            if (fixedIncrease > 0) {
+                fixedPoolReward = fixedPoolReward.add(fixedIncrease);
+            }
+            lastRewardTime = block.timestamp;
         }
         uint256 length = emissionSchedule.length;
         if (startTime > 0 && length > 0) {
@@ -198,36 +303,52 @@ contract LpTokenStaker is Ownable {
     }
 
     // Update reward variables of the given pool to be up-to-date.
-    function _updatePool(uint256 _pid, uint256 _allocPoint, uint256 _totalAllocPoint) internal {
+    // Must be called after `_updateRewards`.
+    function _updatePool(uint256 _pid) internal {
         PoolInfo storage pool = poolInfo[_pid];
-        if (block.timestamp <= pool.lastRewardTime) {
+        uint256 acc = _pid == 0 ? fixedPoolReward : accRewardPerAllocPoint[pool.oracleIndex];
+        if (acc == pool.accRewardPaid) {
             return;
         }
         uint256 lpSupply = pool.lpToken.balanceOf(address(this));
-        if (lpSupply == 0 || _totalAllocPoint == 0) {
-            pool.lastRewardTime = block.timestamp;
-            return;
+        if (lpSupply > 0) {
+            uint256 reward = _poolReward(_pid, pool, acc);
+            pool.accRewardPerShare = pool.accRewardPerShare.add(reward.mul(1e12).div(lpSupply));
         }
-        uint256 duration = block.timestamp.sub(pool.lastRewardTime);
-        uint256 reward = duration.mul(rewardsPerSecond).mul(_allocPoint).div(_totalAllocPoint);
-        pool.accRewardPerShare = pool.accRewardPerShare.add(reward.mul(1e12).div(lpSupply));
+        pool.accRewardPaid = acc;
         pool.lastRewardTime = block.timestamp;
     }
 
+    function setOperator(address _operator, bool _approved) external {
+        operators[msg.sender][_operator] = _approved;
+        emit OperatorSet(msg.sender, _operator, _approved);
+    }
+
     // Deposit LP tokens into the contract. Also triggers a claim.
     function deposit(uint256 _pid, uint256 _amount) public {
+        _deposit(_pid, _amount, msg.sender);
+    }
+
+    // Deposit LP tokens held by `_user`. Can only be called by an operator of the user.
+    function depositFor(uint256 _pid, uint256 _amount, address _user) external {
+        require(operators[_user][msg.sender], "depositFor: not operator");
+        _deposit(_pid, _amount, _user);
+    }
+
+    function _deposit(uint256 _pid, uint256 _amount, address _user) internal {
         PoolInfo storage pool = poolInfo[_pid];
-        UserInfo storage user = userInfo[_pid][msg.sender];
-        _massUpdatePools();
+        UserInfo storage user = userInfo[_pid][_user];
+        _updateRewards();
+        _updatePool(_pid);
         if (user.amount > 0) {
             uint256 pending =
                 user.amount.mul(pool.accRewardPerShare).div(1e12).sub(
                     user.rewardDebt
                 );
-            rewardMinter.mint(msg.sender, pending);
+            rewardMinter.mint(_user, pending);
         }
         pool.lpToken.safeTransferFrom(
-            address(msg.sender),
+            _user,
             address(this),
             _amount
         );
@@ -235,32 +356,45 @@ contract LpTokenStaker is Ownable {
         user.rewardDebt = user.amount.mul(pool.accRewardPerShare).div(1e12);
         if (_pid > 0) {
             pool.allocPoint = pool.allocPoint.add(_amount);
+            oracleAllocPoint[pool.oracleIndex] = oracleAllocPoint[pool.oracleIndex].add(_amount);
             totalAllocPoint = totalAllocPoint.add(_amount);
         }
-        emit Deposit(msg.sender, _pid, _amount);
+        emit Deposit(_user, _pid, _amount);
     }
 
     // Withdraw LP tokens. Also triggers a claim.
     function withdraw(uint256 _pid, uint256 _amount) public {
+        _withdraw(_pid, _amount, msg.sender);
+    }
+
+    // Withdraw LP tokens to `_user`. Can only be called by an operator of the user.
+    function withdrawFor(uint256 _pid, uint256 _amount, address _user) external {
+        require(operators[_user][msg.sender], "withdrawFor: not operator");
+        _withdraw(_pid, _amount, _user);
+    }
+
+    function _withdraw(uint256 _pid, uint256 _amount, address _user) internal {
         PoolInfo storage pool = poolInfo[_pid];
-        UserInfo storage user = userInfo[_pid][msg.sender];
+        UserInfo storage user = userInfo[_pid][_user];
         require(user.amount >= _amount, "withdraw: not good");
-        _massUpdatePools();
+        _updateRewards();
+        _updatePool(_pid);
         uint256 pending =
             user.amount.mul(pool.accRewardPerShare).div(1e12).sub(
                 user.rewardDebt
             );
         if (pending > 0) {
-            rewardMinter.mint(msg.sender, pending);
+            rewardMinter.mint(_user, pending);
         }
         user.amount = user.amount.sub(_amount);
         user.rewardDebt = user.amount.mul(pool.accRewardPerShare).div(1e12);
         if (_pid > 0) {
             pool.allocPoint = pool.allocPoint.sub(_amount);
+            oracleAllocPoint[pool.oracleIndex] = oracleAllocPoint[pool.oracleIndex].sub(_amount);
             totalAllocPoint = totalAllocPoint.sub(_amount);
         }
-        pool.lpToken.safeTransfer(address(msg.sender), _amount);
-        emit Withdraw(msg.sender, _pid, _amount);
+        pool.lpToken.safeTransfer(_user, _amount);
+        emit Withdraw(_user, _pid, _amount);
     }
 
      // Withdraw without caring about rewards. EMERGENCY ONLY.
@@ -279,6 +413,11 @@ contract LpTokenStaker is Ownable {
             } else {
                 pool.allocPoint = 0;
             }
+            if (oracleAllocPoint[pool.oracleIndex] >= amount) {
+                oracleAllocPoint[pool.oracleIndex] = oracleAllocPoint[pool.oracleIndex].sub(amount);
+            } else {
+                oracleAllocPoint[pool.oracleIndex] = 0;
+            }
             if (totalAllocPoint >= amount) {
                 totalAllocPoint = totalAllocPoint.sub(amount);
             } else {
@@ -290,9 +429,10 @@ contract LpTokenStaker is Ownable {
     // Claim pending rewards for one or more pools.
     // Rewards are not received directly, they are minted by the rewardMinter.
     function claim(uint256[] calldata _pids) external {
-        _massUpdatePools();
+        _updateRewards();
         uint256 pending;
         for (uint i = 0; i < _pids.length; i++) {
+            _updatePool(_pids[i]);
             PoolInfo storage pool = poolInfo[_pids[i]];
             UserInfo storage user = userInfo[_pids[i]][msg.sender];
             pending = pending.add(user.amount.mul(pool.accRewardPerShare).div(1e12).sub(user.rewardDebt));
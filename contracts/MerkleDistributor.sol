@@ -1,5 +1,6 @@
 // SPDX-License-Identifier: UNLICENSED
 pragma solidity 0.7.6;
+pragma abicoder v2;
 
 interface Minter {
     function mint(address _receiver, uint256 _amount) external;
@@ -26,6 +27,13 @@ contract MerkleDistributor {
         uint256 amount
     );
 
+    struct ClaimData {
+        uint256 merkleIndex;
+        uint256 index;
+        uint256 amount;
+        bytes32[] merkleProof;
+    }
+
     // This is a packed array of booleans.
     mapping(uint256 => mapping(uint256 => uint256)) private claimedBitMap;
     Minter public rewardMinter;
@@ -79,6 +87,15 @@ contract MerkleDistributor {
         return claimedWord & mask == mask;
     }
 
+    // Returns `count` words of the claimed bitmap of `merkleIndex`, starting at word `start`.
+    // Bit `index % 256` of word `index / 256` is set once `index` has claimed.
+    function claimedWords(uint256 merkleIndex, uint256 start, uint256 count) external view returns (uint256[] memory words) {
+        words = new uint256[](count);
+        for (uint256 i = 0; i < count; i++) {
+            words[i] = claimedBitMap[merkleIndex][start + i];
+        }
+    }
+
     function _setClaimed(uint256 merkleIndex, uint256 index) private {
         uint256 claimedWordIndex = index / 256;
         uint256 claimedBitIndex = index % 256;
@@ -100,6 +117,47 @@ contract MerkleDistributor {
         emit Claimed(merkleIndex, index, msg.sender, amount);
     }
 
+    // Claim from several distributions in one call. Claimed bits are written once per
+    // bitmap word and the summed amount is minted in a single call.
+    function claimMulti(ClaimData[] calldata claims) external {
+        uint256 total;
+        uint256 length = merkleRoots.length;
+        // the bitmap word currently being modified, index / 256 can never reach uint256(-1)
+        uint256 wordMerkleIndex;
+        uint256 wordIndex = uint256(-1);
+        uint256 word;
+
+        for (uint256 i = 0; i < claims.length; i++) {
+            ClaimData calldata data = claims[i];
+            require(data.merkleIndex < length, "MerkleDistributor: Invalid merkleIndex");
+
+            uint256 claimedWordIndex = data.index / 256;
+            if (claimedWordIndex != wordIndex || data.merkleIndex != wordMerkleIndex) {
+                if (wordIndex != uint256(-1)) {
+                    claimedBitMap[wordMerkleIndex][wordIndex] = word;
+                }
+                wordMerkleIndex = data.merkleIndex;
+                wordIndex = claimedWordIndex;
+                word = claimedBitMap[wordMerkleIndex][wordIndex];
+            }
+            uint256 mask = (1 << (data.index % 256));
+            require(word & mask == 0, 'MerkleDistributor: Drop already claimed.');
+
+            bytes32 node = keccak256(abi.encodePacked(data.index, msg.sender, data.amount));
+            require(verify(data.merkleProof, merkleRoots[data.merkleIndex], node), 'MerkleDistributor: Invalid proof.');
+
+            word = word | mask;
+            total = total + data.amount;
+            require(total >= data.amount);
+            emit Claimed(data.merkleIndex, data.index, msg.sender, data.amount);
+        }
+
+        if (wordIndex != uint256(-1)) {
+            claimedBitMap[wordMerkleIndex][wordIndex] = word;
+            rewardMinter.mint(msg.sender, total);
+        }
+    }
+
     function verify(bytes32[] calldata proof, bytes32 root, bytes32 leaf) internal pure returns (bool) {
         bytes32 computedHash = leaf;
 
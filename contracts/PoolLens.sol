@@ -0,0 +1,134 @@
+pragma solidity 0.7.6;
+pragma abicoder v2;
+
+interface IStableSwapView {
+    function coins(uint256 i) external view returns (address);
+    function balances(uint256 i) external view returns (uint256);
+    function admin_balances(uint256 i) external view returns (uint256);
+    function fee() external view returns (uint256);
+    function admin_fee() external view returns (uint256);
+    function initial_A() external view returns (uint256);
+    function future_A() external view returns (uint256);
+    function initial_A_time() external view returns (uint256);
+    function future_A_time() external view returns (uint256);
+    function get_virtual_price() external view returns (uint256);
+}
+
+interface IStableSwapMetaView {
+    function lp_token() external view returns (address);
+    function base_pool() external view returns (address);
+    function base_virtual_price() external view returns (uint256);
+    function base_cache_updated() external view returns (uint256);
+}
+
+interface IERC20View {
+    function decimals() external view returns (uint8);
+    function totalSupply() external view returns (uint256);
+}
+
+// Read the full state of many StableSwap pools in a single eth_call
+contract PoolLens {
+
+    uint256 constant MAX_COINS = 8;
+
+    struct PoolState {
+        address pool;
+        address lpToken;
+        // zero for base pools
+        address basePool;
+        address[] coins;
+        uint256[] decimals;
+        uint256[] balances;
+        uint256[] adminBalances;
+        uint256 totalSupply;
+        uint256 fee;
+        uint256 adminFee;
+        uint256 initialA;
+        uint256 futureA;
+        uint256 initialATime;
+        uint256 futureATime;
+        // zero when the pool is empty
+        uint256 virtualPrice;
+        uint256 baseVirtualPrice;
+        uint256 baseCacheUpdated;
+    }
+
+    function _coins(IStableSwapView pool) internal view returns (address[] memory coins) {
+        address[MAX_COINS] memory found;
+        uint256 count;
+        for (; count < MAX_COINS; count++) {
+            try pool.coins(count) returns (address coin) {
+                found[count] = coin;
+            } catch {
+                break;
+            }
+        }
+        coins = new address[](count);
+        for (uint256 i = 0; i < count; i++) {
+            coins[i] = found[i];
+        }
+        return coins;
+    }
+
+    function _poolState(IStableSwapView pool, address lpToken) internal view returns (PoolState memory state) {
+        state.pool = address(pool);
+        state.coins = _coins(pool);
+        uint256 count = state.coins.length;
+        state.decimals = new uint256[](count);
+        state.balances = new uint256[](count);
+        state.adminBalances = new uint256[](count);
+        for (uint256 i = 0; i < count; i++) {
+            state.decimals[i] = IERC20View(state.coins[i]).decimals();
+            state.balances[i] = pool.balances(i);
+            state.adminBalances[i] = pool.admin_balances(i);
+        }
+
+        state.fee = pool.fee();
+        state.adminFee = pool.admin_fee();
+        state.initialA = pool.initial_A();
+        state.futureA = pool.future_A();
+        state.initialATime = pool.initial_A_time();
+        state.futureATime = pool.future_A_time();
+        try pool.get_virtual_price() returns (uint256 virtualPrice) {
+            state.virtualPrice = virtualPrice;
+        } catch {}
+
+        // only metapools expose their LP token and base pool
+        try IStableSwapMetaView(address(pool)).base_pool() returns (address basePool) {
+            IStableSwapMetaView meta = IStableSwapMetaView(address(pool));
+            state.basePool = basePool;
+            state.baseVirtualPrice = meta.base_virtual_price();
+            state.baseCacheUpdated = meta.base_cache_updated();
+            if (lpToken == address(0)) lpToken = meta.lp_token();
+        } catch {}
+        state.lpToken = lpToken;
+        if (lpToken != address(0)) {
+            state.totalSupply = IERC20View(lpToken).totalSupply();
+        }
+        return state;
+    }
+
+    /**
+        @notice Get the state of each pool in `_pools`
+        @dev Base pools do not expose their LP token, pass it in `_lpTokens`
+             or the total supply is returned as zero. `_lpTokens` may be empty
+             or hold the zero address for metapools.
+     */
+    function getPoolStates(
+        address[] calldata _pools,
+        address[] calldata _lpTokens
+    ) external view returns (
+        uint256 blockNumber,
+        uint256 timestamp,
+        PoolState[] memory states
+    ) {
+        require(_lpTokens.length == 0 || _lpTokens.length == _pools.length, "Length mismatch");
+        states = new PoolState[](_pools.length);
+        for (uint256 i = 0; i < _pools.length; i++) {
+            address lpToken = _lpTokens.length == 0 ? address(0) : _lpTokens[i];
+            states[i] = _poolState(IStableSwapView(_pools[i]), lpToken);
+        }
+        return (block.number, block.timestamp, states);
+    }
+
+}
@@ -4,6 +4,7 @@ import "@openzeppelin/contracts/token/ERC20/IERC20.sol";
 import "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
 import "@openzeppelin/contracts/math/Math.sol";
 import "@openzeppelin/contracts/math/SafeMath.sol";
+import "@openzeppelin/contracts/utils/SafeCast.sol";
 import "@openzeppelin/contracts/access/Ownable.sol";
 import "@openzeppelin/contracts/utils/ReentrancyGuard.sol";
 
@@ -14,6 +15,7 @@ import "@openzeppelin/contracts/utils/ReentrancyGuard.sol";
 contract RewardsToken is ReentrancyGuard, Ownable {
 
     using SafeMath for uint256;
+    using SafeCast for uint256;
     using SafeERC20 for IERC20;
 
     /* ========== STATE VARIABLES ========== */
@@ -26,16 +28,31 @@ contract RewardsToken is ReentrancyGuard, Ownable {
     address public lpStaker;
     address public minter;
 
+    // packed so that a checkpoint reads two slots and writes at most one
     struct Reward {
+        // written on each checkpoint
+        uint192 rewardPerTokenStored;
+        uint64 lastUpdateTime;
+        // written when rewards are added
+        uint128 rewardRate;
+        uint64 periodFinish;
+        uint32 rewardsDuration;
+        bool active;
         address rewardsDistributor;
-        uint256 rewardsDuration;
-        uint256 periodFinish;
-        uint256 rewardRate;
-        uint256 lastUpdateTime;
-        uint256 rewardPerTokenStored;
+        // value of `retiredEpoch` after the last retirement of the token, 0 if it never retired
+        uint64 retiredAt;
     }
-    mapping(address => Reward) public rewardData;
+    mapping(address => Reward) internal rewardState;
+    // every reward token ever added
     address[] public rewardTokens;
+    // reward tokens with an unfinished reward period, checkpointed on every balance change
+    address[] public activeRewardTokens;
+    // reward tokens that finished a period and stopped being checkpointed, each listed once
+    address[] public retiredRewardTokens;
+    // incremented on every retirement of a reward token
+    uint256 public retiredEpoch;
+    // user -> `retiredEpoch` when the user was last settled for retired reward tokens
+    mapping(address => uint256) public userRetiredEpoch;
 
     // user -> reward token -> amount
     mapping(address => mapping(address => uint256)) public userRewardPerTokenPaid;
@@ -81,14 +98,14 @@ contract RewardsToken is ReentrancyGuard, Ownable {
         public
         onlyOwner
     {
-        require(rewardData[_rewardsToken].rewardsDuration == 0);
+        require(rewardState[_rewardsToken].rewardsDuration == 0);
         rewardTokens.push(_rewardsToken);
-        rewardData[_rewardsToken].rewardsDistributor = _rewardsDistributor;
-        rewardData[_rewardsToken].rewardsDuration = _rewardsDuration;
+        rewardState[_rewardsToken].rewardsDistributor = _rewardsDistributor;
+        rewardState[_rewardsToken].rewardsDuration = _rewardsDuration.toUint32();
     }
 
     function setRewardsDistributor(address _rewardsToken, address _rewardsDistributor) external onlyOwner {
-        rewardData[_rewardsToken].rewardsDistributor = _rewardsDistributor;
+        rewardState[_rewardsToken].rewardsDistributor = _rewardsDistributor;
     }
 
     function setMinter(address _minter) external {
@@ -99,35 +116,104 @@ contract RewardsToken is ReentrancyGuard, Ownable {
     /* ========== MODIFIERS ========== */
 
     modifier updateReward(address payable[2] memory accounts) {
+        _updateReward(accounts);
+        _;
+    }
+
+    /* ========== INTERNAL FUNCTIONS ========== */
+
+    function _updateReward(address payable[2] memory accounts) internal {
         address _lpStaker = lpStaker;
-        for (uint i; i < rewardTokens.length; i++) {
-            address token = rewardTokens[i];
-            rewardData[token].rewardPerTokenStored = rewardPerToken(token);
-            rewardData[token].lastUpdateTime = lastTimeRewardApplicable(token);
+        uint256 length = activeRewardTokens.length;
+        for (uint i; i < length; ) {
+            address token = activeRewardTokens[i];
+            uint256 rpt = _updateRewardPerToken(token);
             for (uint x = 0; x < accounts.length; x++) {
                 address account = accounts[x];
                 if (account == address(0)) break;
                 if (account == _lpStaker) continue;
-                rewards[account][token] = earned(account, token);
-                userRewardPerTokenPaid[account][token] = rewardData[token].rewardPerTokenStored;
+                _updateAccount(account, token, rpt);
+            }
+            if (block.timestamp >= rewardState[token].periodFinish) {
+                // the period is over and `rewardPerTokenStored` is final. accounts that
+                // were not checkpointed above are settled via `retiredRewardTokens`
+                length = length.sub(1);
+                activeRewardTokens[i] = activeRewardTokens[length];
+                activeRewardTokens.pop();
+                Reward storage r = rewardState[token];
+                r.active = false;
+                if (r.retiredAt == 0) retiredRewardTokens.push(token);
+                uint256 retired = retiredEpoch.add(1);
+                retiredEpoch = retired;
+                r.retiredAt = retired.toUint64();
+            } else {
+                i++;
             }
         }
-        _;
+
+        // settle each account once for every token that retired since it was last settled.
+        // the cost depends on the number of retired tokens, not on how often they retired
+        uint256 epoch = retiredEpoch;
+        length = retiredRewardTokens.length;
+        for (uint x = 0; x < accounts.length; x++) {
+            address account = accounts[x];
+            if (account == address(0)) break;
+            if (account == _lpStaker) continue;
+            uint256 settled = userRetiredEpoch[account];
+            if (settled == epoch) continue;
+            for (uint i; i < length; i++) {
+                address token = retiredRewardTokens[i];
+                Reward storage r = rewardState[token];
+                if (r.retiredAt > settled) {
+                    _updateAccount(account, token, r.rewardPerTokenStored);
+                }
+            }
+            userRetiredEpoch[account] = epoch;
+        }
+    }
+
+    function _updateRewardPerToken(address _rewardsToken) internal returns (uint256) {
+        Reward storage reward = rewardState[_rewardsToken];
+        uint256 last = lastTimeRewardApplicable(_rewardsToken);
+        if (last == reward.lastUpdateTime) {
+            return reward.rewardPerTokenStored;
+        }
+        uint256 rpt = rewardPerToken(_rewardsToken);
+        reward.rewardPerTokenStored = _toUint192(rpt);
+        reward.lastUpdateTime = uint64(last);
+        return rpt;
+    }
+
+    function _updateAccount(address account, address _rewardsToken, uint256 rpt) internal {
+        uint256 paid = userRewardPerTokenPaid[account][_rewardsToken];
+        if (paid == rpt) return;
+        uint256 balance = balanceOf[account].add(depositedBalanceOf[account]);
+        if (balance > 0) {
+            rewards[account][_rewardsToken] = rewards[account][_rewardsToken].add(
+                balance.mul(rpt.sub(paid)).div(1e18)
+            );
+        }
+        userRewardPerTokenPaid[account][_rewardsToken] = rpt;
+    }
+
+    function _toUint192(uint256 value) internal pure returns (uint192) {
+        require(value < 2**192, "Value does not fit in 192 bits");
+        return uint192(value);
     }
 
     /* ========== VIEWS ========== */
 
     function lastTimeRewardApplicable(address _rewardsToken) public view returns (uint256) {
-        return Math.min(block.timestamp, rewardData[_rewardsToken].periodFinish);
+        return Math.min(block.timestamp, uint256(rewardState[_rewardsToken].periodFinish));
     }
 
     function rewardPerToken(address _rewardsToken) public view returns (uint256) {
-        Reward storage reward = rewardData[_rewardsToken];
+        Reward storage reward = rewardState[_rewardsToken];
         if (totalSupply == 0) {
             return reward.rewardPerTokenStored;
         }
         uint256 last = lastTimeRewardApplicable(_rewardsToken);
-        return reward.rewardPerTokenStored.add(
+        return uint256(reward.rewardPerTokenStored).add(
             last.sub(reward.lastUpdateTime).mul(reward.rewardRate).mul(1e18).div(totalSupply)
         );
     }
@@ -140,7 +226,35 @@ contract RewardsToken is ReentrancyGuard, Ownable {
     }
 
     function getRewardForDuration(address _rewardsToken) external view returns (uint256) {
-        return rewardData[_rewardsToken].rewardRate.mul(rewardData[_rewardsToken].rewardsDuration);
+        return uint256(rewardState[_rewardsToken].rewardRate).mul(rewardState[_rewardsToken].rewardsDuration);
+    }
+
+    // the getter of the unpacked struct, in its original field order
+    function rewardData(address _rewardsToken) external view returns (
+        address rewardsDistributor,
+        uint256 rewardsDuration,
+        uint256 periodFinish,
+        uint256 rewardRate,
+        uint256 lastUpdateTime,
+        uint256 rewardPerTokenStored
+    ) {
+        Reward storage reward = rewardState[_rewardsToken];
+        return (
+            reward.rewardsDistributor,
+            reward.rewardsDuration,
+            reward.periodFinish,
+            reward.rewardRate,
+            reward.lastUpdateTime,
+            reward.rewardPerTokenStored
+        );
+    }
+
+    function activeRewardTokenCount() external view returns (uint256) {
+        return activeRewardTokens.length;
+    }
+
+    function retiredRewardTokenCount() external view returns (uint256) {
+        return retiredRewardTokens.length;
     }
 
     /* ========== MUTATIVE FUNCTIONS ========== */
@@ -216,40 +330,45 @@ contract RewardsToken is ReentrancyGuard, Ownable {
         external
         updateReward([address(0), address(0)])
     {
-        require(rewardData[_rewardsToken].rewardsDistributor == msg.sender);
+        Reward storage r = rewardState[_rewardsToken];
+        require(r.rewardsDistributor == msg.sender);
         // handle the transfer of reward tokens via `transferFrom` to reduce the number
         // of transactions required and ensure correctness of the reward amount
         IERC20(_rewardsToken).safeTransferFrom(msg.sender, address(this), reward);
 
-        if (block.timestamp >= rewardData[_rewardsToken].periodFinish) {
-            rewardData[_rewardsToken].rewardRate = reward.div(rewardData[_rewardsToken].rewardsDuration);
+        if (block.timestamp >= r.periodFinish) {
+            r.rewardRate = reward.div(r.rewardsDuration).toUint128();
         } else {
-            uint256 remaining = rewardData[_rewardsToken].periodFinish.sub(block.timestamp);
-            uint256 leftover = remaining.mul(rewardData[_rewardsToken].rewardRate);
-            rewardData[_rewardsToken].rewardRate = reward.add(leftover).div(rewardData[_rewardsToken].rewardsDuration);
+            uint256 remaining = uint256(r.periodFinish).sub(block.timestamp);
+            uint256 leftover = remaining.mul(r.rewardRate);
+            r.rewardRate = reward.add(leftover).div(r.rewardsDuration).toUint128();
         }
 
-        rewardData[_rewardsToken].lastUpdateTime = block.timestamp;
-        rewardData[_rewardsToken].periodFinish = block.timestamp.add(rewardData[_rewardsToken].rewardsDuration);
+        r.lastUpdateTime = block.timestamp.toUint64();
+        r.periodFinish = block.timestamp.add(r.rewardsDuration).toUint64();
+        if (!r.active) {
+            r.active = true;
+            activeRewardTokens.push(_rewardsToken);
+        }
         emit RewardAdded(reward);
     }
 
     // Added to support recovering LP Rewards from other systems such as BAL to be distributed to holders
     function recoverERC20(address tokenAddress, uint256 tokenAmount) external onlyOwner {
-        require(rewardData[tokenAddress].lastUpdateTime == 0, "Cannot withdraw reward token");
+        require(rewardState[tokenAddress].lastUpdateTime == 0, "Cannot withdraw reward token");
         IERC20(tokenAddress).safeTransfer(owner(), tokenAmount);
         emit Recovered(tokenAddress, tokenAmount);
     }
 
     function setRewardsDuration(address _rewardsToken, uint256 _rewardsDuration) external {
         require(
-            block.timestamp > rewardData[_rewardsToken].periodFinish,
+            block.timestamp > rewardState[_rewardsToken].periodFinish,
             "Reward period still active"
         );
-        require(rewardData[_rewardsToken].rewardsDistributor == msg.sender);
+        require(rewardState[_rewardsToken].rewardsDistributor == msg.sender);
         require(_rewardsDuration > 0, "Reward duration must be non-zero");
-        rewardData[_rewardsToken].rewardsDuration = _rewardsDuration;
-        emit RewardsDurationUpdated(_rewardsToken, rewardData[_rewardsToken].rewardsDuration);
+        rewardState[_rewardsToken].rewardsDuration = _rewardsDuration.toUint32();
+        emit RewardsDurationUpdated(_rewardsToken, rewardState[_rewardsToken].rewardsDuration);
     }
 
     function mint(
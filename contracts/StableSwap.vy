@@ -389,6 +389,10 @@ def get_y(i: int128, j: int128, x: uint256, xp_: uint256[N_COINS]) -> uint256:
     b: uint256 = S_ + D / Ann  # - D
     y_prev: uint256 = 0
     y: uint256 = D
+    # y decreases as x increases, so the current balance of j is a closer
+    # starting point from above than D
+    if x >= xp_[i] and xp_[j] < D:
+        y = xp_[j]
     for _i in range(255):
         y_prev = y
         y = (y*y + c) / (2 * y + b - D)
@@ -617,6 +621,10 @@ def get_y_D(A_: uint256, i: int128, xp: uint256[N_COINS], D: uint256) -> uint256
     b: uint256 = S_ + D / Ann
     y_prev: uint256 = 0
     y: uint256 = D
+    # D is not above the invariant of xp, so the current balance of i is a
+    # closer starting point from above than D
+    if xp[i] < D:
+        y = xp[i]
     for _i in range(255):
         y_prev = y
         y = (y*y + c) / (2 * y + b - D)
@@ -495,6 +495,10 @@ def _get_y(i: int128, j: int128, x: uint256, _xp: uint256[N_COINS]) -> uint256:
     c = c * D * A_PRECISION / (Ann * N_COINS)
     b: uint256 = S + D * A_PRECISION / Ann  # - D
     y: uint256 = D
+    # y decreases as x increases, so the current balance of j is a closer
+    # starting point from above than D
+    if x >= _xp[i] and _xp[j] < D:
+        y = _xp[j]
     for _i in range(255):
         y_prev = y
         y = (y*y + c) / (2 * y + b - D)
@@ -893,6 +897,10 @@ def _get_y_D(A: uint256, i: int128, _xp: uint256[N_COINS], D: uint256) -> uint25
     c = c * D * A_PRECISION / (Ann * N_COINS)
     b: uint256 = S + D * A_PRECISION / Ann
     y: uint256 = D
+    # D is not above the invariant of xp, so the current balance of i is a
+    # closer starting point from above than D
+    if _xp[i] < D:
+        y = _xp[i]
 
     for _i in range(255):
         y_prev = y
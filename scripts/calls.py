@@ -0,0 +1,17 @@
+"""
+Encode contract calls for `eth_call` and raw transactions, without loading the
+contract ABI through brownie.
+"""
+
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector
+
+# the largest number of coins in a StableSwap pool
+MAX_COINS = 8
+
+
+def calldata(signature, *args):
+    """Calldata of `signature`, such as `"coins(uint256)"`, called with `args`."""
+    types = signature[signature.index("(") + 1:-1]
+    types = types.split(",") if types else []
+    return "0x" + (function_signature_to_4byte_selector(signature) + encode(types, args)).hex()
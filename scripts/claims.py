@@ -0,0 +1,100 @@
+"""
+Report which recipients of the `MerkleDistributor` airdrops have claimed.
+
+The claimed bitmap of each distribution is read with `claimedWords`, up to
+`WORDS_PER_CALL` words per call, and decoded with numpy. Bit `index % 256` of
+word `index // 256` is set once `index` has claimed. The amounts come from the
+output directories of `scripts/merkle.py`, one per `merkleIndex` in order, and
+the root of each directory is checked against the contract.
+
+`MerkleDistributor` has no expiry: a drop that is not claimed stays claimable
+in every later week. Each week reports what is left unclaimed, and
+`carried_forward`, the total left unclaimed in that week and all the weeks
+before it. This is what the distributor still owes when the next root is
+proposed.
+
+Usage:
+
+    brownie run claims main output/week0 output/week1 ... --network <network>
+"""
+
+import json
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+
+# 262144 recipients per call
+WORDS_PER_CALL = 1024
+
+WeekClaims = namedtuple(
+    "WeekClaims",
+    ["merkle_index", "recipients", "claimed", "claimed_amount", "unclaimed_amount", "carried_forward"],
+)
+
+
+def read_claims(path):
+    """
+    Read a distribution written by `scripts/merkle.py`. Returns `(root,
+    amounts)` where `amounts[index]` is the amount of `index`, or `None` for
+    indexes without a recipient.
+    """
+    path = Path(path)
+    root = json.loads(path.joinpath("distribution.json").read_text())["merkleRoot"]
+    claims = {}
+    for shard in path.joinpath("claims").glob("*.json"):
+        claims.update((i["index"], int(i["amount"], 16)) for i in json.loads(shard.read_text()).values())
+    amounts = np.full(max(claims) + 1 if claims else 0, None, dtype=object)
+    amounts[list(claims)] = list(claims.values())
+    return root, amounts
+
+
+def decode_words(words):
+    """Flags of every index covered by the bitmap `words`, `True` once claimed."""
+    data = b"".join(int(i).to_bytes(32, "little") for i in words)
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder="little").astype(bool)
+
+
+def claimed_flags(merkle, merkle_index, size, block=None):
+    """Claimed flags of the first `size` indexes of `merkle_index`."""
+    words = []
+    count = -(-size // 256)
+    for start in range(0, count, WORDS_PER_CALL):
+        words.extend(merkle.claimedWords(
+            merkle_index, start, min(WORDS_PER_CALL, count - start), block_identifier=block
+        ))
+    return decode_words(words)[:size]
+
+
+def scan(merkle, distributions, block=None):
+    """
+    Scan the claims of `distributions`, a list of directories written by
+    `scripts/merkle.py` in `merkleIndex` order. Returns a list of `WeekClaims`.
+    """
+    weeks = []
+    carried_forward = 0
+    for merkle_index, path in enumerate(distributions):
+        root, amounts = read_claims(path)
+        if bytes(merkle.merkleRoots(merkle_index, block_identifier=block)) != bytes.fromhex(root[2:]):
+            raise ValueError(f"{path} is not the distribution at merkleIndex {merkle_index}")
+
+        present = np.not_equal(amounts, None)
+        claimed = claimed_flags(merkle, merkle_index, len(amounts), block) & present
+        claimed_amount = amounts[claimed].sum()
+        unclaimed_amount = amounts[present & ~claimed].sum()
+        carried_forward += unclaimed_amount
+        weeks.append(WeekClaims(
+            merkle_index, int(present.sum()), int(claimed.sum()), claimed_amount, unclaimed_amount, carried_forward
+        ))
+    return weeks
+
+
+def main(*distributions):
+    from brownie import MerkleDistributor
+
+    for week in scan(MerkleDistributor[-1], distributions):
+        print(
+            f"{week.merkle_index}: {week.claimed}/{week.recipients} claimed, "
+            f"{week.claimed_amount / 10**18:.2f} EPS claimed, {week.unclaimed_amount / 10**18:.2f} unclaimed, "
+            f"{week.carried_forward / 10**18:.2f} carried forward"
+        )
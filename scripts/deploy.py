@@ -1,14 +1,19 @@
+import tempfile
+from pathlib import Path
+
 from brownie import (
     accounts,
-    Contract,
-    MultiFeeDistribution,
-    LpTokenStaker,
     FeeConverter,
+    LpTokenStaker,
     MerkleDistributor,
+    MultiFeeDistribution,
     StableSwap,
     Token,
+    web3,
 )
 
+from scripts.pipeline import Call, Deploy, Pipeline, Ref
+
 
 DAY = 86400
 MONTH = DAY * 30
@@ -20,49 +25,108 @@ REWARD_OFFSETS = [0, MONTH, MONTH * 2, MONTH * 3, YEAR, YEAR * 2, YEAR * 3, YEAR
 
 LAUNCH_OFFSET = 3600
 
+COINS = [
+    "0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56",  # busd
+    "0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d",  # usdc
+    "0x55d398326f99059fF775485246999027B3197955"   # usdt
+]
+PANCAKE_ROUTER = "0x05fF2B0DB69458A0750badebc4f9e13aDd608C7F"
+AIRDROP_REVIEWER = "0x7EeAC6CDdbd1D0B8aF061742D41877D7F707289a"
+
+POOL2_LIQUIDITY = 5000 * 10**18
 
-def main():
-    deployer = accounts.load('deployer')
-    lp_token = Token.deploy("Ellipsis.finance BUSD/USDC/USDT", "3EPS", 0, {"from": deployer})
-    fee_converter = FeeConverter.deploy({"from": deployer})
-    airdrop_distro = MerkleDistributor.deploy(deployer, "0x7EeAC6CDdbd1D0B8aF061742D41877D7F707289a", {'from': deployer})
-
-    coins = [
-        "0xe9e7CEA3DedcA5984780Bafc599bD69ADd087D56",  # busd
-        "0x8AC76a51cc950d9822D68b83fE1Ad97B32Cd580d",  # usdc
-        "0x55d398326f99059fF775485246999027B3197955"   # usdt
-    ]
-    swap = StableSwap.deploy(
-        deployer,
-        coins,  # coins,
-        lp_token,
-        1500,  # A
-        4000000,  # fee
-        5000000000,  # admin fee
-        fee_converter,
-        {"from": deployer},
-    )
-    lp_token.set_minter(swap, {"from": deployer})
-
-    initial_supply = TOTAL_SUPPLY // 5 + (5000*10**18)
-    eps = Token.deploy("Ellipsis", "EPS", initial_supply, {"from": deployer})
-
-    cake = Contract('0x05ff2b0db69458a0750badebc4f9e13add608c7f')
-    tx = cake.addLiquidityETH(eps, 5000*10**18, 5000*10**18, 10**18, deployer, 2000000000, {'from': deployer})
-    cakelp = tx.events['PairCreated']['pair']
 
+def plan(deployer, coins=COINS, pancake_router=PANCAKE_ROUTER):
+    """
+    Steps of the core deployment. Without `pancake_router` a plain token stands
+    in for the EPS/BNB pair staked in the first pool.
+    """
     per_period = [int(i * 100000) * TOTAL_SUPPLY // 100000 for i in REWARD_AMOUNTS]
     durations = [REWARD_OFFSETS[i + 1] - REWARD_OFFSETS[i] for i in range(len(REWARD_OFFSETS) - 1)]
     rewards_per_block = [per_period[i] // durations[i] for i in range(len(durations))] + [0]
     offsets = [i + LAUNCH_OFFSET for i in REWARD_OFFSETS]
+    initial_supply = TOTAL_SUPPLY // 5 + POOL2_LIQUIDITY
+
+    steps = [
+        Deploy("lp_token", Token, "Ellipsis.finance BUSD/USDC/USDT", "3EPS", 0),
+        Deploy("fee_converter", FeeConverter),
+        Deploy("airdrop_distro", MerkleDistributor, deployer, AIRDROP_REVIEWER),
+        Deploy("eps", Token, "Ellipsis", "EPS", initial_supply),
+        Deploy(
+            "swap",
+            StableSwap,
+            deployer,
+            coins,
+            Ref("lp_token"),
+            1500,  # A
+            4000000,  # fee
+            5000000000,  # admin fee
+            Ref("fee_converter"),
+        ),
+        Call("lp_token.set_minter", Ref("lp_token"), Token, "set_minter", Ref("swap")),
+    ]
+
+    if pancake_router is None:
+        steps.append(Deploy("cakelp", Token, "Pancake LPs", "Cake-LP", 0))
+    else:
+        steps += [
+            Call("eps.approve", Ref("eps"), Token, "approve", pancake_router, POOL2_LIQUIDITY),
+            Call(
+                "cakelp",
+                pancake_router,
+                None,
+                "addLiquidityETH",
+                Ref("eps"),
+                POOL2_LIQUIDITY,
+                POOL2_LIQUIDITY,
+                10**18,
+                deployer,
+                2000000000,
+                value=10**18,
+                event=("PairCreated", "pair"),
+                after=["eps.approve"],
+            ),
+        ]
+
+    steps += [
+        Deploy("lp_staker", LpTokenStaker, offsets, rewards_per_block, Ref("cakelp")),
+        Call("lp_staker.addPool", Ref("lp_staker"), LpTokenStaker, "addPool", Ref("lp_token"), 0),
+        Deploy("eps_staker", MultiFeeDistribution, Ref("eps"), [Ref("lp_staker"), Ref("airdrop_distro")]),
+        Call(
+            "eps_staker.addReward", Ref("eps_staker"), MultiFeeDistribution, "addReward", coins[0], Ref("fee_converter")
+        ),
+        Call("lp_staker.setMinter", Ref("lp_staker"), LpTokenStaker, "setMinter", Ref("eps_staker")),
+        Call("eps.set_minter", Ref("eps"), Token, "set_minter", Ref("eps_staker")),
+        Call(
+            "fee_converter.setFeeDistributor",
+            Ref("fee_converter"),
+            FeeConverter,
+            "setFeeDistributor",
+            Ref("eps_staker"),
+        ),
+        Call("airdrop_distro.setMinter", Ref("airdrop_distro"), MerkleDistributor, "setMinter", Ref("eps_staker")),
+    ]
+    return steps
+
+
+def main(state_path="deployment.json"):
+    """Deploy, or resume the deployment recorded in `state_path`."""
+    deployer = accounts.load('deployer')
+    results = Pipeline(plan(deployer), deployer, state_path).run()
+    for name, address in results.items():
+        if address is not None:
+            print(f"{name}: {address}")
 
-    lp_staker = LpTokenStaker.deploy(offsets, rewards_per_block, cakelp, {"from": deployer})
-    lp_staker.addPool(lp_token, 0, {'from': deployer})
 
-    eps_staker = MultiFeeDistribution.deploy(eps, [lp_staker, airdrop_distro], {"from": deployer})
-    eps_staker.addReward(coins[0], fee_converter, {'from': deployer})
+def dry_run():
+    """
+    Run the whole deployment on the local development chain, with a throwaway
+    state file and the first local account as deployer:
 
-    lp_staker.setMinter(eps_staker, {"from": deployer})
-    eps.set_minter(eps_staker, {'from': deployer})
-    fee_converter.setFeeDistributor(eps_staker, {"from": deployer})
-    airdrop_distro.setMinter(eps_staker, {'from': deployer})
+        brownie run deploy dry_run
+    """
+    deployer = accounts[0]
+    router = PANCAKE_ROUTER if web3.eth.get_code(PANCAKE_ROUTER) else None
+    with tempfile.TemporaryDirectory() as path:
+        results = Pipeline(plan(deployer, pancake_router=router), deployer, Path(path) / "deployment.json").run()
+    return results
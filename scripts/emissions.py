@@ -0,0 +1,139 @@
+"""
+Vectorised model of `LpTokenStaker` reward emissions.
+
+The emission rate follows `emissionSchedule`: `rewardsPerSecond` starts at
+zero and moves to the next entry once more than `startTimeOffset` seconds
+have passed since `start()`. On-chain the schedule only advances inside
+`_updateRewards`, one entry per call, and the new rate applies from that call
+onwards. Passing the timestamps of the deposits, withdrawals and claims as
+`updates` reproduces this exactly; without them the rate changes at the
+offsets, which is what the chain converges to when the staker is used often.
+
+Emissions are shared between pools by allocation points. The pool at pid 0
+always receives 20%, and every other pool receives the remaining 80%
+in proportion to `staked * price`. Here `staked` is the amount of LP tokens
+deposited into the pool, which is its allocation point, and `price` is the
+answer of its oracle, 1e8 for USD pools. Nothing is emitted while no pool
+other than pid 0 has a deposit. Rewards for a pool without deposits are not
+minted.
+
+All arrays broadcast over a leading time axis, so years of per-second rates
+and cumulative emissions for every pool can be projected in one call.
+"""
+
+import numpy as np
+
+DAY = 86400
+YEAR = DAY * 365
+
+# the pool at pid 0 always receives this share of the emissions
+FIXED_POOL_SHARE = 0.2
+
+
+def schedule_from_amounts(total_supply, amounts, offsets):
+    """
+    Rewards per second for an emission schedule where `amounts[i]` of
+    `total_supply` is emitted between `offsets[i]` and `offsets[i+1]`, as
+    computed by `scripts/deploy.py`. The last period has a rate of zero.
+    """
+    per_period = [int(i * 100000) * total_supply // 100000 for i in amounts]
+    durations = [offsets[i + 1] - offsets[i] for i in range(len(offsets) - 1)]
+    return [per_period[i] // durations[i] for i in range(len(durations))] + [0]
+
+
+def rate_steps(start_time, offsets, rewards_per_second, updates=None):
+    """
+    Return `(times, rates)` where `rates[k]` is `rewardsPerSecond` for the
+    period after `times[k]`. Before `times[0]` the rate is zero.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    rewards_per_second = np.asarray(rewards_per_second, dtype=float)
+    if updates is None:
+        return start_time + offsets.astype(float), rewards_per_second
+
+    updates = np.sort(np.asarray(updates, dtype=float))
+    updates = updates[updates >= start_time]
+    # number of schedule entries due at each update
+    due = np.searchsorted(offsets, updates - start_time, side="left")
+    # only one entry is applied per update: pops[k] = min(pops[k-1] + 1, due[k])
+    k = np.arange(len(updates))
+    pops = k + np.minimum(1, np.minimum.accumulate(due - k)) if len(k) else k
+    rates = np.where(pops > 0, rewards_per_second[np.maximum(pops - 1, 0)], 0.0)
+    return updates, rates
+
+
+def emission_rate(times, start_time, offsets, rewards_per_second, updates=None):
+    """Total rewards per second at each of `times`."""
+    steps, rates = rate_steps(start_time, offsets, rewards_per_second, updates)
+    idx = np.searchsorted(steps, np.asarray(times, dtype=float), side="left") - 1
+    return np.where(idx < 0, 0.0, rates[np.maximum(idx, 0)])
+
+
+def cumulative_emissions(times, start_time, offsets, rewards_per_second, updates=None):
+    """Total rewards emitted from the start until each of `times`."""
+    times = np.asarray(times, dtype=float)
+    steps, rates = rate_steps(start_time, offsets, rewards_per_second, updates)
+    if not len(steps):
+        return np.zeros_like(times)
+    emitted = np.concatenate([[0.0], np.cumsum(rates[:-1] * np.diff(steps))])
+    idx = np.searchsorted(steps, times, side="left") - 1
+    safe = np.maximum(idx, 0)
+    return np.where(idx < 0, 0.0, emitted[safe] + rates[safe] * (times - steps[safe]))
+
+
+def pool_shares(staked, prices):
+    """
+    Share of the emissions received by each pool.
+
+    `staked` and `prices` hold one column for each pool from pid 1 onwards and
+    broadcast against each other. The result has an extra leading column for
+    pid 0.
+    """
+    weights = np.asarray(staked, dtype=float) * np.asarray(prices, dtype=float)
+    total = weights.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = np.where(total > 0, weights / total * (1 - FIXED_POOL_SHARE), 0.0)
+    fixed = np.where(total > 0, FIXED_POOL_SHARE, 0.0)
+    return np.concatenate([fixed, shares], axis=-1)
+
+
+def project(times, start_time, offsets, rewards_per_second, staked, prices, updates=None):
+    """
+    Project per-pool reward rates and cumulative rewards over `times`.
+
+    `staked` and `prices` give the state of the pools at each of `times`,
+    with shape `(len(times), n_pools)` or broadcastable to it, and are
+    assumed constant until the next time. Returns `(rates, cumulative)` with
+    shape `(len(times), n_pools + 1)`, where `cumulative` counts from
+    `times[0]` and column 0 is pid 0.
+    """
+    times = np.asarray(times, dtype=float)
+    shares = pool_shares(staked, prices)
+    shares = np.broadcast_to(shares, (len(times), shares.shape[-1]))
+
+    rates = emission_rate(times, start_time, offsets, rewards_per_second, updates)[:, None] * shares
+    emitted = np.diff(cumulative_emissions(times, start_time, offsets, rewards_per_second, updates))
+    cumulative = np.zeros_like(shares)
+    cumulative[1:] = np.cumsum(emitted[:, None] * shares[:-1], axis=0)
+    return rates, cumulative
+
+
+def apr(rates, tvl, reward_price):
+    """
+    Annual percentage rate of each pool, given its per-second reward `rates`,
+    its value locked and the price of the reward token in the same unit.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(np.asarray(tvl) > 0, np.asarray(rates) * reward_price * YEAR / tvl * 100, np.nan)
+
+
+def main():
+    from scripts.deploy import LAUNCH_OFFSET, REWARD_AMOUNTS, REWARD_OFFSETS, TOTAL_SUPPLY
+
+    rewards_per_second = schedule_from_amounts(TOTAL_SUPPLY, REWARD_AMOUNTS, REWARD_OFFSETS)
+    offsets = [i + LAUNCH_OFFSET for i in REWARD_OFFSETS]
+    times = np.arange(0, 6 * YEAR, DAY, dtype=float)
+    total = cumulative_emissions(times, 0, offsets, rewards_per_second)
+    rate = emission_rate(times, 0, offsets, rewards_per_second)
+    for day in range(0, len(times), 91):
+        print(f"day {day:>5}: {rate[day] / 1e18 * DAY:>14,.0f} EPS/day, {total[day] / 1e18:>16,.0f} EPS emitted")
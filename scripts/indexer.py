@@ -0,0 +1,317 @@
+"""
+Index pool, staker and airdrop events into SQLite.
+
+Logs are fetched for every indexed contract at once with `eth_getLogs`. The
+block range of each request adapts to the node: a failing request is split in
+half until it succeeds, and the range grows again after each success. Logs are
+decoded through a table of `topic0 -> event` built once from the contract
+ABIs, and the rows of one block range are written in a single transaction
+together with a checkpoint holding the hash of the last block in the range.
+
+When the indexer starts, and before each range, the newest checkpoint is
+compared with the chain. After a reorg the indexer rolls back to the newest
+checkpoint that is still canonical and indexes from there again.
+
+Each event gets its own table named after the event. Every table has the
+columns `block_number`, `block_hash`, `transaction_hash`, `log_index` and
+`address`, followed by one column per event argument. Integers wider than 64
+bits are stored as decimal strings and arrays as JSON. When contracts emit
+versions of an event with different arguments, such as `RemoveLiquidityOne`
+of base and meta pools, the table has the columns of all of them and
+arguments missing from a version are `NULL`.
+
+Usage:
+
+    brownie run indexer main events.db [start_block] --network <network>
+"""
+
+import json
+import sqlite3
+
+from eth_abi import decode
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+
+INDEXED_EVENTS = (
+    # StableSwap / StableSwapMeta
+    "TokenExchange",
+    "TokenExchangeUnderlying",
+    "AddLiquidity",
+    "RemoveLiquidity",
+    "RemoveLiquidityOne",
+    "RemoveLiquidityImbalance",
+    # LpTokenStaker
+    "Deposit",
+    "Withdraw",
+    "EmergencyWithdraw",
+    # MultiFeeDistribution
+    "Staked",
+    "Locked",
+    "Minted",
+    "Withdrawn",
+    "PenaltyPaid",
+    "ExpiredLocksWithdrawn",
+    "RewardPaid",
+    # MerkleDistributor
+    "Claimed",
+)
+
+BASE_COLUMNS = ("block_number", "block_hash", "transaction_hash", "log_index", "address")
+
+
+def _hex(value):
+    return "0x" + bytes(value).hex()
+
+
+def _is_wide_int(abi_type):
+    if not abi_type.startswith(("uint", "int")):
+        return False
+    bits = abi_type[4:] if abi_type.startswith("uint") else abi_type[3:]
+    return int(bits or 256) > 63
+
+
+def _to_sql(abi_type, value):
+    if abi_type.endswith("]"):
+        return json.dumps([_to_sql(abi_type[:abi_type.rindex("[")], i) for i in value])
+    if abi_type == "address":
+        return to_checksum_address(value)
+    if abi_type.startswith("bytes"):
+        return _hex(value)
+    if _is_wide_int(abi_type):
+        return str(value)
+    return value
+
+
+def _column_type(abi_type):
+    if abi_type.endswith("]") or _is_wide_int(abi_type) or not abi_type.startswith(("uint", "int", "bool")):
+        return "TEXT"
+    return "INTEGER"
+
+
+class EventDecoder:
+    """Decode raw logs for the events in `names`, keyed on the first topic."""
+
+    def __init__(self, abis, names=INDEXED_EVENTS):
+        self.events = {}
+        self.tables = {}
+        for abi in abis:
+            for item in abi:
+                if item["type"] != "event" or item["name"] not in names or item.get("anonymous"):
+                    continue
+                topic = event_abi_to_log_topic(item)
+                if topic in self.events:
+                    continue
+                inputs = item["inputs"]
+                # versions of an event with different arguments share a table holding all of them
+                columns = self.tables.setdefault(item["name"], [])
+                for column in ((i["name"], _column_type(i["type"])) for i in inputs):
+                    if column not in columns:
+                        if column[0] in dict(columns):
+                            raise ValueError(f"Event '{item['name']}' has conflicting types for '{column[0]}'")
+                        columns.append(column)
+                self.events[topic] = (
+                    item["name"],
+                    [i["type"] for i in inputs if i["indexed"]],
+                    [i["type"] for i in inputs if not i["indexed"]],
+                    [(i["name"], i["indexed"]) for i in inputs],
+                )
+        self.topics = [_hex(i) for i in self.events]
+
+    def decode(self, log):
+        """Return `(table, row)` for a log, or `None` if the event is not indexed."""
+        topics = log["topics"]
+        if not topics:
+            return None
+        event = self.events.get(bytes(topics[0]))
+        if event is None:
+            return None
+        name, indexed_types, data_types, order = event
+
+        indexed = iter(decode([abi_type], bytes(topic))[0] for abi_type, topic in zip(indexed_types, topics[1:]))
+        data = iter(decode(data_types, bytes(log["data"])))
+        indexed_types, data_types = iter(indexed_types), iter(data_types)
+        values = {}
+        for arg, is_indexed in order:
+            if is_indexed:
+                values[arg] = _to_sql(next(indexed_types), next(indexed))
+            else:
+                values[arg] = _to_sql(next(data_types), next(data))
+
+        row = (
+            log["blockNumber"],
+            _hex(log["blockHash"]),
+            _hex(log["transactionHash"]),
+            log["logIndex"],
+            to_checksum_address(log["address"]),
+        )
+        return name, row + tuple(values.get(i[0]) for i in self.tables[name])
+
+
+class EventIndexer:
+    """
+    Index the events of `contracts`, a dict of `address -> abi`, into the
+    SQLite database at `db_path`.
+
+    Only blocks that are `confirmations` blocks behind the chain head are
+    indexed. Checkpoints for the last `reorg_depth` indexed ranges are kept to
+    recover from reorgs.
+    """
+
+    def __init__(
+        self,
+        web3,
+        db_path,
+        contracts,
+        start_block=0,
+        confirmations=0,
+        batch_size=2000,
+        max_batch_size=100000,
+        reorg_depth=128,
+    ):
+        self.web3 = web3
+        self.addresses = [to_checksum_address(i) for i in contracts]
+        self.decoder = EventDecoder(contracts.values())
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.batch_size = batch_size
+        self.max_batch_size = max_batch_size
+        self.reorg_depth = reorg_depth
+
+        self.db = sqlite3.connect(db_path)
+        self._create_tables()
+
+    def _create_tables(self):
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints (block_number INTEGER PRIMARY KEY, block_hash TEXT NOT NULL)"
+            )
+            self._inserts = {}
+            for table, columns in self.decoder.tables.items():
+                definitions = ", ".join(f'"{name}" {column_type}' for name, column_type in columns)
+                self.db.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{table}" (block_number INTEGER NOT NULL, block_hash TEXT NOT NULL, '
+                    f'transaction_hash TEXT NOT NULL, log_index INTEGER NOT NULL, address TEXT NOT NULL, {definitions}, '
+                    'PRIMARY KEY (block_number, log_index))'
+                )
+                placeholders = ", ".join("?" * (len(BASE_COLUMNS) + len(columns)))
+                self._inserts[table] = f'INSERT OR REPLACE INTO "{table}" VALUES ({placeholders})'
+
+    def close(self):
+        self.db.close()
+
+    @property
+    def last_block(self):
+        """The last indexed block, or `None` if nothing has been indexed."""
+        row = self.db.execute("SELECT MAX(block_number) FROM checkpoints").fetchone()
+        return row[0]
+
+    def _get_logs(self, from_block, to_block):
+        return self.web3.eth.get_logs({
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "address": self.addresses,
+            "topics": [self.decoder.topics],
+        })
+
+    def _fetch_logs(self, from_block, to_block):
+        try:
+            logs = self._get_logs(from_block, to_block)
+        except Exception:
+            # nodes fail on ranges that are too large or hold too many logs in
+            # a variety of ways, anything but a single block is worth splitting
+            if from_block == to_block:
+                raise
+            middle = (from_block + to_block) // 2
+            self.batch_size = max(1, (to_block - from_block + 1) // 2)
+            return self._fetch_logs(from_block, middle) + self._fetch_logs(middle + 1, to_block)
+        return list(logs)
+
+    def _block_hash(self, number):
+        return _hex(self.web3.eth.get_block(number)["hash"])
+
+    def _rewind(self):
+        """Roll back to the newest checkpoint on the canonical chain. Returns the blocks dropped."""
+        checkpoints = self.db.execute(
+            "SELECT block_number, block_hash FROM checkpoints ORDER BY block_number DESC"
+        ).fetchall()
+        if not checkpoints:
+            return 0
+        head = checkpoints[0][0]
+        ancestor = self.start_block - 1
+        for number, block_hash in checkpoints:
+            if self._block_hash(number) == block_hash:
+                ancestor = number
+                break
+        if ancestor == head:
+            return 0
+        with self.db:
+            for table in self.decoder.tables:
+                self.db.execute(f'DELETE FROM "{table}" WHERE block_number > ?', (ancestor,))
+            self.db.execute("DELETE FROM checkpoints WHERE block_number > ?", (ancestor,))
+        return head - ancestor
+
+    def _index_range(self, from_block, to_block):
+        block_hash = self._block_hash(to_block)
+        logs = self._fetch_logs(from_block, to_block)
+
+        rows = {}
+        for log in logs:
+            if log["blockNumber"] == to_block and _hex(log["blockHash"]) != block_hash:
+                # the chain reorganised while fetching, try again
+                return None
+            decoded = self.decoder.decode(log)
+            if decoded is not None:
+                rows.setdefault(decoded[0], []).append(decoded[1])
+
+        with self.db:
+            for table, values in rows.items():
+                self.db.executemany(self._inserts[table], values)
+            self.db.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?)", (to_block, block_hash))
+            self.db.execute(
+                "DELETE FROM checkpoints WHERE block_number NOT IN "
+                "(SELECT block_number FROM checkpoints ORDER BY block_number DESC LIMIT ?)",
+                (self.reorg_depth,),
+            )
+        return sum(len(i) for i in rows.values())
+
+    def sync(self, to_block=None):
+        """
+        Index up to `to_block`, or up to the confirmed chain head.
+
+        Returns the number of events written.
+        """
+        if to_block is None:
+            to_block = self.web3.eth.block_number - self.confirmations
+
+        count = 0
+        while True:
+            self._rewind()
+            last = self.last_block
+            from_block = self.start_block if last is None else last + 1
+            if from_block > to_block:
+                return count
+            end = min(from_block + self.batch_size - 1, to_block)
+            written = self._index_range(from_block, end)
+            if written is None:
+                continue
+            count += written
+            self.batch_size = min(self.batch_size * 2, self.max_batch_size)
+
+
+def main(db_path="events.db", start_block=0):
+    from brownie import (
+        LpTokenStaker,
+        MerkleDistributor,
+        MultiFeeDistribution,
+        StableSwap,
+        StableSwapMeta,
+        web3,
+    )
+
+    contracts = {}
+    for container in (StableSwap, StableSwapMeta, LpTokenStaker, MultiFeeDistribution, MerkleDistributor):
+        contracts.update((i.address, container.abi) for i in container)
+
+    indexer = EventIndexer(web3, db_path, contracts, start_block=int(start_block))
+    count = indexer.sync()
+    print(f"Indexed {count} events up to block {indexer.last_block} into {db_path}")
+    indexer.close()
@@ -0,0 +1,300 @@
+"""
+Keeper for harvesting the admin fees of StableSwap pools.
+
+Each run reads the admin balances of every pool at one block, with the calls
+made concurrently, and values them in USD. Base pool LP tokens held by a
+metapool are valued at the virtual price of the base pool. The gas of each
+harvest is estimated as well, and a pool is harvested once its fees are worth
+`min_profit` times the gas cost.
+
+Pools are harvested by calling `withdraw_admin_fees` on each of them, or with
+a single `FeeClaimer.harvest` when a fee claimer is given, so that the fee
+converters notify each reward token once. Pools that are not registered in the
+claimer are still harvested one by one. Transactions are signed with nonces
+assigned locally and sent one after the other without waiting for them to be
+mined, and the keeper waits for all receipts at the end of the run.
+
+Every run, and every harvest within it, is logged to SQLite.
+
+Usage:
+
+    brownie run keeper main keeper.db [bnb_price] [interval] --network <network>
+"""
+
+import asyncio
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from eth_abi import decode
+from eth_utils import to_checksum_address
+
+from scripts.calls import MAX_COINS, calldata
+
+# a harvest of one pool, `status` is `None` when no transaction was mined
+Harvest = namedtuple(
+    "Harvest", ["pool", "value", "cost", "tx_hash", "nonce", "status", "gas_used", "error"]
+)
+
+
+class NonceManager:
+    """
+    Assign consecutive nonces to the transactions of `address` without waiting
+    for each one to be mined. After a failed submission the nonce is read from
+    the node again.
+    """
+
+    def __init__(self, web3, address):
+        self.web3 = web3
+        self.address = address
+        self.nonce = None
+
+    def sync(self):
+        self.nonce = self.web3.eth.get_transaction_count(self.address, "pending")
+
+    def next(self):
+        if self.nonce is None:
+            self.sync()
+        nonce = self.nonce
+        self.nonce += 1
+        return nonce
+
+
+class Keeper:
+    """
+    Harvest the admin fees of `pools`, a list of pool addresses, from
+    `account`. The harvests are logged to the SQLite database at `db_path`.
+
+    `native_price` is the USD price of the gas token and `prices` a dict of
+    `coin -> USD price` for the pool coins, coins missing from it are worth
+    one dollar. When `gas_price` is `None` the price of the node is used.
+    """
+
+    def __init__(
+        self,
+        web3,
+        account,
+        pools,
+        db_path,
+        native_price,
+        claimer=None,
+        prices=None,
+        min_profit=2,
+        gas_price=None,
+        max_workers=16,
+    ):
+        self.web3 = web3
+        self.account = account
+        self.address = to_checksum_address(getattr(account, "address", account))
+        self.pools = [to_checksum_address(i) for i in pools]
+        self.native_price = native_price
+        self.claimer = to_checksum_address(claimer) if claimer else None
+        self.prices = {to_checksum_address(k): v for k, v in (prices or {}).items()}
+        self.min_profit = min_profit
+        self.gas_price = gas_price
+        self.nonces = NonceManager(web3, self.address)
+        self.executor = ThreadPoolExecutor(max_workers)
+        self._pool_info = None
+
+        self.db = sqlite3.connect(db_path)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, timestamp INTEGER NOT NULL, "
+                "block_number INTEGER NOT NULL, gas_price INTEGER NOT NULL, pools INTEGER NOT NULL, "
+                "harvested INTEGER NOT NULL, value REAL NOT NULL, cost REAL NOT NULL, error TEXT)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS harvests (run_id INTEGER NOT NULL, pool TEXT NOT NULL, "
+                "value REAL NOT NULL, cost REAL NOT NULL, tx_hash TEXT, nonce INTEGER, status INTEGER, "
+                "gas_used INTEGER, error TEXT)"
+            )
+
+    def close(self):
+        self.executor.shutdown()
+        self.db.close()
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def _call(self, to, signature, *args, block="latest", output="uint256"):
+        try:
+            result = await self._run(self.web3.eth.call, {"to": to, "data": calldata(signature, *args)}, block)
+        except Exception:
+            return None
+        return decode([output], bytes(result))[0]
+
+    async def _load(self):
+        """Read the coins, decimals and base pool of each pool, and the pools of the claimer."""
+        info = {}
+        for pool in self.pools:
+            coins = await asyncio.gather(
+                *(self._call(pool, "coins(uint256)", i, output="address") for i in range(MAX_COINS))
+            )
+            coins = [to_checksum_address(i) for i in coins[:coins.index(None) if None in coins else MAX_COINS]]
+            decimals = await asyncio.gather(*(self._call(i, "decimals()") for i in coins))
+            base_pool = await self._call(pool, "base_pool()", output="address")
+            info[pool] = (coins, decimals, base_pool and to_checksum_address(base_pool))
+
+        self._claimer_index = {}
+        if self.claimer:
+            count = await self._call(self.claimer, "poolCount()")
+            pools = await asyncio.gather(
+                *(self._call(self.claimer, "pools(uint256)", i, output="address") for i in range(count))
+            )
+            self._claimer_index = {to_checksum_address(k): i for i, k in enumerate(pools)}
+        self._pool_info = info
+
+    async def pool_values(self, block):
+        """USD value of the admin balances of each pool at `block`."""
+        reads = []
+        for pool in self.pools:
+            coins, _, base_pool = self._pool_info[pool]
+            reads.append(asyncio.gather(
+                *(self._call(pool, "admin_balances(uint256)", i, block=block) for i in range(len(coins)))
+            ))
+            if base_pool:
+                reads.append(self._call(base_pool, "get_virtual_price()", block=block))
+        results = iter(await asyncio.gather(*reads))
+
+        values = {}
+        for pool in self.pools:
+            coins, decimals, base_pool = self._pool_info[pool]
+            rates = [self.prices.get(i, 1) for i in coins]
+            balances = next(results)
+            if base_pool:
+                rates[-1] = next(results) / 10**18
+            values[pool] = sum(
+                (balance or 0) / 10**decimal * rate for balance, decimal, rate in zip(balances, decimals, rates)
+            )
+        return values
+
+    async def _estimate(self, to, data):
+        try:
+            return await self._run(self.web3.eth.estimate_gas, {"from": self.address, "to": to, "data": data})
+        except Exception:
+            return None
+
+    def _cost(self, gas, gas_price):
+        return gas * gas_price / 10**18 * self.native_price
+
+    def _send(self, to, data, gas, gas_price, nonce):
+        tx = {"from": self.address, "to": to, "data": data, "gas": gas, "gasPrice": gas_price, "nonce": nonce}
+        private_key = getattr(self.account, "private_key", None)
+        if private_key is None:
+            return self.web3.eth.send_transaction(tx)
+        tx["chainId"] = self.web3.eth.chain_id
+        del tx["from"]
+        signed = self.web3.eth.account.sign_transaction(tx, private_key)
+        return self.web3.eth.send_raw_transaction(signed.rawTransaction)
+
+    async def _plan(self, values, gas_price):
+        """The transactions worth sending: `(to, data, gas, pools)` in order of value."""
+        pools = sorted(self.pools, key=lambda i: -values[i])
+        data = calldata("withdraw_admin_fees()")
+        estimates = await asyncio.gather(*(self._estimate(i, data) for i in pools))
+        # a harvest that fails to estimate would revert, most often for lack of fees
+        profitable = [
+            (pool, gas) for pool, gas in zip(pools, estimates)
+            if gas is not None and values[pool] >= self.min_profit * self._cost(gas, gas_price)
+        ]
+
+        # pools the claimer does not know about are harvested one by one
+        single = [
+            (pool, data, gas, [pool]) for pool, gas in profitable
+            if self.claimer is None or pool not in self._claimer_index
+        ]
+        if self.claimer is None:
+            return single
+
+        pools = [i[0] for i in profitable if i[0] in self._claimer_index]
+        while pools:
+            data = calldata("harvest(uint256[])", [self._claimer_index[i] for i in pools])
+            gas = await self._estimate(self.claimer, data)
+            if gas is not None and sum(values[i] for i in pools) >= self.min_profit * self._cost(gas, gas_price):
+                return [(self.claimer, data, gas, pools)] + single
+            # drop the least valuable pool until the batch pays for itself
+            pools = pools[:-1]
+        return single
+
+    async def run_once(self):
+        """Harvest every pool worth harvesting. Returns a list of `Harvest`."""
+        if self._pool_info is None:
+            await self._load()
+        block = await self._run(self.web3.eth.get_block, "latest")
+        gas_price = self.gas_price or await self._run(lambda: self.web3.eth.gas_price)
+
+        values = await self.pool_values(block["number"])
+        plan = await self._plan(values, gas_price)
+
+        harvests = []
+        pending = []
+        for to, data, gas, pools in plan:
+            cost = self._cost(gas, gas_price) / len(pools)
+            # leave room for the state to change between estimate and inclusion
+            gas = gas * 5 // 4
+            nonce = self.nonces.next()
+            try:
+                tx_hash = await self._run(self._send, to, data, gas, gas_price, nonce)
+            except Exception as exc:
+                self.nonces.sync()
+                harvests.extend(Harvest(i, values[i], cost, None, None, None, None, str(exc)) for i in pools)
+                continue
+            pending.append((tx_hash, nonce, pools, cost))
+
+        receipts = await asyncio.gather(
+            *(self._run(self.web3.eth.wait_for_transaction_receipt, i[0]) for i in pending),
+            return_exceptions=True,
+        )
+        for (tx_hash, nonce, pools, cost), receipt in zip(pending, receipts):
+            tx_hash = "0x" + bytes(tx_hash).hex()
+            if isinstance(receipt, Exception):
+                harvests.extend(Harvest(i, values[i], cost, tx_hash, nonce, None, None, str(receipt)) for i in pools)
+            else:
+                status, gas_used = receipt["status"], receipt["gasUsed"]
+                harvests.extend(Harvest(i, values[i], cost, tx_hash, nonce, status, gas_used, None) for i in pools)
+
+        self._log(block, gas_price, values, harvests)
+        return harvests
+
+    def _log(self, block, gas_price, values, harvests, error=None):
+        with self.db:
+            run_id = self.db.execute(
+                "INSERT INTO runs (timestamp, block_number, gas_price, pools, harvested, value, cost, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    block["timestamp"],
+                    block["number"],
+                    gas_price,
+                    len(values),
+                    sum(i.status == 1 for i in harvests),
+                    sum(values.values()),
+                    sum(i.cost for i in harvests),
+                    error,
+                ),
+            ).lastrowid
+            self.db.executemany(
+                "INSERT INTO harvests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", [(run_id,) + tuple(i) for i in harvests]
+            )
+
+    async def run_forever(self, interval):
+        """Run every `interval` seconds. A failing run is logged and does not stop the keeper."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as exc:
+                self.nonces.sync()
+                self._log({"timestamp": int(time.time()), "number": -1}, 0, {}, [], repr(exc))
+            await asyncio.sleep(interval)
+
+
+def main(db_path="keeper.db", bnb_price=300, interval=3600):
+    from brownie import FeeClaimer, StableSwap, StableSwapMeta, accounts, web3
+
+    pools = [i.address for i in StableSwap] + [i.address for i in StableSwapMeta]
+    claimer = FeeClaimer[-1].address if len(FeeClaimer) else None
+    keeper = Keeper(web3, accounts.load("keeper"), pools, db_path, float(bnb_price), claimer=claimer)
+    try:
+        asyncio.run(keeper.run_forever(int(interval)))
+    finally:
+        keeper.close()
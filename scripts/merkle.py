@@ -0,0 +1,405 @@
+"""
+Build the weekly airdrop distributions for `MerkleDistributor`.
+
+Leaves are `keccak256(abi.encodePacked(index, account, amount))`. Leaves are
+sorted, and each pair of nodes is hashed in sorted order with an odd node being
+promoted to the next layer, which is the scheme `MerkleDistributor.verify`
+expects.
+
+Usage:
+
+    python -m scripts.merkle balances.csv output/ [--workers N] [--shard-chars N] [--cache merkle.db [--dry-run]]
+
+`balances.csv` holds one `account,amount` row per recipient (amount in wei, an
+optional header row is skipped). The merkle root and token total are written to
+`output/distribution.json` and the claims to `output/claims/<prefix>.json`,
+sharded by the first characters of the lowercase account address.
+
+With `--cache merkle.db` the distribution is built from the last one stored in
+that database and only the leaves that changed are hashed again, see
+`IncrementalBuilder`. The added, removed and changed recipients are written to
+`output/diff.json` for review before the root is proposed. `--dry-run` writes
+the distribution and the diff without replacing the stored build.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sqlite3
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from eth_utils import to_checksum_address
+
+try:
+    # pysha3 is several times faster than going through eth-hash
+    from sha3 import keccak_256
+
+    def keccak(data):
+        return keccak_256(data).digest()
+except ImportError:
+    from eth_utils import keccak
+
+# layers smaller than this are hashed in the main process
+PARALLEL_THRESHOLD = 2 ** 14
+CHUNK_SIZE = 2 ** 16
+
+
+def leaf_hash(index, account, amount):
+    return keccak(index.to_bytes(32, "big") + bytes.fromhex(account[2:]) + amount.to_bytes(32, "big"))
+
+
+def _hash_leaves(rows):
+    return [leaf_hash(*row) for row in rows]
+
+
+def _hash_pairs(nodes):
+    return [keccak(b"".join(sorted(nodes[i:i+2]))) if i + 1 < len(nodes) else nodes[i] for i in range(0, len(nodes), 2)]
+
+
+def _chunks(items, size):
+    return [items[i:i+size] for i in range(0, len(items), size)]
+
+
+def _map(executor, fn, items):
+    # chunks are even-sized so that pairs never straddle two chunks
+    if executor is None or len(items) < PARALLEL_THRESHOLD:
+        return fn(items)
+    result = []
+    for chunk in executor.map(fn, _chunks(items, CHUNK_SIZE)):
+        result.extend(chunk)
+    return result
+
+
+class MerkleTree:
+
+    def __init__(self, leaves, executor=None):
+        layers = [sorted(set(leaves))]
+        while len(layers[-1]) > 1:
+            layers.append(_map(executor, _hash_pairs, layers[-1]))
+        self.layers = layers
+        self._positions = {leaf: i for i, leaf in enumerate(layers[0])}
+
+    @classmethod
+    def from_layers(cls, layers):
+        """A tree from layers built elsewhere, where empty positions are `None`."""
+        tree = cls.__new__(cls)
+        tree.layers = layers
+        tree._positions = {leaf: i for i, leaf in enumerate(layers[0]) if leaf is not None}
+        return tree
+
+    @property
+    def root(self):
+        return self.layers[-1][0]
+
+    def get_proof(self, leaf):
+        return _proof(self.layers, self._positions[leaf])
+
+
+def _proof(layers, idx):
+    proof = []
+    for layer in layers[:-1]:
+        pair_idx = idx ^ 1
+        if pair_idx < len(layer) and layer[pair_idx] is not None:
+            proof.append(layer[pair_idx])
+        idx >>= 1
+    return proof
+
+
+def read_balances(path):
+    """Stream `(account, amount)` rows from a balances CSV."""
+    with open(path, newline="") as fp:
+        for row in csv.reader(fp):
+            if not row or not row[0].strip():
+                continue
+            account, amount = (i.strip() for i in row[:2])
+            if not account.startswith("0x"):
+                # header row
+                continue
+            yield to_checksum_address(account), int(amount)
+
+
+def build_distribution(balances, workers=None):
+    """
+    Build the merkle tree for an iterable of `(account, amount)`.
+
+    Returns `(tree, elements)` where `elements` is a list of
+    `(index, account, amount, leaf)` in input order.
+    """
+    rows = [(index, account, amount) for index, (account, amount) in enumerate(balances)]
+    if workers == 1:
+        leaves = _hash_leaves(rows)
+        tree = MerkleTree(leaves)
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            leaves = _map(executor, _hash_leaves, rows)
+            tree = MerkleTree(leaves, executor)
+    return tree, [row + (leaf,) for row, leaf in zip(rows, leaves)]
+
+
+def write_distribution(tree, elements, output_dir, shard_chars=2):
+    """
+    Write the root, token total and sharded claims of a distribution.
+
+    Claims for an account are found in `claims/<account[2:2+shard_chars]>.json`.
+    Returns the summary written to `distribution.json`.
+    """
+    output_dir = Path(output_dir)
+    claims_dir = output_dir.joinpath("claims")
+    claims_dir.mkdir(parents=True, exist_ok=True)
+
+    # encode every node once rather than once per proof it appears in
+    hex_layers = [["0x" + i.hex() if i is not None else None for i in layer] for layer in tree.layers]
+    positions = tree._positions
+    shards = {}
+    for element in elements:
+        shards.setdefault(element[1][2:2+shard_chars].lower(), []).append(element)
+
+    for prefix, shard in shards.items():
+        claims = {
+            account: {
+                "index": index,
+                "amount": hex(amount),
+                "proof": _proof(hex_layers, positions[leaf]),
+            }
+            for index, account, amount, leaf in shard
+        }
+        with claims_dir.joinpath(f"{prefix}.json").open("w") as fp:
+            fp.write(json.dumps(claims))
+
+    summary = {
+        "merkleRoot": hex_layers[-1][0],
+        "tokenTotal": hex(sum(i[2] for i in elements)),
+        "recipients": len(elements),
+        "shardChars": shard_chars,
+    }
+    with output_dir.joinpath("distribution.json").open("w") as fp:
+        json.dump(summary, fp, indent=2)
+    return summary
+
+
+# a recipient of the previous build that is gone, new or has a new amount
+Diff = namedtuple("Diff", ["added", "removed", "changed"])
+
+EMPTY_NODE = b"\x00" * 32
+
+
+def _combine(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return keccak(b"".join(sorted([a, b])))
+
+
+def _pack(layer):
+    return b"".join(EMPTY_NODE if i is None else i for i in layer)
+
+
+def _unpack(blob):
+    return [None if blob[i:i+32] == EMPTY_NODE else blob[i:i+32] for i in range(0, len(blob), 32)]
+
+
+def update_layers(layers, width, leaves):
+    """
+    Apply `leaves`, a dict of `position -> leaf or None`, to the layers of a
+    tree with `width` leaf positions. Only the ancestors of changed positions
+    are hashed again. Returns `(layers, hashed)`.
+    """
+    layer = list(layers[0]) if layers else []
+    # positions cut from the end are dirty too, their parents lose a child
+    dirty = set(leaves) | set(range(width, len(layer)))
+    layer = layer[:width] + [None] * (width - len(layer))
+    for position, leaf in leaves.items():
+        if position < width:
+            layer[position] = leaf
+
+    result = [layer]
+    hashed = 0
+    while len(layer) > 1:
+        width = (len(layer) + 1) // 2
+        previous = layers[len(result)] if len(result) < len(layers) else []
+        parent = list(previous[:width]) + [None] * (width - len(previous))
+        dirty = {i >> 1 for i in dirty}
+        for i in dirty:
+            if i < width:
+                a, b = layer[2*i], layer[2*i+1] if 2*i + 1 < len(layer) else None
+                parent[i] = _combine(a, b)
+                hashed += a is not None and b is not None
+        layer = parent
+        result.append(layer)
+    return result, hashed
+
+
+class IncrementalBuilder:
+    """
+    Build each weekly distribution from the last one, stored in the SQLite
+    database at `db_path`.
+
+    Recipients keep their index from week to week. The index of a removed
+    recipient is given to the next new one, and other new recipients are
+    appended. The leaf of each recipient sits at its index rather than in
+    sorted order, with empty positions left out of the proofs, so when an
+    amount changes only its leaf and the path to the root are hashed again.
+    `MerkleDistributor.verify` hashes pairs in sorted order and accepts either
+    layout.
+
+    Every leaf hashed is kept in a cache keyed by `(index, account, amount)`,
+    so a recipient returning to an earlier amount is not hashed again.
+    """
+
+    def __init__(self, db_path):
+        self.db = sqlite3.connect(db_path)
+        self.hashed = 0
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS leaves (idx INTEGER NOT NULL, account TEXT NOT NULL, "
+                "amount TEXT NOT NULL, leaf BLOB NOT NULL, PRIMARY KEY (idx, account, amount))"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS recipients (idx INTEGER PRIMARY KEY, account TEXT NOT NULL UNIQUE, "
+                "amount TEXT NOT NULL)"
+            )
+            self.db.execute("CREATE TABLE IF NOT EXISTS layers (layer INTEGER PRIMARY KEY, nodes BLOB NOT NULL)")
+
+    def close(self):
+        self.db.close()
+
+    def _cached_leaf(self, index, account, amount):
+        row = self.db.execute(
+            "SELECT leaf FROM leaves WHERE idx = ? AND account = ? AND amount = ?", (index, account, str(amount))
+        ).fetchone()
+        return row and bytes(row[0])
+
+    def diff(self, balances):
+        """
+        Assign an index to each `(account, amount)` of `balances` and compare
+        them with the last build. Returns `(rows, diff)` where `rows` is a list
+        of `(index, account, amount)` in index order.
+        """
+        current = {}
+        for account, amount in balances:
+            account = to_checksum_address(account)
+            if account in current:
+                raise ValueError(f"Duplicate account {account}")
+            current[account] = amount
+        previous = {
+            account: (index, int(amount))
+            for index, account, amount in self.db.execute("SELECT idx, account, amount FROM recipients")
+        }
+
+        removed = sorted((index, account, amount) for account, (index, amount) in previous.items() if account not in current)
+        changed = sorted(
+            (index, account, amount, current[account])
+            for account, (index, amount) in previous.items()
+            if account in current and current[account] != amount
+        )
+        # new recipients fill the indexes left free by removed ones first
+        used = {index for account, (index, amount) in previous.items() if account in current}
+        free = (i for i in itertools.count() if i not in used)
+        added = [(next(free), account, amount) for account, amount in current.items() if account not in previous]
+
+        rows = sorted(
+            [(index, account, current[account]) for account, (index, amount) in previous.items() if account in current]
+            + added
+        )
+        return rows, Diff(added, removed, changed)
+
+    def build(self, balances, workers=None, save=True):
+        """
+        Build the distribution for an iterable of `(account, amount)` from the
+        last one. Returns `(tree, elements, diff)` like `build_distribution`,
+        plus the `Diff` against the last build. With `save=False` the last
+        build is left as it is, to review the changes first.
+        """
+        rows, diff = self.diff(balances)
+        if not rows:
+            raise ValueError("No recipients")
+        layers = [_unpack(i[0]) for i in self.db.execute("SELECT nodes FROM layers ORDER BY layer")]
+
+        dirty = diff.added + [(index, account, amount) for index, account, _, amount in diff.changed]
+        leaves = {index: None for index, account, amount in diff.removed}
+        missing = []
+        for index, account, amount in dirty:
+            leaf = self._cached_leaf(index, account, amount)
+            if leaf is None:
+                missing.append((index, account, amount))
+            leaves[index] = leaf
+        if workers == 1:
+            hashed = _hash_leaves(missing)
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                hashed = _map(executor, _hash_leaves, missing)
+        leaves.update((row[0], leaf) for row, leaf in zip(missing, hashed))
+
+        layers, nodes = update_layers(layers, rows[-1][0] + 1, leaves)
+        self.hashed = len(missing) + nodes
+        if save:
+            with self.db:
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO leaves VALUES (?, ?, ?, ?)",
+                    [(index, account, str(amount), leaf) for (index, account, amount), leaf in zip(missing, hashed)],
+                )
+                self.db.executemany("DELETE FROM recipients WHERE idx = ?", [(i[0],) for i in diff.removed])
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO recipients VALUES (?, ?, ?)",
+                    [(index, account, str(amount)) for index, account, amount in dirty],
+                )
+                self.db.execute("DELETE FROM layers")
+                self.db.executemany("INSERT INTO layers VALUES (?, ?)", [(i, _pack(k)) for i, k in enumerate(layers)])
+
+        layer = layers[0]
+        return MerkleTree.from_layers(layers), [row + (layer[row[0]],) for row in rows], diff
+
+
+def write_diff(diff, output_dir):
+    """Write the changes since the last build to `diff.json`. Returns the report."""
+    report = {
+        "added": [{"index": i, "account": a, "amount": hex(v)} for i, a, v in diff.added],
+        "removed": [{"index": i, "account": a, "amount": hex(v)} for i, a, v in diff.removed],
+        "changed": [
+            {"index": i, "account": a, "previousAmount": hex(old), "amount": hex(new)} for i, a, old, new in diff.changed
+        ],
+        "tokenTotalChange": hex(
+            sum(i[2] for i in diff.added) - sum(i[2] for i in diff.removed) + sum(i[3] - i[2] for i in diff.changed)
+        ),
+    }
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with output_dir.joinpath("diff.json").open("w") as fp:
+        json.dump(report, fp, indent=2)
+    return report
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Build a MerkleDistributor airdrop from a balances CSV")
+    parser.add_argument("balances", help="CSV of account,amount rows")
+    parser.add_argument("output", help="output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="hashing processes")
+    parser.add_argument("--shard-chars", type=int, default=2, help="address characters used to shard claims")
+    parser.add_argument("--cache", help="database of the last build, to build incrementally from it")
+    parser.add_argument("--dry-run", action="store_true", help="with --cache, do not replace the last build")
+    args = parser.parse_args(args)
+
+    if args.cache is None:
+        tree, elements = build_distribution(read_balances(args.balances), args.workers)
+    else:
+        builder = IncrementalBuilder(args.cache)
+        try:
+            tree, elements, diff = builder.build(read_balances(args.balances), args.workers, save=not args.dry_run)
+        finally:
+            builder.close()
+        write_diff(diff, args.output)
+        print(
+            f"{len(diff.added)} added, {len(diff.removed)} removed, {len(diff.changed)} changed, "
+            f"{builder.hashed} hashes"
+        )
+    summary = write_distribution(tree, elements, args.output, args.shard_chars)
+    print(f"{summary['recipients']} recipients, root {summary['merkleRoot']}, total {int(summary['tokenTotal'], 16)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Declarative, resumable deployments.
+
+A plan is a list of steps: `Deploy` deploys a contract and `Call` sends a
+transaction to one. Arguments may refer to the outcome of earlier steps with
+`Ref`, which resolves to the address of a deployed contract or to the value
+read from an event of a call. A step is ready once every step it refers to,
+or names in `after`, has been mined.
+
+The plan runs in rounds. Every ready step is broadcast at once, with nonces
+assigned in order from the next nonce of the account, and the round ends when
+all of them are mined. The state of each step is written to a JSON file as
+soon as it changes, so a rerun skips the steps that succeeded, waits for
+transactions that were still pending and sends the rest again.
+"""
+
+import json
+import os
+
+from brownie import Contract, chain, web3
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+class Ref:
+    """The outcome of the step `name`."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"Ref({self.name!r})"
+
+
+def _refs(value):
+    if isinstance(value, Ref):
+        return [value.name]
+    if isinstance(value, (list, tuple)):
+        return [i for item in value for i in _refs(item)]
+    return []
+
+
+def _resolve(value, results):
+    if isinstance(value, Ref):
+        return results[value.name]
+    if isinstance(value, (list, tuple)):
+        return [_resolve(i, results) for i in value]
+    return value
+
+
+class Deploy:
+    """Deploy `container` with `args`. The outcome is the address of the contract."""
+
+    def __init__(self, name, container, *args, after=()):
+        self.name = name
+        self.container = container
+        self.args = args
+        self.after = tuple(after)
+
+    @property
+    def depends(self):
+        return set(_refs(self.args)) | set(self.after)
+
+    def send(self, results, tx_params):
+        deployed = self.container.deploy(*_resolve(self.args, results), tx_params)
+        # with `required_confs=0` brownie returns the receipt, unless it was mined already
+        return getattr(deployed, "tx", deployed)
+
+    def result(self, tx):
+        return tx.contract_address
+
+
+class Call:
+    """
+    Call `method` on `target` with `args`. `target` is an address or a `Ref`,
+    `container` the contract type of the target, or `None` to fetch its ABI
+    from the explorer. When `event` is given as `(event name, argument)` the
+    outcome is that argument of the event, otherwise it is `None`.
+    """
+
+    def __init__(self, name, target, container, method, *args, value=0, event=None, after=()):
+        self.name = name
+        self.target = target
+        self.container = container
+        self.method = method
+        self.args = args
+        self.value = value
+        self.event = event
+        self.after = tuple(after)
+
+    @property
+    def depends(self):
+        return set(_refs([self.target, self.args])) | set(self.after)
+
+    def send(self, results, tx_params):
+        target = _resolve(self.target, results)
+        contract = Contract(target) if self.container is None else self.container.at(target)
+        if self.value:
+            tx_params = dict(tx_params, value=self.value)
+        return getattr(contract, self.method)(*_resolve(self.args, results), tx_params)
+
+    def result(self, tx):
+        if self.event is None:
+            return None
+        name, key = self.event
+        return str(tx.events[name][key])
+
+
+class Pipeline:
+    """
+    Run the steps of a plan from `account`, keeping state in the JSON file at
+    `state_path`. Without a state file nothing is kept between runs. A state
+    file with steps that are not in the plan is refused.
+    """
+
+    def __init__(self, steps, account, state_path=None, required_confs=1):
+        self.steps = {}
+        for step in steps:
+            if step.name in self.steps:
+                raise ValueError(f"Duplicate step '{step.name}'")
+            self.steps[step.name] = step
+        for step in steps:
+            unknown = step.depends - set(self.steps)
+            if unknown:
+                raise ValueError(f"Step '{step.name}' depends on unknown steps {sorted(unknown)}")
+
+        self.account = account
+        self.state_path = state_path
+        self.required_confs = required_confs
+        self.state = {"chain_id": chain.id, "account": account.address, "steps": {}}
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path) as fp:
+                state = json.load(fp)
+            if state["chain_id"] != chain.id or state["account"] != account.address:
+                raise ValueError(
+                    f"{state_path} belongs to {state['account']} on chain {state['chain_id']}"
+                )
+            # most likely the state of another plan, whose results would be taken for this one's
+            unknown = set(state["steps"]) - set(self.steps)
+            if unknown:
+                raise ValueError(f"{state_path} holds steps that are not in the plan: {sorted(unknown)}")
+            self.state = state
+
+    def _save(self):
+        if self.state_path is None:
+            return
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as fp:
+            json.dump(self.state, fp, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _update(self, name, **kwargs):
+        self.state["steps"].setdefault(name, {}).update(kwargs)
+        self._save()
+
+    @property
+    def results(self):
+        return {k: v.get("result") for k, v in self.state["steps"].items() if v["status"] == DONE}
+
+    def status(self, name):
+        return self.state["steps"].get(name, {}).get("status")
+
+    def _pending(self):
+        """Receipts of the transactions left pending by an earlier run."""
+        pending = {}
+        for name, step in self.state["steps"].items():
+            if step["status"] != PENDING:
+                continue
+            try:
+                pending[name] = chain.get_transaction(step["tx"])
+            except Exception:
+                # dropped from the mempool, send it again
+                self._update(name, status=FAILED, error="Transaction not found")
+        return pending
+
+    def _broadcast(self, names):
+        results = self.results
+        nonce = web3.eth.get_transaction_count(self.account.address, "pending")
+        sent, errors = {}, {}
+        for name in names:
+            tx_params = {"from": self.account, "nonce": nonce, "required_confs": 0}
+            try:
+                tx = self.steps[name].send(results, tx_params)
+            except Exception as exc:
+                # nothing was broadcast, the nonce goes to the next step
+                self._update(name, status=FAILED, error=str(exc))
+                errors[name] = exc
+                continue
+            self._update(name, status=PENDING, tx=tx.txid, nonce=nonce, error=None)
+            sent[name] = tx
+            nonce += 1
+        return sent, errors
+
+    def _confirm(self, sent):
+        errors = {}
+        for name, tx in sent.items():
+            tx.wait(self.required_confs)
+            if tx.status != 1:
+                self._update(name, status=FAILED, error=f"Transaction {tx.txid} reverted")
+                errors[name] = tx
+            else:
+                self._update(name, status=DONE, result=self.steps[name].result(tx), block=tx.block_number)
+        return errors
+
+    def run(self):
+        """Run every step that has not succeeded yet. Returns the outcome of each step."""
+        errors = self._confirm(self._pending())
+        while not errors:
+            ready = [
+                name for name, step in self.steps.items()
+                if self.status(name) != DONE and all(self.status(i) == DONE for i in step.depends)
+            ]
+            if not ready:
+                break
+            sent, errors = self._broadcast(ready)
+            errors.update(self._confirm(sent))
+
+        if errors:
+            raise RuntimeError(f"Steps failed: {', '.join(errors)}")
+        remaining = [name for name in self.steps if self.status(name) != DONE]
+        if remaining:
+            raise RuntimeError(f"Steps could not run, check for circular dependencies: {', '.join(remaining)}")
+        return self.results
@@ -0,0 +1,5 @@
+from .pool import MetaPool, Revert, StableSwapPool
+from .quote import quote_dy, quote_dy_underlying, quote_token_amount, quote_withdraw_one_coin
+from .replay import ReplayResult, read_events, replay
+from .router import Route, Router, load_router
+from .snapshot import load_pool, load_pools
@@ -0,0 +1,116 @@
+"""
+Iteration counts of the Newton solvers of the pool models.
+
+Every state changing entry point is applied to copies of a pool snapshot,
+once starting `get_y` and `get_y_D` from the current balance as the contracts
+do, and once from D as the pools deployed before them do. The number of
+iterations of each solve is reported per call, for the pool as it is and for
+the pool pushed off balance by single sided deposits of a multiple of its size.
+
+Usage:
+
+    python -m scripts.stableswap.convergence
+"""
+
+import copy
+
+from . import pool as _pool
+from .pool import MetaPool, StableSwapPool
+
+# size of the single sided deposit of coin 0, relative to the pool
+IMBALANCE = (0, 1, 4, 20)
+
+
+def count_iterations(pool, call, warm_start=True):
+    """Apply `call(pool)` to a copy of `pool`. Returns `(solver, iterations)` of every solve."""
+    pool = copy.deepcopy(pool)
+    for model in (pool, getattr(pool, "base_pool", None)):
+        if model is not None:
+            model.warm_start = warm_start
+            # the contracts solve for D on every call
+            model._D_cache = (None, None)
+    _pool._trace = trace = []
+    try:
+        call(pool)
+    finally:
+        _pool._trace = None
+    return trace
+
+
+def _entry_points(pool):
+    n_coins = pool.n_coins
+    # about 1% of the first coin for every call
+    size = pool.balances[0] // 100
+    amounts = [size * pool.rates[0] // pool.rates[i] for i in range(n_coins)]
+    lp_amount = pool.total_supply // 100
+    calls = {
+        "exchange": lambda p: p.exchange(0, 1, amounts[0]),
+        "exchange (to heavy coin)": lambda p: p.exchange(1, 0, amounts[1]),
+        "add_liquidity": lambda p: p.add_liquidity([amounts[0]] + [0] * (n_coins - 1)),
+        "remove_liquidity_imbalance": lambda p: p.remove_liquidity_imbalance([0] + amounts[1:]),
+        "remove_liquidity_one_coin": lambda p: p.remove_liquidity_one_coin(lp_amount, 1),
+    }
+    if isinstance(pool, MetaPool):
+        calls["exchange_underlying"] = lambda p: p.exchange_underlying(0, n_coins, amounts[0])
+    return calls
+
+
+def _imbalanced(pool, factor):
+    pool = copy.deepcopy(pool)
+    if factor:
+        pool.add_liquidity([pool.balances[0] * factor] + [0] * (pool.n_coins - 1))
+    return pool
+
+
+def iteration_report(pool, imbalance=IMBALANCE):
+    """
+    Rows of `(imbalance, entry point, solver, iterations from D, iterations
+    from the balance)`, with one row for every solve made by each call.
+    """
+    rows = []
+    for factor in imbalance:
+        state = _imbalanced(pool, factor)
+        for name, call in _entry_points(state).items():
+            cold = count_iterations(state, call, warm_start=False)
+            warm = count_iterations(state, call, warm_start=True)
+            for (solver, before), (_, after) in zip(cold, warm):
+                rows.append((factor, name, solver, before, after))
+    return rows
+
+
+def print_report(rows):
+    print(f"{'imbalance':>9}  {'entry point':<28}{'solver':<9}{'from D':>7}{'warm':>6}")
+    for factor, name, solver, before, after in rows:
+        print(f"{factor:>9}  {name:<28}{solver:<9}{before:>7}{after:>6}")
+
+
+def main():
+    # the 3pool and metapool of the test deployment
+    base = StableSwapPool(
+        [1000000 * 10**18, 1200000 * 10**18, 900000 * 10**18],
+        [10**18] * 3,
+        4000000,
+        5000000000,
+        3100000 * 10**18,
+        1500,
+    )
+    base.total_supply = base.get_D(base.xp(), base.A_precise())
+    meta = MetaPool(
+        [700000 * 10**6, 1000000 * 10**18],
+        [10**30, 10**18],
+        4000000,
+        5000000000,
+        0,
+        60000,
+        base_pool=base,
+    )
+    meta.total_supply = meta.get_D(meta.xp(), meta.A_precise())
+
+    print("Base pool")
+    print_report(iteration_report(base))
+    print("\nMetapool")
+    print_report(iteration_report(meta))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,532 @@
+"""
+Exact integer models of the Ellipsis StableSwap contracts.
+
+Every method mirrors the arithmetic of the matching Vyper function, including
+the order of operations and uint256 floor division, so that results are
+identical to the on-chain views. Conditions which make the contract revert
+(overflow, underflow, division by zero, failed convergence) raise `Revert`.
+"""
+
+FEE_DENOMINATOR = 10 ** 10
+PRECISION = 10 ** 18
+A_PRECISION = 100
+BASE_CACHE_EXPIRES = 10 * 60
+MAX_UINT256 = 2 ** 256 - 1
+
+# when set to a list, every Newton solve appends `(solver, iterations)` to it
+_trace = None
+
+
+class Revert(Exception):
+    pass
+
+
+def _check(a):
+    # uint256 overflow, only checked on products that can realistically exceed it
+    if a > MAX_UINT256:
+        raise Revert("Integer overflow")
+    return a
+
+
+def _sub(a, b):
+    # uint256 subtraction
+    if b > a:
+        raise Revert("Integer underflow")
+    return a - b
+
+
+def _record(solver, iterations):
+    if _trace is not None:
+        _trace.append((solver, iterations))
+
+
+def get_D(xp, amp, a_precision=1, strict=False):
+    S = sum(xp)
+    if S == 0:
+        return 0
+
+    n_coins = len(xp)
+    D = S
+    Ann = amp * n_coins
+    for _i in range(255):
+        D_P = D
+        for _x in xp:
+            D_P = _check(D_P * D) // (_x * n_coins)
+        Dprev = D
+        D = (
+            _check((Ann * S // a_precision + D_P * n_coins) * D)
+            // ((Ann - a_precision) * D // a_precision + (n_coins + 1) * D_P)
+        )
+        if abs(D - Dprev) <= 1:
+            _record("get_D", _i + 1)
+            return D
+    _record("get_D", 255)
+    if strict:
+        raise Revert("get_D did not converge")
+    return D
+
+
+def _solve_y(solver, c, b, D, y, strict):
+    for _i in range(255):
+        y_prev = y
+        y = _check(y * y + c) // _sub(2 * y + b, D)
+        if abs(y - y_prev) <= 1:
+            _record(solver, _i + 1)
+            return y
+    _record(solver, 255)
+    if strict:
+        raise Revert("get_y did not converge")
+    return y
+
+
+def get_y(i, j, x, xp, amp, D, a_precision=1, strict=False, warm_start=True):
+    n_coins = len(xp)
+    if i == j or not 0 <= i < n_coins or not 0 <= j < n_coins:
+        raise Revert("Invalid coin index")
+
+    Ann = amp * n_coins
+    c = D
+    S_ = 0
+    for _i in range(n_coins):
+        if _i == i:
+            _x = x
+        elif _i != j:
+            _x = xp[_i]
+        else:
+            continue
+        S_ += _x
+        c = _check(c * D) // (_x * n_coins)
+    c = _check(c * D * a_precision) // (Ann * n_coins)
+    b = S_ + D * a_precision // Ann
+    y = D
+    if warm_start and x >= xp[i] and xp[j] < D:
+        y = xp[j]
+    return _solve_y("get_y", c, b, D, y, strict)
+
+
+def get_y_D(amp, i, xp, D, a_precision=1, strict=False, warm_start=True):
+    n_coins = len(xp)
+    if not 0 <= i < n_coins:
+        raise Revert("Invalid coin index")
+
+    Ann = amp * n_coins
+    c = D
+    S_ = 0
+    for _i in range(n_coins):
+        if _i == i:
+            continue
+        _x = xp[_i]
+        S_ += _x
+        c = _check(c * D) // (_x * n_coins)
+    c = _check(c * D * a_precision) // (Ann * n_coins)
+    b = S_ + D * a_precision // Ann
+    y = D
+    if warm_start and xp[i] < D:
+        y = xp[i]
+    return _solve_y("get_y_D", c, b, D, y, strict)
+
+
+class StableSwapPool:
+    """
+    State of a `StableSwap.vy` or `StableSwapBTC.vy` pool at a single block.
+
+    `rates` are the `RATES` constants of the contract, i.e. `10 ** (36 - decimals)`
+    for each coin. `timestamp` is the block time that views are evaluated at.
+    """
+
+    a_precision = 1
+    # the base pools fall through the Newton loops rather than reverting
+    strict = False
+    # `get_y` and `get_y_D` start from the current balance rather than from D,
+    # set to False for pools deployed before the contracts did so
+    warm_start = True
+
+    def __init__(
+        self,
+        balances,
+        rates,
+        fee,
+        admin_fee,
+        total_supply,
+        initial_A,
+        future_A=None,
+        initial_A_time=0,
+        future_A_time=0,
+        timestamp=0,
+    ):
+        self.n_coins = len(balances)
+        self.balances = list(balances)
+        self.rates = list(rates)
+        self.fee = fee
+        self.admin_fee = admin_fee
+        self.total_supply = total_supply
+        self.initial_A = initial_A
+        self.future_A = initial_A if future_A is None else future_A
+        self.initial_A_time = initial_A_time
+        self.future_A_time = future_A_time
+        self.timestamp = timestamp
+        self._D_cache = (None, None)
+
+    def A_precise(self):
+        t1 = self.future_A_time
+        A1 = self.future_A
+        if self.timestamp < t1:
+            A0 = self.initial_A
+            t0 = self.initial_A_time
+            if A1 > A0:
+                return A0 + (A1 - A0) * (self.timestamp - t0) // (t1 - t0)
+            else:
+                return A0 - (A0 - A1) * (self.timestamp - t0) // (t1 - t0)
+        return A1
+
+    def A(self):
+        return self.A_precise() // self.a_precision
+
+    def get_rates(self):
+        return self.rates
+
+    def xp(self, balances=None):
+        if balances is None:
+            balances = self.balances
+        return [rate * balance // PRECISION for rate, balance in zip(self.get_rates(), balances)]
+
+    def get_D(self, xp, amp):
+        # the invariant of the current balances is needed by every quote, so it is memoized
+        key = (tuple(xp), amp)
+        if self._D_cache[0] == key:
+            return self._D_cache[1]
+        D = get_D(xp, amp, self.a_precision, self.strict)
+        self._D_cache = (key, D)
+        return D
+
+    def get_y(self, i, j, x, xp):
+        amp = self.A_precise()
+        D = self.get_D(xp, amp)
+        return get_y(i, j, x, xp, amp, D, self.a_precision, self.strict, self.warm_start)
+
+    def get_y_D(self, amp, i, xp, D):
+        return get_y_D(amp, i, xp, D, self.a_precision, self.strict, self.warm_start)
+
+    def get_virtual_price(self):
+        D = self.get_D(self.xp(), self.A_precise())
+        return D * PRECISION // self.total_supply
+
+    def get_dy(self, i, j, dx):
+        rates = self.get_rates()
+        xp = self.xp()
+
+        x = xp[i] + dx * rates[i] // PRECISION
+        y = self.get_y(i, j, x, xp)
+        dy = _sub(xp[j], y + 1) * PRECISION // rates[j]
+        _fee = self.fee * dy // FEE_DENOMINATOR
+        return dy - _fee
+
+    def calc_token_amount(self, amounts, deposit):
+        amp = self.A_precise()
+        balances = list(self.balances)
+        D0 = self.get_D(self.xp(balances), amp)
+        for i in range(self.n_coins):
+            if deposit:
+                balances[i] += amounts[i]
+            else:
+                balances[i] = _sub(balances[i], amounts[i])
+        D1 = get_D(self.xp(balances), amp, self.a_precision, self.strict)
+        if deposit:
+            diff = _sub(D1, D0)
+        else:
+            diff = _sub(D0, D1)
+        return diff * self.total_supply // D0
+
+    def _calc_withdraw_one_coin(self, token_amount, i):
+        amp = self.A_precise()
+        _fee = self.fee * self.n_coins // (4 * (self.n_coins - 1))
+        rates = self.get_rates()
+        xp = self.xp()
+
+        D0 = self.get_D(xp, amp)
+        D1 = _sub(D0, token_amount * D0 // self.total_supply)
+        new_y = self.get_y_D(amp, i, xp, D1)
+
+        xp_reduced = list(xp)
+        dy_0 = _sub(xp[i], new_y) * PRECISION // rates[i]
+        for j in range(self.n_coins):
+            if j == i:
+                dx_expected = _sub(xp[j] * D1 // D0, new_y)
+            else:
+                dx_expected = xp[j] - xp[j] * D1 // D0
+            xp_reduced[j] = _sub(xp_reduced[j], _fee * dx_expected // FEE_DENOMINATOR)
+
+        dy = _sub(xp_reduced[i], self.get_y_D(amp, i, xp_reduced, D1))
+        dy = _sub(dy, 1) * PRECISION // rates[i]
+        return dy, _sub(dy_0, dy)
+
+    def calc_withdraw_one_coin(self, token_amount, i):
+        return self._calc_withdraw_one_coin(token_amount, i)[0]
+
+    # State transitions. Each applies one call of the matching external function
+    # to the snapshot and returns the amount received or burned, together with
+    # the fees and the admin fees charged in each coin.
+
+    def _update_rates(self):
+        return self.get_rates()
+
+    def _balance_fees(self, old_balances, new_balances, D0, D1):
+        # fees on the difference to a balanced deposit or withdrawal, shared by
+        # `add_liquidity` and `remove_liquidity_imbalance`
+        _fee = self.fee * self.n_coins // (4 * (self.n_coins - 1))
+        fees = [0] * self.n_coins
+        admin_fees = [0] * self.n_coins
+        for i in range(self.n_coins):
+            ideal_balance = D1 * old_balances[i] // D0
+            difference = abs(ideal_balance - new_balances[i])
+            fees[i] = _fee * difference // FEE_DENOMINATOR
+            admin_fees[i] = fees[i] * self.admin_fee // FEE_DENOMINATOR
+            self.balances[i] = _sub(new_balances[i], admin_fees[i])
+            new_balances[i] = _sub(new_balances[i], fees[i])
+        return fees, admin_fees
+
+    def add_liquidity(self, amounts):
+        self._update_rates()
+        amp = self.A_precise()
+        token_supply = self.total_supply
+        old_balances = list(self.balances)
+        D0 = self.get_D(self.xp(old_balances), amp) if token_supply else 0
+        new_balances = [balance + amount for balance, amount in zip(old_balances, amounts)]
+        if token_supply == 0 and not all(amounts):
+            raise Revert("Initial deposit requires all coins")
+
+        D1 = self.get_D(self.xp(new_balances), amp)
+        if D1 <= D0:
+            raise Revert("D1 <= D0")
+
+        if token_supply:
+            fees, admin_fees = self._balance_fees(old_balances, new_balances, D0, D1)
+            D2 = self.get_D(self.xp(new_balances), amp)
+            mint_amount = token_supply * (D2 - D0) // D0
+        else:
+            fees = admin_fees = [0] * self.n_coins
+            self.balances = new_balances
+            mint_amount = D1
+
+        self.total_supply += mint_amount
+        return mint_amount, fees, admin_fees
+
+    def exchange(self, i, j, dx):
+        rates = self._update_rates()
+        old_balances = self.balances
+        xp = self.xp(old_balances)
+
+        x = xp[i] + dx * rates[i] // PRECISION
+        y = self.get_y(i, j, x, xp)
+        dy = _sub(xp[j], y + 1)
+        dy_fee = dy * self.fee // FEE_DENOMINATOR
+        dy = (dy - dy_fee) * PRECISION // rates[j]
+        dy_admin_fee = dy_fee * self.admin_fee // FEE_DENOMINATOR * PRECISION // rates[j]
+
+        fees = [0] * self.n_coins
+        admin_fees = [0] * self.n_coins
+        fees[j] = dy_fee * PRECISION // rates[j]
+        admin_fees[j] = dy_admin_fee
+
+        self.balances = list(old_balances)
+        self.balances[i] = old_balances[i] + dx
+        self.balances[j] = _sub(old_balances[j], dy + dy_admin_fee)
+        return dy, fees, admin_fees
+
+    def remove_liquidity(self, amount):
+        total_supply = self.total_supply
+        amounts = [balance * amount // total_supply for balance in self.balances]
+        self.balances = [balance - value for balance, value in zip(self.balances, amounts)]
+        self.total_supply = _sub(total_supply, amount)
+        return amounts, [0] * self.n_coins, [0] * self.n_coins
+
+    def remove_liquidity_imbalance(self, amounts):
+        self._update_rates()
+        token_supply = self.total_supply
+        if token_supply == 0:
+            raise Revert("Zero total supply")
+        amp = self.A_precise()
+        old_balances = list(self.balances)
+        new_balances = [_sub(balance, amount) for balance, amount in zip(old_balances, amounts)]
+        D0 = self.get_D(self.xp(old_balances), amp)
+        D1 = self.get_D(self.xp(new_balances), amp)
+        fees, admin_fees = self._balance_fees(old_balances, new_balances, D0, D1)
+        D2 = self.get_D(self.xp(new_balances), amp)
+
+        token_amount = _sub(D0, D2) * token_supply // D0
+        if token_amount == 0:
+            raise Revert("Zero tokens burned")
+        token_amount += 1
+        self.total_supply = _sub(token_supply, token_amount)
+        return token_amount, fees, admin_fees
+
+    def remove_liquidity_one_coin(self, token_amount, i):
+        self._update_rates()
+        dy, dy_fee = self._calc_withdraw_one_coin(token_amount, i)
+        fees = [0] * self.n_coins
+        admin_fees = [0] * self.n_coins
+        fees[i] = dy_fee
+        admin_fees[i] = dy_fee * self.admin_fee // FEE_DENOMINATOR
+
+        self.balances = list(self.balances)
+        self.balances[i] = _sub(self.balances[i], dy + admin_fees[i])
+        self.total_supply = _sub(self.total_supply, token_amount)
+        return dy, fees, admin_fees
+
+
+class MetaPool(StableSwapPool):
+    """
+    State of a `StableSwapMeta.vy` or `StableSwapMetaBTC.vy` pool at a single block.
+
+    `base_pool` is a `StableSwapPool` snapshot of the base pool taken at the same
+    block, it is used for the virtual price once the cached value has expired and
+    for quotes involving underlying coins. The last entry of `rates` is ignored in
+    favour of the base pool virtual price.
+    """
+
+    a_precision = A_PRECISION
+    strict = True
+
+    def __init__(
+        self,
+        balances,
+        rates,
+        fee,
+        admin_fee,
+        total_supply,
+        initial_A,
+        future_A=None,
+        initial_A_time=0,
+        future_A_time=0,
+        timestamp=0,
+        base_pool=None,
+        base_virtual_price=None,
+        base_cache_updated=0,
+    ):
+        super().__init__(
+            balances,
+            rates,
+            fee,
+            admin_fee,
+            total_supply,
+            initial_A,
+            future_A,
+            initial_A_time,
+            future_A_time,
+            timestamp,
+        )
+        self.base_pool = base_pool
+        if base_virtual_price is None:
+            base_virtual_price = base_pool.get_virtual_price()
+        self.base_virtual_price = base_virtual_price
+        self.base_cache_updated = base_cache_updated
+
+    @property
+    def max_coin(self):
+        return self.n_coins - 1
+
+    def vp_rate(self):
+        if self.timestamp > self.base_cache_updated + BASE_CACHE_EXPIRES:
+            return self.base_pool.get_virtual_price()
+        return self.base_virtual_price
+
+    def get_rates(self):
+        return self.rates[:self.max_coin] + [self.vp_rate()]
+
+    def get_dy(self, i, j, dx):
+        rates = self.get_rates()
+        xp = self.xp()
+
+        x = xp[i] + dx * rates[i] // PRECISION
+        y = self.get_y(i, j, x, xp)
+        dy = _sub(xp[j], y + 1)
+        _fee = self.fee * dy // FEE_DENOMINATOR
+        return (dy - _fee) * PRECISION // rates[j]
+
+    def get_dy_underlying(self, i, j, dx):
+        base_pool = self.base_pool
+        max_coin = self.max_coin
+        vp_rate = self.vp_rate()
+        xp = self.xp()
+
+        base_i = i - max_coin
+        base_j = j - max_coin
+        meta_i = i if base_i < 0 else max_coin
+        meta_j = j if base_j < 0 else max_coin
+
+        if base_i < 0:
+            x = xp[i] + dx * (self.rates[i] // PRECISION)
+        elif base_j < 0:
+            base_inputs = [0] * base_pool.n_coins
+            base_inputs[base_i] = dx
+            x = base_pool.calc_token_amount(base_inputs, True) * vp_rate // PRECISION
+            x -= x * base_pool.fee // (2 * FEE_DENOMINATOR)
+            x += xp[max_coin]
+        else:
+            return base_pool.get_dy(base_i, base_j, dx)
+
+        y = self.get_y(meta_i, meta_j, x, xp)
+        dy = _sub(xp[meta_j], y + 1)
+        dy = dy - self.fee * dy // FEE_DENOMINATOR
+
+        if base_j < 0:
+            return dy // (self.rates[meta_j] // PRECISION)
+        return base_pool.calc_withdraw_one_coin(dy * PRECISION // vp_rate, base_j)
+
+    def _update_rates(self):
+        # `_vp_rate` refreshes the cached base pool virtual price once it expires
+        if self.timestamp > self.base_cache_updated + BASE_CACHE_EXPIRES:
+            self.base_pool.timestamp = self.timestamp
+            self.base_virtual_price = self.base_pool.get_virtual_price()
+            self.base_cache_updated = self.timestamp
+        return self.get_rates()
+
+    def exchange_underlying(self, i, j, dx):
+        """
+        Apply `exchange_underlying`. Deposits into and withdrawals from the base
+        pool are applied to `base_pool`, and the fees charged by the base pool
+        are not included in the result.
+        """
+        base_pool = self.base_pool
+        max_coin = self.max_coin
+        base_i = i - max_coin
+        base_j = j - max_coin
+        rates = self._update_rates()
+        if base_i >= 0 and base_j >= 0:
+            base_pool.timestamp = self.timestamp
+            dy = base_pool.exchange(base_i, base_j, dx)[0]
+            return dy, [0] * self.n_coins, [0] * self.n_coins
+
+        meta_i = i if base_i < 0 else max_coin
+        meta_j = j if base_j < 0 else max_coin
+        old_balances = self.balances
+        xp = self.xp(old_balances)
+
+        if base_i < 0:
+            x = xp[i] + dx * rates[i] // PRECISION
+        else:
+            base_inputs = [0] * base_pool.n_coins
+            base_inputs[base_i] = dx
+            base_pool.timestamp = self.timestamp
+            dx = base_pool.add_liquidity(base_inputs)[0]
+            x = dx * rates[max_coin] // PRECISION + xp[max_coin]
+
+        y = self.get_y(meta_i, meta_j, x, xp)
+        dy = _sub(xp[meta_j], y + 1)
+        dy_fee = dy * self.fee // FEE_DENOMINATOR
+        dy = (dy - dy_fee) * PRECISION // rates[meta_j]
+        dy_admin_fee = dy_fee * self.admin_fee // FEE_DENOMINATOR * PRECISION // rates[meta_j]
+
+        fees = [0] * self.n_coins
+        admin_fees = [0] * self.n_coins
+        fees[meta_j] = dy_fee * PRECISION // rates[meta_j]
+        admin_fees[meta_j] = dy_admin_fee
+
+        self.balances = list(old_balances)
+        self.balances[meta_i] = old_balances[meta_i] + dx
+        self.balances[meta_j] = _sub(old_balances[meta_j], dy + dy_admin_fee)
+
+        if base_j >= 0:
+            base_pool.timestamp = self.timestamp
+            dy = base_pool.remove_liquidity_one_coin(dy, base_j)[0]
+        return dy, fees, admin_fees
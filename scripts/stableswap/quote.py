@@ -0,0 +1,65 @@
+"""
+Batch quoting against a pool snapshot.
+
+Each function accepts scalars or equal-length sequences and returns one quote
+per trade. With `exact=True` quotes are python integers identical to the
+contract views, and trades that would revert are returned as `None`. With
+`exact=False` the float fast path is used and a numpy array is returned.
+"""
+
+import numpy as np
+
+from . import fast
+from .pool import Revert
+
+
+def _broadcast(*args):
+    arrays = np.broadcast_arrays(*[np.asarray(i, dtype=object) for i in args])
+    return [i.reshape(-1).tolist() for i in arrays]
+
+
+def _exact(fn, *args):
+    try:
+        return fn(*args)
+    except (Revert, ZeroDivisionError):
+        return None
+
+
+def _grouped(fn, pairs, values):
+    # run the vectorised path once for every distinct (i, j) combination
+    values = np.asarray(values, dtype=float)
+    result = np.full(len(values), np.nan)
+    pairs = np.asarray(pairs, dtype=int).reshape(len(values), -1)
+    for key in {tuple(i) for i in pairs}:
+        mask = np.all(pairs == key, axis=1)
+        result[mask] = fn(*key, values[mask])
+    return result
+
+
+def quote_dy(pool, i, j, dx, exact=True):
+    i, j, dx = _broadcast(i, j, dx)
+    if exact:
+        return [_exact(pool.get_dy, *trade) for trade in zip(i, j, dx)]
+    return _grouped(lambda i, j, dx: fast.get_dy(pool, i, j, dx), list(zip(i, j)), dx)
+
+
+def quote_dy_underlying(pool, i, j, dx, exact=True):
+    i, j, dx = _broadcast(i, j, dx)
+    if exact:
+        return [_exact(pool.get_dy_underlying, *trade) for trade in zip(i, j, dx)]
+    return _grouped(lambda i, j, dx: fast.get_dy_underlying(pool, i, j, dx), list(zip(i, j)), dx)
+
+
+def quote_token_amount(pool, amounts, deposit, exact=True):
+    if exact:
+        return [_exact(pool.calc_token_amount, list(i), deposit) for i in amounts]
+    return fast.calc_token_amount(pool, amounts, deposit)
+
+
+def quote_withdraw_one_coin(pool, token_amount, i, exact=True):
+    token_amount, i = _broadcast(token_amount, i)
+    if exact:
+        return [_exact(pool.calc_withdraw_one_coin, *trade) for trade in zip(token_amount, i)]
+    return _grouped(
+        lambda i, amount: fast.calc_withdraw_one_coin(pool, amount, i), [[x] for x in i], token_amount
+    )
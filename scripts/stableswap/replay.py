@@ -0,0 +1,209 @@
+"""
+Replay recorded pool events through the integer pool models.
+
+Used to evaluate fee, A and admin fee changes against real order flow before
+calling `commit_new_fee` or `ramp_A`: load or construct a pool model with the
+parameters to test, then stream the recorded events of the pool through it.
+Each event applies the inputs of the original call (amounts sent, LP tokens
+burned, coins requested) to the model. The outputs then follow from the
+model's own state, so they diverge from the recorded outputs once parameters
+differ. Calls that would revert under the new parameters are skipped.
+
+LP token amounts of `RemoveLiquidity` and `RemoveLiquidityOne` are scaled by
+the ratio of the model's total supply to the recorded total supply, so a
+withdrawal always burns the same share of the pool. `RemoveLiquidityOne` does
+not log the coin withdrawn; unless the event has a `coin_index`, it is the
+coin whose withdrawal from the model is closest to the recorded amount.
+
+Events are read from the SQLite database written by `scripts/indexer.py`, or
+can be any iterable of dicts with the event name under `event`, the indexer
+columns and the event arguments.
+"""
+
+import heapq
+import itertools
+import json
+import sqlite3
+
+import numpy as np
+
+from .pool import MetaPool, Revert
+
+POOL_EVENTS = (
+    "TokenExchange",
+    "TokenExchangeUnderlying",
+    "AddLiquidity",
+    "RemoveLiquidity",
+    "RemoveLiquidityOne",
+    "RemoveLiquidityImbalance",
+)
+
+
+def _value(value):
+    if not isinstance(value, str) or value.startswith("0x"):
+        return value
+    if value.startswith("["):
+        return [_value(i) for i in json.loads(value)]
+    return int(value)
+
+
+def _order(event):
+    return event["block_number"], event["log_index"]
+
+
+def read_events(db_path, address):
+    """Yield the recorded events of the pool at `address` in the order they happened."""
+    db = sqlite3.connect(db_path)
+    db.row_factory = sqlite3.Row
+    tables = {i[0] for i in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    def rows(name):
+        query = f'SELECT * FROM "{name}" WHERE address = ? ORDER BY block_number, log_index'
+        for row in db.execute(query, (address,)):
+            event = {key: _value(row[key]) for key in row.keys()}
+            event["event"] = name
+            yield event
+
+    yield from heapq.merge(*(rows(i) for i in POOL_EVENTS if i in tables), key=_order)
+
+
+class ReplayResult:
+    """
+    Pool metrics after each replayed event, as arrays with one row per event.
+
+    Fees are in the units of each coin. `imbalance` is the largest relative
+    deviation of a coin's share of the pool from an equal share. `reverted`
+    marks events that could not be applied.
+    """
+
+    def __init__(self, pool, block_number, virtual_price, lp_fees, admin_fees, imbalance, reverted):
+        self.pool = pool
+        self.block_number = np.array(block_number, dtype=np.int64)
+        self.virtual_price = np.array(virtual_price, dtype=np.int64)
+        self.lp_fees = np.array(lp_fees, dtype=float).reshape(-1, pool.n_coins)
+        self.admin_fees = np.array(admin_fees, dtype=float).reshape(-1, pool.n_coins)
+        self.imbalance = np.array(imbalance, dtype=float)
+        self.reverted = np.array(reverted, dtype=bool)
+
+
+def _imbalance(pool):
+    xp = pool.xp()
+    total = sum(xp)
+    if not total:
+        return 0.0
+    return max(abs(pool.n_coins * i / total - 1) for i in xp)
+
+
+def _apply(pool, event, recorded_supply):
+    name = event["event"]
+    if name == "TokenExchange":
+        return pool.exchange(event["sold_id"], event["bought_id"], event["tokens_sold"])
+    if name == "TokenExchangeUnderlying":
+        return pool.exchange_underlying(event["sold_id"], event["bought_id"], event["tokens_sold"])
+    if name == "AddLiquidity":
+        return pool.add_liquidity(event["token_amounts"])
+    if name == "RemoveLiquidityImbalance":
+        return pool.remove_liquidity_imbalance(event["token_amounts"])
+    if name == "RemoveLiquidity":
+        burned = recorded_supply - event["token_supply"]
+        return pool.remove_liquidity(burned * pool.total_supply // recorded_supply)
+    if name == "RemoveLiquidityOne":
+        amount = event["token_amount"] * pool.total_supply // recorded_supply
+        i = event.get("coin_index")
+        if i is None:
+            i = _withdrawn_coin(pool, amount, event["coin_amount"])
+        return pool.remove_liquidity_one_coin(amount, i)
+    raise ValueError(f"Unknown event '{name}'")
+
+
+def _withdrawn_coin(pool, amount, coin_amount):
+    # `RemoveLiquidityOne` does not log the coin, take the one whose
+    # withdrawal is closest to the recorded amount
+    best, best_error = 0, None
+    for i in range(pool.n_coins):
+        try:
+            dy = pool.calc_withdraw_one_coin(amount, i)
+        except Revert:
+            continue
+        error = abs(dy - coin_amount) / max(dy, coin_amount, 1)
+        if best_error is None or error < best_error:
+            best, best_error = i, error
+    return best
+
+
+def _recorded_supply(event, supply):
+    if event.get("token_supply") is not None:
+        return event["token_supply"]
+    if event["event"] == "RemoveLiquidityOne":
+        return supply - event["token_amount"]
+    return supply
+
+
+def replay(pool, events, base_events=(), timestamps=None, block_time=3):
+    """
+    Replay `events` through `pool`, modifying it in place.
+
+    The pool model should hold the state of the pool before the first event,
+    with the parameters to evaluate. For metapools, `base_events` are the
+    recorded events of the base pool over the same period; they keep the base
+    pool model, and so the virtual price of the base LP token, up to date.
+
+    Block timestamps are taken from the `timestamp` of each event, then from
+    the `timestamps` mapping of block numbers, and are otherwise estimated from
+    `block_time` and the timestamp of the pool model.
+    """
+    events = iter(events)
+    first = next(events, None)
+    if first is None:
+        return ReplayResult(pool, [], [], [], [], [], [])
+    address = first["address"]
+    stream = itertools.chain([first], events)
+
+    base_pool = pool.base_pool if isinstance(pool, MetaPool) else None
+    if base_pool is not None and base_events:
+        stream = heapq.merge(stream, base_events, key=_order)
+
+    start_block = first["block_number"]
+    start_time = pool.timestamp
+    recorded = {address: pool.total_supply}
+    if base_pool is not None:
+        recorded[None] = base_pool.total_supply
+
+    block_number, virtual_price, lp_fees, admin_fees, imbalance, reverted = [], [], [], [], [], []
+    for event in stream:
+        if "timestamp" in event:
+            timestamp = event["timestamp"]
+        elif timestamps is not None:
+            timestamp = timestamps[event["block_number"]]
+        else:
+            timestamp = start_time + (event["block_number"] - start_block) * block_time
+
+        if event["address"] != address:
+            # base pool event, calls made by the metapool itself are applied with the metapool's event
+            if event.get("provider", event.get("buyer")) != address:
+                base_pool.timestamp = timestamp
+                try:
+                    _apply(base_pool, event, recorded[None])
+                except Revert:
+                    pass
+            recorded[None] = _recorded_supply(event, recorded[None])
+            continue
+
+        pool.timestamp = timestamp
+        if base_pool is not None:
+            base_pool.timestamp = timestamp
+        try:
+            fees, admin = _apply(pool, event, recorded[address])[1:]
+            reverted.append(False)
+        except Revert:
+            fees = admin = [0] * pool.n_coins
+            reverted.append(True)
+        recorded[address] = _recorded_supply(event, recorded[address])
+
+        block_number.append(event["block_number"])
+        virtual_price.append(pool.get_virtual_price() if pool.total_supply else 0)
+        lp_fees.append([a - b for a, b in zip(fees, admin)])
+        admin_fees.append(admin)
+        imbalance.append(_imbalance(pool))
+
+    return ReplayResult(pool, block_number, virtual_price, lp_fees, admin_fees, imbalance, reverted)
@@ -0,0 +1,237 @@
+"""
+Best execution routing across a base pool and its metapools.
+
+The router holds one snapshot of every pool, with all metapools sharing the
+snapshot of the base pool. Between any two tokens it enumerates the paths
+made of pool calls: `exchange` and `add_liquidity` / `remove_liquidity_one_coin`
+on the base pool, `exchange` and `exchange_underlying` on each metapool. An
+order is either sent down the best single path, or split into equal chunks
+and every chunk is sent down the path that pays the most for it given the
+chunks before it. Chunks are applied to copies of the snapshots through the
+exact state transitions of the pool models, so paths sharing a pool see each
+other's price impact and the returned amounts equal the on-chain results,
+provided nothing else trades in between.
+
+A route is returned as the sequence of calls to make, each with its calldata.
+Tokens must already be approved for the pools being called.
+"""
+
+import copy
+from collections import namedtuple
+
+from brownie import chain
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+
+from .pool import Revert
+from .snapshot import _coins, load_pool
+
+Call = namedtuple("Call", ["to", "data", "function", "args", "amount_out"])
+
+# a hop is one pool call: (function, pool index, i, j)
+EXCHANGE = "exchange"
+EXCHANGE_UNDERLYING = "exchange_underlying"
+ADD_LIQUIDITY = "add_liquidity"
+REMOVE_LIQUIDITY_ONE_COIN = "remove_liquidity_one_coin"
+
+
+class Route:
+    """
+    Execution of `amount_in` of `token_in` for `token_out`.
+
+    `legs` holds `(path, amount_in, amount_out)` for each path used and
+    `calls` the pool calls in order of execution. `best_single` is the output
+    of the best single path, for comparison.
+    """
+
+    def __init__(self, token_in, token_out, amount_in, legs, calls, best_single):
+        self.token_in = token_in
+        self.token_out = token_out
+        self.amount_in = amount_in
+        self.legs = legs
+        self.calls = calls
+        self.amount_out = sum(i[2] for i in legs)
+        self.best_single = best_single
+
+
+def _calldata(function, pool, i, j, amount, min_amount):
+    if function == ADD_LIQUIDITY:
+        amounts = [0] * pool.n_coins
+        amounts[i] = amount
+        args = (amounts, min_amount)
+        types = [f"uint256[{pool.n_coins}]", "uint256"]
+    elif function == REMOVE_LIQUIDITY_ONE_COIN:
+        args = (amount, j, min_amount)
+        types = ["uint256", "int128", "uint256"]
+    else:
+        args = (i, j, amount, min_amount)
+        types = ["int128", "int128", "uint256", "uint256"]
+    signature = f"{function}({','.join(types)})"
+    return function_signature_to_4byte_selector(signature) + encode(types, args), args
+
+
+def _apply(pool, hop, amount):
+    function, _, i, j = hop
+    if function == EXCHANGE:
+        return pool.exchange(i, j, amount)[0]
+    if function == EXCHANGE_UNDERLYING:
+        return pool.exchange_underlying(i, j, amount)[0]
+    if function == ADD_LIQUIDITY:
+        amounts = [0] * pool.n_coins
+        amounts[i] = amount
+        return pool.add_liquidity(amounts)[0]
+    return pool.remove_liquidity_one_coin(amount, j)[0]
+
+
+class Router:
+    """
+    Route trades through a base pool and its metapools.
+
+    `base` is `(address, coins, lp_token, pool)` and each of `metas` is
+    `(address, coins, pool)`, where `pool` is a snapshot from `load_pool`.
+    The metapool snapshots are attached to the base pool snapshot.
+    """
+
+    def __init__(self, base, metas=()):
+        address, coins, lp_token, pool = base
+        self.addresses = [to_checksum_address(address)]
+        self.pools = [pool]
+        # (function, pool index, i, j, token in, token out)
+        edges = []
+        coins = [to_checksum_address(i) for i in coins]
+        lp_token = to_checksum_address(lp_token)
+        for i, coin_i in enumerate(coins):
+            edges.append((ADD_LIQUIDITY, 0, i, None, coin_i, lp_token))
+            edges.append((REMOVE_LIQUIDITY_ONE_COIN, 0, None, i, lp_token, coin_i))
+            for j, coin_j in enumerate(coins):
+                if i != j:
+                    edges.append((EXCHANGE, 0, i, j, coin_i, coin_j))
+
+        for address, meta_coins, meta_pool in metas:
+            meta_pool.base_pool = pool
+            idx = len(self.pools)
+            self.addresses.append(to_checksum_address(address))
+            self.pools.append(meta_pool)
+            meta_coins = [to_checksum_address(i) for i in meta_coins]
+            for i, coin_i in enumerate(meta_coins):
+                for j, coin_j in enumerate(meta_coins):
+                    if i != j:
+                        edges.append((EXCHANGE, idx, i, j, coin_i, coin_j))
+            # swaps between two base coins are cheaper on the base pool itself
+            underlying = meta_coins[:-1] + coins
+            max_coin = len(meta_coins) - 1
+            for i, coin_i in enumerate(underlying):
+                for j, coin_j in enumerate(underlying):
+                    if i != j and (i < max_coin or j < max_coin):
+                        edges.append((EXCHANGE_UNDERLYING, idx, i, j, coin_i, coin_j))
+        self.edges = edges
+
+    def _clone(self, pools):
+        base = copy.copy(pools[0])
+        base.balances = list(base.balances)
+        state = [base]
+        for pool in pools[1:]:
+            pool = copy.copy(pool)
+            pool.balances = list(pool.balances)
+            pool.base_pool = base
+            state.append(pool)
+        return state
+
+    def paths(self, token_in, token_out, max_hops=2):
+        """Every path from `token_in` to `token_out` that does not revisit a token."""
+        token_in, token_out = to_checksum_address(token_in), to_checksum_address(token_out)
+        found = []
+        stack = [(token_in, [], {token_in})]
+        while stack:
+            token, path, seen = stack.pop()
+            for edge in self.edges:
+                if edge[4] != token or edge[5] in seen:
+                    continue
+                hops = path + [edge[:4]]
+                if edge[5] == token_out:
+                    found.append(hops)
+                elif len(hops) < max_hops:
+                    stack.append((edge[5], hops, seen | {edge[5]}))
+        return found
+
+    def _run(self, state, path, amount):
+        for hop in path:
+            amount = _apply(state[hop[1]], hop, amount)
+        return amount
+
+    def _try(self, state, path, amount):
+        state = self._clone(state)
+        try:
+            return self._run(state, path, amount), state
+        except (Revert, ZeroDivisionError):
+            return None, None
+
+    def route(self, token_in, token_out, amount, splits=10, max_hops=2, slippage=0):
+        """
+        Find the best execution of `amount` of `token_in` for `token_out`.
+
+        The order is split into at most `splits` chunks. The minimum amount of
+        each call allows for `slippage`, a fraction of the expected amount; on
+        multi-hop paths the following call spends only the minimum of the call
+        before it, so that the sequence never runs short of tokens.
+        """
+        paths = self.paths(token_in, token_out, max_hops)
+        if not paths:
+            raise ValueError("No path between the tokens")
+
+        single = [self._try(self.pools, path, amount)[0] for path in paths]
+        if all(i is None for i in single):
+            raise ValueError("Every path reverts for this amount")
+        best_single = max(i for i in single if i is not None)
+        best_path = paths[single.index(best_single)]
+
+        allocation = [0] * len(paths)
+        state = self.pools
+        chunk = amount // splits
+        for k in range(splits if chunk else 0):
+            size = chunk if k < splits - 1 else amount - chunk * (splits - 1)
+            best = None
+            for n, path in enumerate(paths):
+                out, trial = self._try(state, path, size)
+                if out is not None and (best is None or out > best[0]):
+                    best = (out, n, trial)
+            if best is None:
+                break
+            allocation[best[1]] += size
+            state = best[2]
+
+        legs, calls = self._execute([(best_path, amount)], slippage)
+        if sum(allocation) == amount and allocation.count(0) < len(paths) - 1:
+            split = self._execute([(path, size) for path, size in zip(paths, allocation) if size], slippage)
+            if split is not None and sum(i[2] for i in split[0]) > sum(i[2] for i in legs):
+                legs, calls = split
+        return Route(to_checksum_address(token_in), to_checksum_address(token_out), amount, legs, calls, best_single)
+
+    def _execute(self, legs, slippage):
+        state = self._clone(self.pools)
+        tolerance = int(round(slippage * 10**6))
+        result, calls = [], []
+        # larger legs first, the greedy split priced them with the most impact
+        for path, amount_in in sorted(legs, key=lambda i: -i[1]):
+            amount = amount_in
+            try:
+                for hop in path:
+                    function, idx, i, j = hop
+                    expected = _apply(state[idx], hop, amount)
+                    minimum = expected - expected * tolerance // 10**6
+                    data, args = _calldata(function, state[idx], i, j, amount, minimum)
+                    calls.append(Call(self.addresses[idx], data, function, args, expected))
+                    amount = minimum
+            except (Revert, ZeroDivisionError):
+                return None
+            result.append((path, amount_in, calls[-1].amount_out))
+        return result, calls
+
+
+def load_router(base_swap, base_lp_token, meta_swaps=(), timestamp=None):
+    """Snapshot `base_swap` and its metapools `meta_swaps` for routing."""
+    if timestamp is None:
+        timestamp = chain[-1].timestamp
+    base = (base_swap.address, _coins(base_swap), base_lp_token, load_pool(base_swap, base_lp_token, timestamp))
+    metas = [(i.address, _coins(i), load_pool(i, timestamp=timestamp)) for i in meta_swaps]
+    return Router(base, metas)
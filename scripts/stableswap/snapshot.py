@@ -0,0 +1,160 @@
+from brownie import Contract, chain, web3
+from brownie.exceptions import VirtualMachineError
+from eth_abi import decode
+from eth_utils import to_checksum_address
+
+from .pool import MetaPool, StableSwapPool
+
+
+def _view(name, *inputs):
+    return {
+        "name": name,
+        "inputs": [{"name": f"arg{i}", "type": t} for i, t in enumerate(inputs)],
+        "outputs": [{"name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    }
+
+
+ERC20_ABI = [_view("decimals"), _view("totalSupply")]
+
+# views shared by every StableSwap variant, used to load the base pool of a metapool
+POOL_ABI = [
+    dict(_view("coins", "uint256"), outputs=[{"name": "", "type": "address"}]),
+    _view("balances", "uint256"),
+    _view("fee"),
+    _view("admin_fee"),
+    _view("initial_A"),
+    _view("future_A"),
+    _view("initial_A_time"),
+    _view("future_A_time"),
+]
+
+
+def _erc20(address):
+    return Contract.from_abi("ERC20", address, ERC20_ABI)
+
+
+def _coins(swap):
+    coins = []
+    while True:
+        try:
+            coins.append(swap.coins(len(coins)))
+        except (ValueError, VirtualMachineError):
+            return coins
+
+
+def load_pool(swap, lp_token=None, timestamp=None):
+    """
+    Snapshot the state of a deployed pool for off-chain quoting.
+
+    `StableSwap` and `StableSwapBTC` do not expose their LP token, so it must be
+    given as `lp_token`. For metapools the LP token and the base pool are read
+    from the contract and the base pool is snapshotted as well. Views are
+    evaluated at `timestamp`, by default that of the latest block.
+    """
+    if timestamp is None:
+        timestamp = chain[-1].timestamp
+    coins = _coins(swap)
+    is_meta = hasattr(swap, "base_pool")
+    if is_meta:
+        lp_token = swap.lp_token()
+    if lp_token is None:
+        raise ValueError("lp_token is required for base pools")
+
+    kwargs = dict(
+        balances=[swap.balances(i) for i in range(len(coins))],
+        rates=[10 ** (36 - _erc20(i).decimals()) for i in coins],
+        fee=swap.fee(),
+        admin_fee=swap.admin_fee(),
+        total_supply=_erc20(lp_token).totalSupply(),
+        initial_A=swap.initial_A(),
+        future_A=swap.future_A(),
+        initial_A_time=swap.initial_A_time(),
+        future_A_time=swap.future_A_time(),
+        timestamp=timestamp,
+    )
+    if not is_meta:
+        return StableSwapPool(**kwargs)
+
+    # the metapool's last coin is the LP token of the base pool
+    base_pool = load_pool(Contract.from_abi("StableSwap", swap.base_pool(), POOL_ABI), coins[-1], timestamp)
+    return MetaPool(
+        base_pool=base_pool,
+        base_virtual_price=swap.base_virtual_price(),
+        base_cache_updated=swap.base_cache_updated(),
+        **kwargs,
+    )
+
+
+# return types of `PoolLens.getPoolStates`
+POOL_STATE = (
+    "(address,address,address,address[],uint256[],uint256[],uint256[],"
+    "uint256,uint256,uint256,uint256,uint256,uint256,uint256,uint256,uint256,uint256)"
+)
+LENS_OUTPUT = ["uint256", "uint256", f"{POOL_STATE}[]"]
+
+
+def _lens_call(lens, pools, lp_tokens, block_identifier):
+    data = lens.getPoolStates.encode_input(pools, lp_tokens)
+    result = web3.eth.call({"to": lens.address, "data": data}, block_identifier)
+    return decode(LENS_OUTPUT, bytes(result))
+
+
+def load_pools(lens, pools, lp_tokens=(), block_identifier="latest"):
+    """
+    Snapshot many pools with a single call to a deployed `PoolLens`.
+
+    Returns a dict of `address -> snapshot`, in the format of `load_pool`. As
+    with `load_pool`, base pools need their LP token in `lp_tokens`, which is
+    either empty or holds an entry per pool, zero for metapools. Base pools of
+    metapools which are not in `pools` are loaded in a second call at the same
+    block.
+    """
+    pools = [to_checksum_address(str(i)) for i in pools]
+    lp_tokens = [to_checksum_address(str(i)) for i in lp_tokens]
+    block_number, timestamp, states = _lens_call(lens, pools, lp_tokens, block_identifier)
+    states = {to_checksum_address(i[0]): i for i in states}
+
+    missing = {}
+    for state in states.values():
+        base_pool = to_checksum_address(state[2])
+        if int(state[2], 16) and base_pool not in states:
+            # the metapool's last coin is the LP token of the base pool
+            missing[base_pool] = state[3][-1]
+    if missing:
+        states.update(
+            (to_checksum_address(i[0]), i)
+            for i in _lens_call(lens, list(missing), list(missing.values()), block_number)[2]
+        )
+
+    snapshots = {}
+    # base pools first, metapools attach to their snapshot
+    for address, state in sorted(states.items(), key=lambda i: int(i[1][2], 16) != 0):
+        (
+            _, lp_token, base_pool, coins, decimals, balances, admin_balances, total_supply,
+            fee, admin_fee, initial_A, future_A, initial_A_time, future_A_time, _, base_virtual_price,
+            base_cache_updated,
+        ) = state
+        kwargs = dict(
+            balances=list(balances),
+            rates=[10 ** (36 - i) for i in decimals],
+            fee=fee,
+            admin_fee=admin_fee,
+            total_supply=total_supply,
+            initial_A=initial_A,
+            future_A=future_A,
+            initial_A_time=initial_A_time,
+            future_A_time=future_A_time,
+            timestamp=timestamp,
+        )
+        if int(base_pool, 16):
+            snapshots[address] = MetaPool(
+                base_pool=snapshots[to_checksum_address(base_pool)],
+                base_virtual_price=base_virtual_price,
+                base_cache_updated=base_cache_updated,
+                **kwargs,
+            )
+        else:
+            snapshots[address] = StableSwapPool(**kwargs)
+    return {i: snapshots[i] for i in pools}
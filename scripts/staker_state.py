@@ -0,0 +1,338 @@
+"""
+Rebuild the positions of every user of `MultiFeeDistribution` and
+`LpTokenStaker` from the events written by `scripts/indexer.py`.
+
+Events of both contracts are read from the indexer database in chain order
+and applied to the position of each user: the unlocked, earned and locked
+balances in the EPS staker, the amount staked in each pool of the LP staker and
+the total of each reward token claimed.
+
+- `Staked` adds to the unlocked balance. It is followed by `Locked` or `Minted`
+  when the amount was locked or minted as earnings, which moves it to the
+  locked or earned balance.
+- `Withdrawn` takes from the unlocked balance first and then from earnings.
+  `PenaltyPaid` takes the penalty from earnings.
+- `ExpiredLocksWithdrawn` takes from the locked balance.
+- `Deposit`, `Withdraw` and `EmergencyWithdraw` update the amount staked in a
+  pool, and `RewardPaid` the amount of a reward token claimed.
+
+Every `checkpoint_interval` blocks the positions are stored as compressed
+JSON, so the positions at any block are the newest checkpoint at or before it
+plus the events since. A checkpoint records the last event applied. When the
+indexer rolls back a reorg and that event is gone, the checkpoint is dropped.
+
+`verify_positions` compares the rebuilt positions of a sample of users with the
+contracts at a block.
+
+Usage:
+
+    brownie run staker_state main events.db [checkpoint_interval]
+    brownie run staker_state verify events.db [sample_size]
+"""
+
+import json
+import random
+import sqlite3
+import zlib
+
+from eth_utils import to_checksum_address
+
+# event name -> (user column, pid column, token column, amount column)
+EVENTS = {
+    "Staked": ("user", None, None, "amount"),
+    "Locked": ("user", None, None, "amount"),
+    "Minted": ("user", None, None, "amount"),
+    "Withdrawn": ("user", None, None, "amount"),
+    "PenaltyPaid": ("user", None, None, "amount"),
+    "ExpiredLocksWithdrawn": ("user", None, None, "amount"),
+    "RewardPaid": ("user", None, "rewardsToken", "reward"),
+    "Deposit": ("user", "pid", None, "amount"),
+    "Withdraw": ("user", "pid", None, "amount"),
+    "EmergencyWithdraw": ("user", "pid", None, "amount"),
+}
+LP_STAKER_EVENTS = ("Deposit", "Withdraw", "EmergencyWithdraw")
+
+
+def new_position():
+    return {"unlocked": 0, "earned": 0, "locked": 0, "staked": {}, "claimed": {}}
+
+
+def apply_event(positions, event, user, pid, token, amount):
+    """Apply one event to `positions`, a dict of `user -> position`."""
+    position = positions.get(user)
+    if position is None:
+        position = positions[user] = new_position()
+
+    if event == "Staked":
+        position["unlocked"] += amount
+    elif event == "Locked":
+        position["unlocked"] -= amount
+        position["locked"] += amount
+    elif event == "Minted":
+        position["unlocked"] -= amount
+        position["earned"] += amount
+    elif event == "Withdrawn":
+        from_unlocked = min(amount, position["unlocked"])
+        position["unlocked"] -= from_unlocked
+        position["earned"] -= amount - from_unlocked
+    elif event == "PenaltyPaid":
+        position["earned"] -= amount
+    elif event == "ExpiredLocksWithdrawn":
+        position["locked"] -= amount
+    elif event == "RewardPaid":
+        claimed = position["claimed"]
+        claimed[token] = claimed.get(token, 0) + amount
+    elif event == "Deposit":
+        staked = position["staked"]
+        staked[pid] = staked.get(pid, 0) + amount
+    elif event == "Withdraw":
+        position["staked"][pid] -= amount
+    elif event == "EmergencyWithdraw":
+        position["staked"][pid] = 0
+    else:
+        raise ValueError(f"Unknown event '{event}'")
+
+
+def _int(value):
+    # the indexer stores integers wider than 64 bits as decimal strings
+    return None if value is None else int(value)
+
+
+def _encode(positions):
+    return zlib.compress(json.dumps(positions, separators=(",", ":")).encode())
+
+
+def _decode(data):
+    # JSON turns the integer pids into strings
+    positions = json.loads(zlib.decompress(data))
+    for position in positions.values():
+        position["staked"] = {int(k): v for k, v in position["staked"].items()}
+    return positions
+
+
+class StakerState:
+    """
+    Positions of the users of `eps_staker` and `lp_staker`, rebuilt from the
+    events in the indexer database at `db_path`. Checkpoints are kept in the
+    same database.
+    """
+
+    def __init__(self, db_path, eps_staker, lp_staker, checkpoint_interval=10000):
+        self.eps_staker = to_checksum_address(eps_staker)
+        self.lp_staker = to_checksum_address(lp_staker)
+        self.checkpoint_interval = checkpoint_interval
+
+        self.db = sqlite3.connect(db_path)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS staker_checkpoints (block_number INTEGER PRIMARY KEY, "
+                "event_table TEXT, event_block INTEGER, event_log_index INTEGER, event_block_hash TEXT, "
+                "event_count INTEGER NOT NULL, positions BLOB NOT NULL)"
+            )
+
+    def close(self):
+        self.db.close()
+
+    def _tables(self):
+        rows = self.db.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        return [i[0] for i in rows if i[0] in EVENTS]
+
+    def _query(self, select, from_block, to_block):
+        # one SELECT per event table, with the columns of `EVENTS` in a common order
+        parts, params = [], []
+        for table in self._tables():
+            columns = ", ".join(f'"{i}"' if i else "NULL" for i in EVENTS[table])
+            parts.append(select.format(table=table, columns=columns))
+            address = self.lp_staker if table in LP_STAKER_EVENTS else self.eps_staker
+            params += [address, from_block, to_block]
+        return " UNION ALL ".join(parts), params
+
+    def _events(self, from_block, to_block):
+        """Events from `from_block` to `to_block`, in chain order."""
+        if not self._tables():
+            return []
+        query, params = self._query(
+            "SELECT block_number, log_index, block_hash, '{table}', {columns} FROM \"{table}\" "
+            "WHERE address = ? AND block_number BETWEEN ? AND ?",
+            from_block,
+            to_block,
+        )
+        return self.db.execute(f"{query} ORDER BY block_number, log_index", params).fetchall()
+
+    def _event_count(self, to_block):
+        if not self._tables():
+            return 0
+        query, params = self._query(
+            "SELECT COUNT(*) AS count FROM \"{table}\" WHERE address = ? AND block_number BETWEEN ? AND ?",
+            0,
+            to_block,
+        )
+        return self.db.execute(f"SELECT SUM(count) FROM ({query})", params).fetchone()[0]
+
+    @property
+    def indexed_block(self):
+        """The last block written by the indexer, or `None` if nothing has been indexed."""
+        try:
+            return self.db.execute("SELECT MAX(block_number) FROM checkpoints").fetchone()[0]
+        except sqlite3.OperationalError:
+            return None
+
+    @property
+    def last_block(self):
+        """The block of the newest checkpoint, or `None` if there is none."""
+        return self.db.execute("SELECT MAX(block_number) FROM staker_checkpoints").fetchone()[0]
+
+    def _is_canonical(self, checkpoint):
+        block_number, table, event_block, log_index, block_hash, count = checkpoint
+        if block_number > (self.indexed_block or -1):
+            return False
+        if table is not None:
+            row = self.db.execute(
+                f'SELECT block_hash FROM "{table}" WHERE block_number = ? AND log_index = ?', (event_block, log_index)
+            ).fetchone()
+            if row is None or row[0] != block_hash:
+                return False
+        return self._event_count(block_number) == count
+
+    def _rewind(self):
+        """Drop the checkpoints made from events the indexer rolled back."""
+        checkpoints = self.db.execute(
+            "SELECT block_number, event_table, event_block, event_log_index, event_block_hash, event_count "
+            "FROM staker_checkpoints ORDER BY block_number DESC"
+        ).fetchall()
+        for checkpoint in checkpoints:
+            if self._is_canonical(checkpoint):
+                break
+            with self.db:
+                self.db.execute("DELETE FROM staker_checkpoints WHERE block_number = ?", (checkpoint[0],))
+
+    def _checkpoint_at(self, block):
+        """
+        `(block_number, event_count, last_event, positions)` of the newest
+        checkpoint at or before `block`.
+        """
+        row = self.db.execute(
+            "SELECT block_number, event_count, event_table, event_block, event_log_index, event_block_hash, "
+            "positions FROM staker_checkpoints WHERE block_number <= ? ORDER BY block_number DESC LIMIT 1",
+            (block,),
+        ).fetchone()
+        if row is None:
+            return -1, 0, None, {}
+        last_event = None if row[2] is None else row[2:6]
+        return row[0], row[1], last_event, _decode(row[6])
+
+    def _save(self, block, last_event, count, positions):
+        table, event_block, log_index, block_hash = last_event or (None, None, None, None)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO staker_checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (block, table, event_block, log_index, block_hash, count, _encode(positions)),
+            )
+
+    def sync(self, to_block=None):
+        """
+        Apply the indexed events up to `to_block`, or up to the last indexed
+        block, writing checkpoints on the way. Returns the number of events applied.
+        """
+        self._rewind()
+        if to_block is None:
+            to_block = self.indexed_block
+        if to_block is None or to_block <= (self.last_block or -1):
+            return 0
+        last, count, last_event, positions = self._checkpoint_at(to_block)
+        initial = count
+
+        # the newest checkpoint is only kept as a place to resume from if it
+        # does not fall on the interval
+        interval = self.checkpoint_interval
+        if last >= 0 and last % interval:
+            with self.db:
+                self.db.execute("DELETE FROM staker_checkpoints WHERE block_number = ?", (last,))
+
+        # every applied event is at or before `boundary`, the next block on the interval
+        boundary = (last // interval + 1) * interval
+        unsaved = 0
+        for block_number, log_index, block_hash, table, user, pid, token, amount in self._events(last + 1, to_block):
+            if block_number > boundary:
+                if unsaved:
+                    self._save(boundary, last_event, count, positions)
+                    unsaved = 0
+                boundary = ((block_number - 1) // interval + 1) * interval
+            apply_event(positions, table, user, _int(pid), token, int(amount))
+            last_event = (table, block_number, log_index, block_hash)
+            count += 1
+            unsaved += 1
+        if unsaved and boundary < to_block:
+            self._save(boundary, last_event, count, positions)
+        self._save(to_block, last_event, count, positions)
+        return count - initial
+
+    def positions_at(self, block):
+        """Positions of all users after `block`, as a dict of `user -> position`."""
+        last, _, _, positions = self._checkpoint_at(block)
+        for _, _, _, table, user, pid, token, amount in self._events(last + 1, block):
+            apply_event(positions, table, user, _int(pid), token, int(amount))
+        return positions
+
+    def position(self, user, block=None):
+        """Position of `user` after `block`, or after the last synced block."""
+        if block is None:
+            block = self.last_block
+        return self.positions_at(block).get(to_checksum_address(user), new_position())
+
+
+def verify_positions(state, eps_staker, lp_staker, block=None, sample_size=100, seed=None):
+    """
+    Compare the positions of up to `sample_size` users with `eps_staker` and
+    `lp_staker` at `block`. Returns `(user, field, rebuilt, on chain)` for each
+    difference found.
+    """
+    if block is None:
+        block = state.last_block
+    positions = state.positions_at(block)
+    users = sorted(positions)
+    if sample_size is not None and sample_size < len(users):
+        users = random.Random(seed).sample(users, sample_size)
+
+    mismatches = []
+    for user in users:
+        position = positions[user]
+        total = eps_staker.totalBalance(user, block_identifier=block)
+        locked = eps_staker.lockedBalancesSummary(user, block_identifier=block)[0]
+        vesting, unlocked_earnings = eps_staker.earnedBalancesSummary(user, block_identifier=block)[:2]
+        earned = vesting + unlocked_earnings
+        on_chain = {"unlocked": total - locked - earned, "earned": earned, "locked": locked}
+        for pid in position["staked"]:
+            on_chain[f"staked[{pid}]"] = lp_staker.userInfo(pid, user, block_identifier=block)[0]
+
+        rebuilt = {k: position[k] for k in ("unlocked", "earned", "locked")}
+        rebuilt.update((f"staked[{k}]", v) for k, v in position["staked"].items())
+        mismatches += [(user, k, v, on_chain[k]) for k, v in rebuilt.items() if v != on_chain[k]]
+    return mismatches
+
+
+def _open(db_path, checkpoint_interval=10000):
+    from brownie import LpTokenStaker, MultiFeeDistribution
+
+    return StakerState(db_path, MultiFeeDistribution[-1].address, LpTokenStaker[-1].address, checkpoint_interval)
+
+
+def main(db_path="events.db", checkpoint_interval=10000):
+    state = _open(db_path, int(checkpoint_interval))
+    count = state.sync()
+    users = len(state.positions_at(state.last_block))
+    print(f"Applied {count} events up to block {state.last_block}, {users} users")
+    state.close()
+
+
+def verify(db_path="events.db", sample_size=100):
+    from brownie import LpTokenStaker, MultiFeeDistribution
+
+    state = _open(db_path)
+    state.sync()
+    mismatches = verify_positions(state, MultiFeeDistribution[-1], LpTokenStaker[-1], sample_size=int(sample_size))
+    for user, field, rebuilt, on_chain in mismatches:
+        print(f"{user} {field}: rebuilt {rebuilt}, on chain {on_chain}")
+    print(f"{len(mismatches)} differences at block {state.last_block}")
+    state.close()
+    return mismatches
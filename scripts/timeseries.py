@@ -0,0 +1,260 @@
+"""
+Sample the virtual price and admin balances of StableSwap pools, and the
+reward data of `MultiFeeDistribution`, at regular block intervals.
+
+Samples are taken at every block that is a multiple of `interval`, so runs
+with different ranges share their samples. Each pool and each reward token of
+the staker is one series, stored as the columns of an `.npz` file in
+`cache_dir`:
+
+- pools (`<pool>.npz`): `block`, `timestamp`, `virtual_price` and
+  `admin_balances`, with one column of admin balances per coin.
+- reward tokens (`<staker>-<token>.npz`): `block`, `timestamp`,
+  `period_finish`, `reward_rate`, `last_update_time`, `reward_per_token_stored`
+  and `supply`. The supply is `lockedSupply` for the staking token, which is
+  only distributed to locked balances, and `totalSupply` for the others.
+
+Values are stored as floats in the units of the contract, and a call that
+fails, such as one made before the pool was deployed, is stored as `nan`. On
+a rerun only the blocks missing from a series are read. The calls for all
+missing samples are made concurrently.
+
+`fee_apy`, `admin_fees` and `reward_apr` compute APY and APR series from the
+cached columns in a single vectorised pass.
+
+Usage:
+
+    brownie run timeseries main [cache_dir] [interval] [days] --network <network>
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from eth_abi import decode
+from eth_utils import to_checksum_address
+
+from scripts.emissions import YEAR, apr
+from scripts.calls import MAX_COINS, calldata
+
+# 3 second blocks on BSC
+BLOCKS_PER_DAY = 28800
+
+REWARD_COLUMNS = ("period_finish", "reward_rate", "last_update_time", "reward_per_token_stored", "supply")
+
+
+def _grid(start_block, end_block, interval):
+    start = -(-start_block // interval) * interval
+    return np.arange(start, end_block + 1, interval, dtype=np.int64)
+
+
+def fee_apy(timestamps, virtual_price, window=1):
+    """
+    Annualised growth of the virtual price over `window` samples, in percent
+    and compounded. The first `window` values are `nan`.
+    """
+    timestamps = np.asarray(timestamps, dtype=float)
+    virtual_price = np.asarray(virtual_price, dtype=float)
+    result = np.full(len(virtual_price), np.nan)
+    if len(virtual_price) > window:
+        with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+            growth = virtual_price[window:] / virtual_price[:-window]
+            duration = timestamps[window:] - timestamps[:-window]
+            result[window:] = (growth ** (YEAR / duration) - 1) * 100
+    return result
+
+
+def admin_fees(admin_balances):
+    """
+    Admin fees accrued between consecutive samples, per coin. Withdrawing the
+    admin fees empties the balances, so after a decrease the whole balance is
+    counted as new fees.
+    """
+    admin_balances = np.asarray(admin_balances, dtype=float)
+    diff = np.diff(admin_balances, axis=0)
+    return np.where(diff < 0, admin_balances[1:], diff)
+
+
+def reward_apr(series, reward_price, stake_price=1, reward_decimals=18, stake_decimals=18):
+    """
+    APR in percent of a reward token of `MultiFeeDistribution`, from a series
+    returned by `Sampler.reward`. Prices are in the same unit and either
+    scalars or arrays with one price per sample. The rate is zero once the
+    reward period has finished.
+    """
+    rates = np.where(series["timestamp"] < series["period_finish"], series["reward_rate"], 0.0)
+    tvl = series["supply"] / 10**stake_decimals * np.asarray(stake_price, dtype=float)
+    return apr(rates / 10**reward_decimals, tvl, reward_price)
+
+
+class Sampler:
+    """
+    Sample `pools`, a list of pool addresses, and the reward tokens of
+    `eps_staker` into `.npz` files in `cache_dir`. Blocks less than
+    `confirmations` behind the chain head are not sampled, so a reorg can not
+    change a cached sample.
+    """
+
+    def __init__(self, web3, pools, eps_staker, cache_dir, confirmations=15, max_workers=16):
+        self.web3 = web3
+        self.pools = [to_checksum_address(i) for i in pools]
+        self.eps_staker = to_checksum_address(eps_staker)
+        self.cache_dir = cache_dir
+        self.confirmations = confirmations
+        self.executor = ThreadPoolExecutor(max_workers)
+        os.makedirs(cache_dir, exist_ok=True)
+        self._n_coins = {}
+        self.reward_tokens = []
+
+    def close(self):
+        self.executor.shutdown()
+
+    def _call(self, to, signature, *args, block="latest", outputs=("uint256",)):
+        try:
+            result = self.web3.eth.call({"to": to, "data": calldata(signature, *args)}, block)
+            return decode(list(outputs), bytes(result))
+        except Exception:
+            return None
+
+    def _count(self, to, signature, limit=None):
+        # length of a public array, read until the getter reverts
+        count = 0
+        while limit is None or count < limit:
+            if self._call(to, signature, count, outputs=("address",)) is None:
+                break
+            count += 1
+        return count
+
+    def _load(self):
+        for pool in self.pools:
+            if pool not in self._n_coins:
+                self._n_coins[pool] = self._count(pool, "coins(uint256)", MAX_COINS)
+        count = self._count(self.eps_staker, "rewardTokens(uint256)")
+        self.reward_tokens = [
+            to_checksum_address(self._call(self.eps_staker, "rewardTokens(uint256)", i, outputs=("address",))[0])
+            for i in range(count)
+        ]
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.npz")
+
+    def _read(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return {k: data[k] for k in data.files}
+
+    def _write(self, name, series):
+        # written under another name first, so an interrupted run leaves the cache intact
+        tmp = self._path(f"{name}.tmp")
+        np.savez_compressed(tmp, **series)
+        os.replace(tmp, self._path(name))
+
+    def pool(self, address):
+        """Cached samples of a pool, as a dict of columns."""
+        return self._read(to_checksum_address(address))
+
+    def reward(self, token):
+        """Cached samples of a reward token of the staker, as a dict of columns."""
+        return self._read(f"{self.eps_staker}-{to_checksum_address(token)}")
+
+    def _pool_calls(self, pool, block):
+        calls = [(pool, "get_virtual_price()", ())]
+        calls += [(pool, "admin_balances(uint256)", (i,)) for i in range(self._n_coins[pool])]
+        return [i + (block, ("uint256",)) for i in calls]
+
+    def _reward_calls(self, token, block):
+        supply = "lockedSupply()" if token == self.reward_tokens[0] else "totalSupply()"
+        return [
+            (self.eps_staker, "rewardData(address)", (token,), block, ("uint256",) * 4),
+            (self.eps_staker, supply, (), block, ("uint256",)),
+        ]
+
+    def _rows(self, calls, blocks):
+        """Make the calls of every block concurrently, one row of floats per block."""
+        flat = [call for block in blocks for call in calls(block)]
+        results = iter(self.executor.map(
+            lambda i: self._call(i[0], i[1], *i[2], block=i[3], outputs=i[4]), flat
+        ))
+        rows = []
+        for block in blocks:
+            row = []
+            for call in calls(block):
+                result = next(results)
+                row.extend([np.nan] * len(call[4]) if result is None else result)
+            rows.append(row)
+        return np.array(rows, dtype=float).reshape(len(blocks), -1)
+
+    def sample(self, start_block, end_block=None, interval=1200):
+        """
+        Fill the samples missing between `start_block` and `end_block` for
+        every series. Returns the number of samples read.
+        """
+        if end_block is None:
+            end_block = self.web3.eth.block_number - self.confirmations
+        self._load()
+        wanted = _grid(start_block, end_block, interval)
+
+        series = [(pool, lambda b, pool=pool: self._pool_calls(pool, b)) for pool in self.pools]
+        series += [
+            (f"{self.eps_staker}-{token}", lambda b, token=token: self._reward_calls(token, b))
+            for token in self.reward_tokens
+        ]
+        missing = {}
+        for name, calls in series:
+            cached = self._read(name)
+            blocks = wanted if cached is None else wanted[~np.isin(wanted, cached["block"])]
+            if len(blocks):
+                missing[name] = (cached, blocks, calls)
+        if not missing:
+            return 0
+
+        all_blocks = np.unique(np.concatenate([i[1] for i in missing.values()]))
+        timestamps = dict(zip(
+            all_blocks.tolist(),
+            self.executor.map(lambda b: self.web3.eth.get_block(int(b))["timestamp"], all_blocks.tolist()),
+        ))
+
+        count = 0
+        for name, (cached, blocks, calls) in missing.items():
+            rows = self._rows(calls, blocks.tolist())
+            if name in self.pools:
+                columns = {"virtual_price": rows[:, 0], "admin_balances": rows[:, 1:]}
+            else:
+                columns = dict(zip(REWARD_COLUMNS, rows.T))
+            columns["block"] = blocks
+            columns["timestamp"] = np.array([timestamps[i] for i in blocks.tolist()], dtype=np.int64)
+            if cached is not None:
+                columns = {k: np.concatenate([cached[k], v]) for k, v in columns.items()}
+            order = np.argsort(columns["block"], kind="stable")
+            self._write(name, {k: v[order] for k, v in columns.items()})
+            count += len(blocks)
+        return count
+
+
+def main(cache_dir="timeseries", interval=1200, days=30):
+    from brownie import (
+        MultiFeeDistribution,
+        StableSwap,
+        StableSwapBTC,
+        StableSwapMeta,
+        StableSwapMetaBTC,
+        web3,
+    )
+
+    pools = [i.address for container in (StableSwap, StableSwapBTC, StableSwapMeta, StableSwapMetaBTC) for i in container]
+    sampler = Sampler(web3, pools, MultiFeeDistribution[-1], cache_dir)
+    interval = int(interval)
+    try:
+        end_block = web3.eth.block_number - sampler.confirmations
+        count = sampler.sample(end_block - int(days) * BLOCKS_PER_DAY, end_block, interval)
+        print(f"Read {count} samples up to block {end_block}")
+
+        window = max(BLOCKS_PER_DAY // interval, 1)
+        for pool in sampler.pools:
+            series = sampler.pool(pool)
+            apy = fee_apy(series["timestamp"], series["virtual_price"], window)
+            print(f"{pool}: fee APY {apy[-1]:.2f}% over the last day")
+    finally:
+        sampler.close()
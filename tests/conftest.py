@@ -1,6 +1,75 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
 import pytest
 from brownie_tokens import ERC20
-from brownie import compile_source
+from brownie import chain, compile_source
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--gas-baseline", default="tests/gas/baseline.json", help="Path to the gas benchmark baseline"
+    )
+    parser.addoption(
+        "--gas-tolerance",
+        type=float,
+        default=0.01,
+        help="Allowed relative increase in gas over the baseline before a benchmark fails",
+    )
+    parser.addoption(
+        "--update-gas-baseline", action="store_true", help="Write measured gas to the baseline"
+    )
+
+
+def _write_gas_baseline(config, measured):
+    path = Path(config.getoption("gas_baseline"))
+    baseline = json.loads(path.read_text()) if path.exists() else {}
+    baseline.update(measured)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+
+def pytest_sessionfinish(session):
+    measured = getattr(session.config, "gas_measured", None)
+    if not measured or not session.config.getoption("update_gas_baseline"):
+        return
+    if hasattr(session.config, "workeroutput"):
+        # under xdist, workers hand their measurements to the controller which writes the file
+        session.config.workeroutput["gas_measured"] = measured
+    else:
+        _write_gas_baseline(session.config, measured)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    measured = getattr(node, "workeroutput", {}).get("gas_measured")
+    if measured:
+        _write_gas_baseline(node.config, measured)
+
+
+def _uses_deployment(request):
+    # fixture closures are transitive, so this holds for any test needing a deployed contract
+    return any(
+        "ellipsis" in item.fixturenames
+        for item in request.session.items
+        if getattr(item, "module", None) is request.module
+    )
+
+
+@pytest.fixture(scope="module", autouse=True)
+def module_isolation(request, alice):
+    # replaces brownie's `module_isolation`, which resets the chain and would discard
+    # the session deployment. the chain is reverted to the start of the module instead
+    # modules that only test off-chain code do not deploy anything
+    ellipsis = request.getfixturevalue("ellipsis") if _uses_deployment(request) else None
+    # taken after the session deployment, which must outlive the module
+    snapshot_id = chain._take_snapshot()
+    if ellipsis is not None:
+        # rewards are scheduled relative to the start, so each module starts the staker itself
+        ellipsis.lp_staker.start({'from': alice})
+    yield
+    chain._revert(snapshot_id)
 
 
 @pytest.fixture(autouse=True)
@@ -23,71 +92,50 @@ def charlie(accounts):
     yield accounts[2]
 
 
-@pytest.fixture(scope="module")
-def pool2token(alice, bob):
+def _minted_token(alice, bob):
     contract = ERC20()
     contract._mint_for_testing(alice, 1000000 * 10**18)
     contract._mint_for_testing(bob, 1000000 * 10**18)
-    yield contract
+    return contract
 
 
-@pytest.fixture(scope="module")
-def token(alice, bob):
-    contract = ERC20()
-    contract._mint_for_testing(alice, 1000000 * 10**18)
-    contract._mint_for_testing(bob, 1000000 * 10**18)
-    yield contract
-
-
-@pytest.fixture(scope="module")
-def token2(alice, bob):
-    contract = ERC20()
-    contract._mint_for_testing(alice, 1000000 * 10**18)
-    contract._mint_for_testing(bob, 1000000 * 10**18)
-    yield contract
-
+@pytest.fixture(scope="session")
+def ellipsis(
+    alice, bob, LpTokenStaker, FeeConverter, Token, MultiFeeDistribution, MerkleDistributor, StableSwap, StableSwapMeta
+):
+    """
+    The full deployment. It is built once per session, or once per worker when
+    running with xdist, and every test module starts from a snapshot of it.
+    """
+    d = SimpleNamespace()
+    d.pool2token = _minted_token(alice, bob)
+    d.token = _minted_token(alice, bob)
+    d.token2 = _minted_token(alice, bob)
 
-@pytest.fixture(scope="module")
-def lp_staker(LpTokenStaker, alice, bob, token, pool2token):
     offsets = [1000, 2000, 3000]
     rewards_per_second = [10000000000000, 5000000000000, 0]
-    contract = LpTokenStaker.deploy(offsets, rewards_per_second, pool2token, {"from": alice})
-    contract.addPool(token, 0, {'from': alice})
-    token.approve(contract, 2**256-1, {'from': alice})
-    token.approve(contract, 2**256-1, {'from': bob})
-    pool2token.approve(contract, 2**256-1, {'from': alice})
-    contract.start({'from': alice})
-    yield contract
-
-
-@pytest.fixture(scope="module")
-def fee_converter(FeeConverter, alice):
-    yield FeeConverter.deploy({"from": alice})
-
-
-@pytest.fixture(scope="module")
-def eps(Token, alice, bob):
-    contract = Token.deploy("Ellipsis", "EPS", 1000000 * 10**18, {"from": alice})
-    contract.transfer(bob, 500000 * 10**18, {'from': alice})
+    d.lp_staker = LpTokenStaker.deploy(offsets, rewards_per_second, d.pool2token, {"from": alice})
+    d.lp_staker.addPool(d.token, 0, {'from': alice})
+    d.token.approve(d.lp_staker, 2**256-1, {'from': alice})
+    d.token.approve(d.lp_staker, 2**256-1, {'from': bob})
+    d.pool2token.approve(d.lp_staker, 2**256-1, {'from': alice})
 
-    yield contract
+    d.fee_converter = FeeConverter.deploy({"from": alice})
 
+    d.eps = Token.deploy("Ellipsis", "EPS", 1000000 * 10**18, {"from": alice})
+    d.eps.transfer(bob, 500000 * 10**18, {'from': alice})
 
-@pytest.fixture(scope="module")
-def eps_staker(MultiFeeDistribution, alice, bob, lp_staker, eps, fee_converter, merkle):
-    contract = MultiFeeDistribution.deploy(eps, [lp_staker, merkle, alice], {"from": alice})
-    lp_staker.setMinter(contract, {"from": alice})
-    eps.set_minter(contract, {'from': alice})
-    fee_converter.setFeeDistributor(contract, {"from": alice})
-    merkle.setMinter(contract, {'from': alice})
-    eps.approve(contract, 2**256-1, {'from': alice})
-    eps.approve(contract, 2**256-1, {'from': bob})
-    yield contract
+    d.merkle = MerkleDistributor.deploy(alice, bob, {'from': alice})
 
+    d.eps_staker = MultiFeeDistribution.deploy(d.eps, [d.lp_staker, d.merkle, alice], {"from": alice})
+    d.lp_staker.setMinter(d.eps_staker, {"from": alice})
+    d.eps.set_minter(d.eps_staker, {'from': alice})
+    d.fee_converter.setFeeDistributor(d.eps_staker, {"from": alice})
+    d.merkle.setMinter(d.eps_staker, {'from': alice})
+    d.eps.approve(d.eps_staker, 2**256-1, {'from': alice})
+    d.eps.approve(d.eps_staker, 2**256-1, {'from': bob})
 
-@pytest.fixture(scope="module")
-def oracle(alice):
-    yield compile_source("""
+    d.oracle = compile_source("""
 pragma solidity 0.7.6;
 contract Oracle {
 
@@ -99,7 +147,136 @@ contract Oracle {
 }
     """).Oracle.deploy({'from': alice})
 
+    d.pool_coins = []
+    for decimals in (18, 18, 18):
+        contract = ERC20(decimals=decimals)
+        contract._mint_for_testing(alice, 10**9 * 10**decimals)
+        d.pool_coins.append(contract)
+    d.swap_lp = Token.deploy("Ellipsis.finance BUSD/USDC/USDT", "3EPS", 0, {"from": alice})
+    d.swap = StableSwap.deploy(
+        alice, d.pool_coins, d.swap_lp, 1500, 4000000, 5000000000, d.fee_converter, {"from": alice}
+    )
+    d.swap_lp.set_minter(d.swap, {"from": alice})
+    for coin in d.pool_coins:
+        coin.approve(d.swap, 2**256-1, {"from": alice})
+    d.swap.add_liquidity([1000000 * 10**18, 1200000 * 10**18, 900000 * 10**18], 0, {"from": alice})
+
+    d.meta_coin = ERC20(decimals=6)
+    d.meta_coin._mint_for_testing(alice, 10**9 * 10**6)
+    d.meta_lp = Token.deploy("Ellipsis.finance USD/3EPS", "usd3EPS", 0, {"from": alice})
+    d.meta_swap = StableSwapMeta.deploy(
+        alice, [d.meta_coin, d.swap_lp], d.meta_lp, d.swap, 600, 4000000, 5000000000, d.fee_converter, {"from": alice}
+    )
+    d.meta_lp.set_minter(d.meta_swap, {"from": alice})
+    d.meta_coin.approve(d.meta_swap, 2**256-1, {"from": alice})
+    d.swap_lp.approve(d.meta_swap, 2**256-1, {"from": alice})
+    d.meta_swap.add_liquidity([700000 * 10**6, 1000000 * 10**18], 0, {"from": alice})
+
+    yield d
+
+
+# the fixtures below only expose the contracts of the session deployment, so
+# that test modules may override any of them with their own deployments
+
+
+@pytest.fixture(scope="session")
+def pool2token(ellipsis):
+    yield ellipsis.pool2token
+
+
+@pytest.fixture(scope="session")
+def token(ellipsis):
+    yield ellipsis.token
+
+
+@pytest.fixture(scope="session")
+def token2(ellipsis):
+    yield ellipsis.token2
+
+
+@pytest.fixture(scope="session")
+def lp_staker(ellipsis):
+    yield ellipsis.lp_staker
+
+
+@pytest.fixture(scope="session")
+def fee_converter(ellipsis):
+    yield ellipsis.fee_converter
+
+
+@pytest.fixture(scope="session")
+def eps(ellipsis):
+    yield ellipsis.eps
+
+
+@pytest.fixture(scope="session")
+def eps_staker(ellipsis):
+    yield ellipsis.eps_staker
+
+
+@pytest.fixture(scope="session")
+def oracle(ellipsis):
+    yield ellipsis.oracle
+
+
+@pytest.fixture(scope="session")
+def merkle(ellipsis):
+    yield ellipsis.merkle
+
+
+@pytest.fixture(scope="session")
+def pool_coins(ellipsis):
+    yield ellipsis.pool_coins
+
+
+@pytest.fixture(scope="session")
+def swap_lp(ellipsis):
+    yield ellipsis.swap_lp
+
+
+@pytest.fixture(scope="session")
+def swap(ellipsis):
+    yield ellipsis.swap
+
+
+@pytest.fixture(scope="session")
+def meta_coin(ellipsis):
+    yield ellipsis.meta_coin
+
+
+@pytest.fixture(scope="session")
+def meta_lp(ellipsis):
+    yield ellipsis.meta_lp
+
+
+@pytest.fixture(scope="session")
+def meta_swap(ellipsis):
+    yield ellipsis.meta_swap
+
+
+@pytest.fixture(scope="module")
+def zap_swap(alice, lp_staker, swap_lp, meta_coin, swap, fee_converter, RewardsToken, StableSwapMeta):
+    # a metapool with a reward-bearing LP token staked in `lp_staker`, as deployed by scripts/metapool.py
+    lp_token = RewardsToken.deploy("Ellipsis.finance USD/3EPS", "usd3EPS", lp_staker, {"from": alice})
+    swap = StableSwapMeta.deploy(
+        alice, [meta_coin, swap_lp], lp_token, swap, 600, 4000000, 5000000000, fee_converter, {"from": alice}
+    )
+    lp_token.setMinter(swap, {"from": alice})
+    lp_staker.addPool(lp_token, 0, {"from": alice})
+    meta_coin.approve(swap, 2**256-1, {"from": alice})
+    swap_lp.approve(swap, 2**256-1, {"from": alice})
+    swap.add_liquidity([700000 * 10**6, 1000000 * 10**18], 0, {"from": alice})
+    yield swap
+
 
 @pytest.fixture(scope="module")
-def merkle(MerkleDistributor, alice, bob):
-    yield MerkleDistributor.deploy(alice, bob, {'from': alice})
+def zap(alice, lp_staker, pool_coins, meta_coin, zap_swap, RewardsToken, DepositZap3EPS):
+    lp_token = RewardsToken.at(zap_swap.lp_token())
+    pid = lp_staker.poolLength() - 1
+    zap = DepositZap3EPS.deploy(zap_swap, lp_token, lp_staker, pid, {"from": alice})
+    for coin in [meta_coin] + pool_coins:
+        coin.approve(zap, 2**256-1, {"from": alice})
+    lp_token.approve(zap, 2**256-1, {"from": alice})
+    lp_token.approve(lp_staker, 2**256-1, {"from": alice})
+    lp_staker.setOperator(zap, True, {"from": alice})
+    yield zap
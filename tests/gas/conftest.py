@@ -0,0 +1,52 @@
+"""
+Gas benchmarks for user-facing entry points.
+
+Every benchmark records the `gas_used` of one transaction under a key made from
+the test name and its parameters. Measurements are compared to the JSON
+baseline and a benchmark fails if it uses more than `--gas-tolerance` above the
+recorded value. A benchmark without a baseline entry passes with a warning
+naming the measured gas, so a new benchmark does not fail the suite before its
+baseline is recorded. Run with `--update-gas-baseline` to write new
+measurements, and commit the baseline:
+
+    brownie test tests/gas --update-gas-baseline
+"""
+
+import json
+import warnings
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def gas_baseline(request):
+    path = Path(request.config.getoption("gas_baseline"))
+    baseline = json.loads(path.read_text()) if path.exists() else {}
+    # written to the baseline by `pytest_sessionfinish` in the top-level conftest
+    measured = request.config.gas_measured = {}
+
+    yield baseline, measured
+
+
+@pytest.fixture
+def record_gas(request, gas_baseline):
+    baseline, measured = gas_baseline
+    tolerance = request.config.getoption("gas_tolerance")
+    update = request.config.getoption("update_gas_baseline")
+
+    def record(tx, label=None):
+        # accepts a transaction receipt or an amount of gas
+        gas_used = getattr(tx, "gas_used", tx)
+        key = request.node.name if label is None else f"{request.node.name}::{label}"
+        measured[key] = gas_used
+        if update:
+            return gas_used
+        if key not in baseline:
+            warnings.warn(f"{key}: used {gas_used} gas, no baseline (run with --update-gas-baseline)")
+            return gas_used
+        if gas_used > baseline[key] * (1 + tolerance):
+            pytest.fail(f"{key}: used {gas_used} gas, baseline is {baseline[key]} (tolerance {tolerance:.1%})")
+        return gas_used
+
+    yield record
@@ -0,0 +1,40 @@
+import pytest
+from brownie import web3
+from eth_utils import to_checksum_address
+
+from scripts.merkle import build_distribution
+
+
+@pytest.mark.parametrize("recipients", [2, 64, 4096])
+def test_merkle_claim(merkle, eps_staker, alice, bob, recipients, record_gas):
+    claimers = [alice.address] + [
+        to_checksum_address(web3.keccak(i.to_bytes(32, 'big'))[12:]) for i in range(1, recipients)
+    ]
+    tree, elements = build_distribution([(i, 10**18) for i in claimers], workers=1)
+    merkle.proposewMerkleRoot(tree.root, {'from': alice})
+    merkle.reviewPendingMerkleRoot(True, {'from': bob})
+
+    tx = merkle.claim(0, 0, 10**18, tree.get_proof(elements[0][3]), {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("weeks", [2, 4, 8])
+def test_merkle_claim_multi(chain, merkle, eps_staker, alice, bob, weeks, record_gas):
+    claims = []
+    for week in range(weeks):
+        claimers = [alice.address] + [
+            to_checksum_address(web3.keccak((week * 1000 + i).to_bytes(32, 'big'))[12:]) for i in range(1, 64)
+        ]
+        tree, elements = build_distribution([(i, 10**18) for i in claimers], workers=1)
+        merkle.proposewMerkleRoot(tree.root, {'from': alice})
+        merkle.reviewPendingMerkleRoot(True, {'from': bob})
+        claims.append((week, 0, 10**18, tree.get_proof(elements[0][3])))
+        chain.sleep(604801)
+        chain.mine()
+
+    separate = sum(merkle.claim(*claim, {'from': alice}).gas_used for claim in claims)
+    chain.undo(weeks)
+
+    tx = merkle.claimMulti(claims, {'from': alice})
+    record_gas(tx)
+    assert tx.gas_used < separate
@@ -0,0 +1,56 @@
+import pytest
+
+
+# size of a single-sided deposit used to push the pool off balance, relative to the pool
+IMBALANCE = [0, 1, 4]
+
+
+@pytest.fixture
+def imbalanced(swap, alice, request):
+    swap.add_liquidity([request.param * 1000000 * 10**18, 0, 0], 0, {'from': alice})
+
+
+@pytest.mark.parametrize("imbalanced", IMBALANCE, indirect=True)
+def test_exchange(swap, alice, imbalanced, record_gas):
+    swap.exchange(0, 1, 10**18, 0, {'from': alice})
+    tx = swap.exchange(0, 1, 10000 * 10**18, 0, {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("imbalanced", IMBALANCE, indirect=True)
+def test_add_liquidity(swap, alice, imbalanced, record_gas):
+    tx = swap.add_liquidity([1000 * 10**18, 2000 * 10**18, 0], 0, {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("imbalanced", IMBALANCE, indirect=True)
+def test_remove_liquidity_one_coin(swap, alice, imbalanced, record_gas):
+    tx = swap.remove_liquidity_one_coin(10000 * 10**18, 1, 0, {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("imbalanced", IMBALANCE, indirect=True)
+def test_remove_liquidity_imbalance(swap, alice, imbalanced, record_gas):
+    tx = swap.remove_liquidity_imbalance([1000 * 10**18, 2000 * 10**18, 0], 10**24, {'from': alice})
+    record_gas(tx)
+
+
+def test_meta_exchange(meta_swap, alice, record_gas):
+    meta_swap.exchange(0, 1, 10**6, 0, {'from': alice})
+    tx = meta_swap.exchange(0, 1, 10000 * 10**6, 0, {'from': alice})
+    record_gas(tx)
+
+
+def test_meta_remove_liquidity_one_coin(meta_swap, alice, record_gas):
+    tx = meta_swap.remove_liquidity_one_coin(10000 * 10**18, 1, 0, {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("i,j", [(0, 1), (1, 0), (1, 2)])
+def test_exchange_underlying(meta_swap, pool_coins, alice, i, j, record_gas):
+    for coin in pool_coins:
+        coin.approve(meta_swap, 2**256-1, {'from': alice})
+    dx = 10000 * 10**6 if i == 0 else 10000 * 10**18
+    meta_swap.exchange_underlying(i, j, dx // 10000, 0, {'from': alice})
+    tx = meta_swap.exchange_underlying(i, j, dx, 0, {'from': alice})
+    record_gas(tx)
@@ -0,0 +1,196 @@
+import pytest
+from brownie import chain
+from brownie_tokens import ERC20
+
+WEEK = 604800
+
+
+@pytest.fixture
+def pool_count(lp_staker, alice, request):
+    # the fixture already holds pid 0 and pid 1, add more pools to measure `_massUpdatePools`
+    for i in range(request.param - 2):
+        lp_token = ERC20()
+        lp_staker.addPool(lp_token, 0, {'from': alice})
+    yield request.param
+
+
+@pytest.fixture
+def reward_tokens(eps_staker, alice, request):
+    for i in range(request.param):
+        reward = ERC20()
+        reward._mint_for_testing(alice, 10**24)
+        reward.approve(eps_staker, 2**256-1, {'from': alice})
+        eps_staker.addReward(reward, alice, {'from': alice})
+        eps_staker.notifyRewardAmount(reward, 10**24, {'from': alice})
+    yield request.param
+
+
+@pytest.fixture
+def lock_history(eps_staker, alice, request):
+    # one lock and one earnings entry per week
+    for i in range(request.param):
+        eps_staker.stake(10**18, True, {'from': alice})
+        eps_staker.mint(alice, 10**18, {'from': alice})
+        chain.sleep(WEEK)
+    chain.mine()
+    yield request.param
+
+
+@pytest.mark.parametrize("pool_count", [2, 5, 20], indirect=True)
+def test_lp_staker_deposit(lp_staker, eps_staker, alice, pool_count, record_gas):
+    chain.sleep(1001)
+    lp_staker.deposit(1, 10**18, {'from': alice})
+    chain.sleep(100)
+    tx = lp_staker.deposit(1, 10**18, {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("pool_count", [2, 5, 20], indirect=True)
+def test_lp_staker_withdraw(lp_staker, eps_staker, alice, pool_count, record_gas):
+    chain.sleep(1001)
+    lp_staker.deposit(1, 10**18, {'from': alice})
+    chain.sleep(100)
+    tx = lp_staker.withdraw(1, 10**17, {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("pool_count", [2, 5, 20], indirect=True)
+def test_lp_staker_claim(lp_staker, eps_staker, alice, pool_count, record_gas):
+    chain.sleep(1001)
+    lp_staker.deposit(1, 10**18, {'from': alice})
+    chain.sleep(100)
+    tx = lp_staker.claim([1], {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("reward_tokens", [0, 2, 5], indirect=True)
+@pytest.mark.parametrize("lock_history", [1, 13, 52], indirect=True)
+def test_eps_staker_stake(eps_staker, alice, reward_tokens, lock_history, record_gas):
+    tx = eps_staker.stake(10**18, True, {'from': alice})
+    record_gas(tx, "lock")
+    tx = eps_staker.stake(10**18, False, {'from': alice})
+    record_gas(tx, "unlocked")
+
+
+@pytest.mark.parametrize("reward_tokens", [0, 2, 5], indirect=True)
+@pytest.mark.parametrize("lock_history", [1, 13, 52], indirect=True)
+def test_eps_staker_withdraw(eps_staker, alice, reward_tokens, lock_history, record_gas):
+    # walk through the vested earnings entries and pay the penalty on the first unvested one
+    amount = eps_staker.earnedBalances(alice)[0] // 4
+    tx = eps_staker.withdraw(amount, {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("reward_tokens", [0, 2, 5], indirect=True)
+@pytest.mark.parametrize("lock_history", [1, 13, 52], indirect=True)
+def test_eps_staker_exit(eps_staker, alice, reward_tokens, lock_history, record_gas):
+    tx = eps_staker.exit({'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("reward_tokens", [0, 2, 5], indirect=True)
+@pytest.mark.parametrize("lock_history", [1, 13, 52], indirect=True)
+def test_eps_staker_get_reward(eps_staker, alice, reward_tokens, lock_history, record_gas):
+    tx = eps_staker.getReward({'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("reward_tokens", [0, 2, 5], indirect=True)
+@pytest.mark.parametrize("lock_history", [1, 13, 52], indirect=True)
+def test_eps_staker_get_reward_selected(eps_staker, eps, alice, reward_tokens, lock_history, record_gas):
+    # only the staking token, however many fee tokens have been added
+    tx = eps_staker.getReward([eps], {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("count", [0, 1, 4])
+def test_rewards_token_transfer(RewardsToken, lp_staker, alice, bob, count, record_gas):
+    lp_token = RewardsToken.deploy("LP Token", "LP", lp_staker, {'from': alice})
+    lp_token.setMinter(alice, {'from': alice})
+    lp_token.mint(alice, 10**21, {'from': alice})
+    lp_token.mint(bob, 10**21, {'from': alice})
+    for i in range(count):
+        reward = ERC20()
+        reward._mint_for_testing(alice, 10**24)
+        reward.approve(lp_token, 2**256-1, {'from': alice})
+        lp_token.addReward(reward, alice, WEEK, {'from': alice})
+        lp_token.notifyRewardAmount(reward, 10**24, {'from': alice})
+    chain.sleep(100)
+
+    tx = lp_token.transfer(bob, 10**18, {'from': alice})
+    record_gas(tx)
+
+
+@pytest.mark.parametrize("finished", [1, 4])
+def test_rewards_token_transfer_finished(RewardsToken, lp_staker, alice, bob, finished, record_gas):
+    # finished incentives are retired on the first transfer after their period ends
+    lp_token = RewardsToken.deploy("LP Token", "LP", lp_staker, {'from': alice})
+    lp_token.setMinter(alice, {'from': alice})
+    lp_token.mint(alice, 10**21, {'from': alice})
+    lp_token.mint(bob, 10**21, {'from': alice})
+    for i in range(finished):
+        reward = ERC20()
+        reward._mint_for_testing(alice, 10**24)
+        reward.approve(lp_token, 2**256-1, {'from': alice})
+        lp_token.addReward(reward, alice, WEEK, {'from': alice})
+        lp_token.notifyRewardAmount(reward, 10**24, {'from': alice})
+    chain.sleep(WEEK + 1)
+    lp_token.transfer(bob, 10**18, {'from': alice})
+    lp_token.transfer(alice, 10**18, {'from': bob})
+
+    tx = lp_token.transfer(bob, 10**18, {'from': alice})
+    record_gas(tx)
+
+
+def test_eps_staker_long_history(eps_staker, alice, record_gas):
+    # weekly locks and mints for over two years, consuming each entry once it unlocks
+    gas = {}
+    for week in range(120):
+        txs = [
+            eps_staker.stake(10**18, True, {'from': alice}),
+            eps_staker.mint(alice, 10**18, {'from': alice}),
+        ]
+        if week >= 14:
+            txs.append(eps_staker.withdrawExpiredLocks({'from': alice}))
+            amount = eps_staker.unlockedBalance(alice, {'from': alice})
+            txs.append(eps_staker.withdraw(amount, {'from': alice}))
+        if week in (20, 119):
+            gas[week] = [tx.gas_used for tx in txs]
+        chain.sleep(WEEK)
+
+    for name, early, late in zip(["stake", "mint", "withdrawExpiredLocks", "withdraw"], gas[20], gas[119]):
+        record_gas(late, name)
+        assert late <= early * 1.02
+
+
+def test_zap_and_stake(zap, zap_swap, lp_staker, RewardsToken, alice, record_gas):
+    # the zap against the flow it replaces, with the one-time approvals already made
+    lp_token = RewardsToken.at(zap_swap.lp_token())
+    pid = zap.pid()
+    amounts = [10**9, 10**21, 10**21, 0]
+    chain.sleep(1001)
+    zap.add_liquidity_and_stake(amounts, 0, {'from': alice})
+    chain.sleep(100)
+
+    zap_tx = zap.add_liquidity_and_stake(amounts, 0, {'from': alice})
+    record_gas(zap_tx, "zap")
+    chain.sleep(100)
+    txs = [zap.add_liquidity(amounts, 0, {'from': alice})]
+    txs.append(lp_staker.deposit(pid, txs[0].return_value, {'from': alice}))
+    multi_step = sum(i.gas_used for i in txs)
+    record_gas(multi_step, "multi_step")
+    # one transaction instead of two, and cheaper than both together
+    assert zap_tx.gas_used < multi_step
+
+    amount = lp_staker.userInfo(pid, alice)[0] // 4
+    chain.sleep(100)
+    zap_tx = zap.unstake_and_remove_liquidity_one_coin(amount, 2, 0, {'from': alice})
+    record_gas(zap_tx, "unstake_zap")
+    chain.sleep(100)
+    txs = [lp_staker.withdraw(pid, amount, {'from': alice})]
+    txs.append(zap.remove_liquidity_one_coin(amount, 2, 0, {'from': alice}))
+    multi_step = sum(i.gas_used for i in txs)
+    record_gas(multi_step, "unstake_multi_step")
+    assert zap_tx.gas_used < multi_step
+    assert lp_token.balanceOf(alice) == 0
+
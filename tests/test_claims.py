@@ -0,0 +1,77 @@
+import os
+
+import pytest
+from brownie import chain
+
+from scripts import claims as scanner
+from scripts import merkle as builder
+
+
+@pytest.fixture(scope="module")
+def balances(accounts):
+    others = [(builder.to_checksum_address(os.urandom(20).hex()), 10**18) for i in range(500)]
+    # the claimable recipients sit after the first bitmap word
+    return others + [(i.address, c * 10**18) for c, i in enumerate(accounts, start=1)]
+
+
+def _distribute(path, merkle, alice, bob, balances):
+    tree, elements = builder.build_distribution(balances, workers=1)
+    builder.write_distribution(tree, elements, path)
+    merkle.proposewMerkleRoot(tree.root, {'from': alice})
+    merkle.reviewPendingMerkleRoot(True, {'from': bob})
+    chain.sleep(604801)
+    return tree, elements
+
+
+def test_scan(tmp_path, merkle, accounts, alice, bob, balances):
+    weeks = [tmp_path / "week0", tmp_path / "week1"]
+    distributions = [_distribute(path, merkle, alice, bob, balances) for path in weeks]
+    for merkle_index, (tree, elements) in enumerate(distributions):
+        for index, account, amount, leaf in elements[-3 - merkle_index:]:
+            merkle.claim(merkle_index, index, amount, tree.get_proof(leaf), {'from': account})
+
+    total = sum(i[1] for i in balances)
+    claimed = sum(i[1] for i in balances[-3:])
+    week0, week1 = scanner.scan(merkle, weeks)
+    assert week0 == (0, len(balances), 3, claimed, total - claimed, total - claimed)
+    assert week1.claimed == 4
+    assert week1.unclaimed_amount == total - sum(i[1] for i in balances[-4:])
+    assert week1.carried_forward == week0.unclaimed_amount + week1.unclaimed_amount
+
+    flags = scanner.claimed_flags(merkle, 1, len(balances))
+    for index, account, amount, leaf in distributions[1][1]:
+        assert flags[index] == merkle.isClaimed(1, index)
+
+
+def test_scan_many_calls(tmp_path, merkle, alice, bob, balances, monkeypatch):
+    tree, elements = _distribute(tmp_path / "week0", merkle, alice, bob, balances)
+    index, account, amount, leaf = elements[-1]
+    merkle.claim(0, index, amount, tree.get_proof(leaf), {'from': account})
+
+    monkeypatch.setattr(scanner, "WORDS_PER_CALL", 1)
+    flags = scanner.claimed_flags(merkle, 0, len(balances))
+    assert len(flags) == len(balances)
+    assert flags.nonzero()[0].tolist() == [index]
+
+
+def test_incremental_distribution(tmp_path, merkle, alice, bob, balances):
+    incremental = builder.IncrementalBuilder(tmp_path / "merkle.db")
+    incremental.build(balances, workers=1)
+    # leaves an empty index in the second week
+    tree, elements, diff = incremental.build(balances[1:], workers=1)
+    builder.write_distribution(tree, elements, tmp_path / "week0")
+    merkle.proposewMerkleRoot(tree.root, {'from': alice})
+    merkle.reviewPendingMerkleRoot(True, {'from': bob})
+    incremental.close()
+
+    week = scanner.scan(merkle, [tmp_path / "week0"])[0]
+    assert week.recipients == len(balances) - 1
+    assert week.unclaimed_amount == sum(i[1] for i in balances[1:])
+
+
+def test_wrong_distribution(tmp_path, merkle, alice, bob, balances):
+    _distribute(tmp_path / "week0", merkle, alice, bob, balances)
+    builder.write_distribution(*builder.build_distribution(balances[1:], workers=1), tmp_path / "other")
+
+    with pytest.raises(ValueError):
+        scanner.scan(merkle, [tmp_path / "other"])
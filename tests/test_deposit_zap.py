@@ -0,0 +1,79 @@
+import brownie
+import pytest
+from brownie import chain
+
+
+@pytest.fixture(scope="module")
+def zap_lp(RewardsToken, zap_swap):
+    yield RewardsToken.at(zap_swap.lp_token())
+
+
+@pytest.fixture(scope="module")
+def pid(zap):
+    yield zap.pid()
+
+
+def test_add_liquidity_and_stake(alice, zap, zap_lp, lp_staker, pid):
+    amount = zap.add_liquidity_and_stake([10**9, 10**21, 0, 0], 0, {"from": alice}).return_value
+
+    assert amount > 0
+    assert lp_staker.userInfo(pid, alice)[0] == amount
+    assert zap_lp.balanceOf(alice) == 0
+    assert zap_lp.balanceOf(zap) == 0
+    # rewards of the LP token follow the user, not the zap
+    assert zap_lp.depositedBalanceOf(alice) == amount
+    assert zap_lp.depositedBalanceOf(zap) == 0
+
+
+def test_stake_claims_pending(alice, zap, lp_staker, eps_staker, pid):
+    chain.sleep(1001)
+    zap.add_liquidity_and_stake([10**9, 10**21, 0, 0], 0, {"from": alice})
+    chain.sleep(100)
+    zap.add_liquidity_and_stake([10**9, 10**21, 0, 0], 0, {"from": alice})
+
+    assert eps_staker.earnedBalances(alice)['total'] > 0
+
+
+def test_unstake_and_remove_liquidity_one_coin(alice, zap, zap_lp, lp_staker, pool_coins, pid):
+    amount = zap.add_liquidity_and_stake([10**9, 10**21, 0, 0], 0, {"from": alice}).return_value
+    balance = pool_coins[1].balanceOf(alice)
+    expected = zap.calc_withdraw_one_coin(amount, 2)
+
+    received = zap.unstake_and_remove_liquidity_one_coin(amount, 2, 0, {"from": alice}).return_value
+
+    assert received == expected
+    assert pool_coins[1].balanceOf(alice) == balance + received
+    assert lp_staker.userInfo(pid, alice)[0] == 0
+    assert zap_lp.balanceOf(alice) == 0
+    assert zap_lp.depositedBalanceOf(alice) == 0
+
+
+def test_withdraw_directly(alice, zap, zap_lp, lp_staker, pid):
+    amount = zap.add_liquidity_and_stake([10**9, 0, 0, 0], 0, {"from": alice}).return_value
+    lp_staker.withdraw(pid, amount, {"from": alice})
+
+    assert zap_lp.balanceOf(alice) == amount
+    assert zap_lp.depositedBalanceOf(alice) == 0
+
+
+def test_not_operator(alice, zap, lp_staker):
+    amount = zap.add_liquidity_and_stake([10**9, 0, 0, 0], 0, {"from": alice}).return_value
+    lp_staker.setOperator(zap, False, {"from": alice})
+
+    with brownie.reverts("depositFor: not operator"):
+        zap.add_liquidity_and_stake([10**9, 0, 0, 0], 0, {"from": alice})
+    with brownie.reverts("withdrawFor: not operator"):
+        zap.unstake_and_remove_liquidity_one_coin(amount, 0, 0, {"from": alice})
+
+
+def test_operator_of_other_user(alice, bob, lp_staker, pid, zap):
+    zap.add_liquidity_and_stake([10**9, 0, 0, 0], 0, {"from": alice})
+    lp_staker.setOperator(bob, True, {"from": bob})
+
+    with brownie.reverts("withdrawFor: not operator"):
+        lp_staker.withdrawFor(pid, 1, alice, {"from": bob})
+
+
+def test_wrong_pid(alice, zap_swap, zap_lp, lp_staker, DepositZap3EPS):
+    with brownie.reverts("dev: wrong pid"):
+        DepositZap3EPS.deploy(zap_swap, zap_lp, lp_staker, 1, {"from": alice})
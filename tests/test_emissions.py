@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from brownie import chain
+
+from scripts.emissions import cumulative_emissions, project, rate_steps
+
+OFFSETS = [1000, 2000, 3000]
+REWARDS_PER_SECOND = [10000000000000, 5000000000000, 0]
+
+
+def test_matches_claimable(lp_staker, alice):
+    start = lp_staker.startTime()
+    chain.sleep(1001)
+    updates = [lp_staker.deposit(1, 10**22, {'from': alice}).timestamp]
+    chain.sleep(500)
+    updates.append(lp_staker.deposit(0, 10**22, {'from': alice}).timestamp)
+
+    # cross the next schedule entry without touching the staker
+    chain.sleep(1000)
+    chain.mine()
+    now = chain[-1].timestamp
+
+    times = [updates[0], updates[1], now]
+    rates, cumulative = project(times, start, OFFSETS, REWARDS_PER_SECOND, [[10**22]], [[10**8]], updates)
+    assert rates[-1].tolist() == [2000000000000, 8000000000000]
+
+    # pid 0 only earns after its first deposit
+    assert lp_staker.claimableReward(0, alice) == pytest.approx(cumulative[2][0] - cumulative[1][0], rel=1e-9)
+    assert lp_staker.claimableReward(1, alice) == pytest.approx(cumulative[2][1], rel=1e-9)
+
+
+def test_schedule_applied_on_update(lp_staker, alice):
+    start = lp_staker.startTime()
+    chain.sleep(1001)
+    updates = [lp_staker.deposit(1, 10**22, {'from': alice}).timestamp]
+    chain.sleep(1500)
+    updates.append(lp_staker.claim([1], {'from': alice}).timestamp)
+    chain.sleep(100)
+    chain.mine()
+
+    _, cumulative = project(
+        [updates[0], chain[-1].timestamp], start, OFFSETS, REWARDS_PER_SECOND, [[10**22]], [[10**8]], updates
+    )
+    claimed = lp_staker.claimableReward(1, alice)
+    assert claimed == pytest.approx(cumulative[1][1] - 0.8 * 10**13 * (updates[1] - updates[0]), rel=1e-9)
+    assert claimed == pytest.approx(0.8 * 5 * 10**12 * (chain[-1].timestamp - updates[1]), rel=1e-9)
+
+
+def test_one_entry_per_update():
+    times, rates = rate_steps(0, OFFSETS, REWARDS_PER_SECOND, [500, 2500, 2600, 5000])
+    assert rates.tolist() == [0, REWARDS_PER_SECOND[0], REWARDS_PER_SECOND[1], REWARDS_PER_SECOND[2]]
+
+
+def test_frequent_updates_follow_schedule():
+    times = np.arange(0, 4000, 10)
+    scheduled = cumulative_emissions(times, 0, OFFSETS, REWARDS_PER_SECOND)
+    updated = cumulative_emissions(times, 0, OFFSETS, REWARDS_PER_SECOND, np.arange(4000))
+    # on-chain each rate applies from the first second after its offset
+    assert np.abs(scheduled - updated).max() <= REWARDS_PER_SECOND[0]
@@ -442,3 +442,133 @@ def test_notify_so_many_times(eps, eps_staker, alice, token, token2):
     eps_staker.getReward({'from': alice})
 
     assert token.balanceOf(alice) / (initial_alice + 200000 * 10**18) == 1.0
+
+
+def test_entries_consumed_from_head(eps, eps_staker, alice):
+    initial = eps.balanceOf(alice)
+    tx = eps_staker.mint(alice, 10000, {'from': alice})
+    locked_until = (tx.timestamp // 604800 + 13) * 604800
+    eps_staker.stake(10000, True, {'from': alice})
+    for i in range(3):
+        chain.sleep(604800)
+        eps_staker.mint(alice, 20000, {'from': alice})
+        eps_staker.stake(20000, True, {'from': alice})
+
+    # consume the first week of earnings and locks
+    chain.mine(timestamp=locked_until + 1)
+    eps_staker.withdraw(10000, {'from': alice})
+    eps_staker.withdrawExpiredLocks({'from': alice})
+    assert eps.balanceOf(alice) == initial - 60000 + 10000
+    assert eps_staker.earnedBalances(alice) == [60000, [[20000, locked_until + 604800], [20000, locked_until + 604800 * 2], [20000, locked_until + 604800 * 3]]]
+    assert eps_staker.lockedBalances(alice) == [60000, 0, 60000, [[20000, locked_until + 604800], [20000, locked_until + 604800 * 2], [20000, locked_until + 604800 * 3]]]
+
+    # new entries are appended after the consumed ones rather than merged into them
+    tx = eps_staker.mint(alice, 1000, {'from': alice})
+    new_unlock = (tx.timestamp // 604800 + 13) * 604800
+    eps_staker.exit({'from': alice})
+    assert eps_staker.earnedBalances(alice) == [0, []]
+    eps_staker.mint(alice, 5000, {'from': alice})
+    assert eps_staker.earnedBalances(alice) == [5000, [[5000, new_unlock]]]
+    assert eps_staker.withdrawableBalance(alice) == [2500, 2500]
+
+    chain.mine(timestamp=locked_until + 604800 * 3 + 1)
+    eps_staker.withdrawExpiredLocks({'from': alice})
+    assert eps_staker.lockedBalances(alice) == [0, 0, 0, []]
+    eps_staker.stake(7000, True, {'from': alice})
+    assert eps_staker.lockedBalances(alice)[0] == 7000
+    assert len(eps_staker.lockedBalances(alice)[3]) == 1
+
+
+def test_balance_pages(eps_staker, alice):
+    # 20 weeks of mints and locks, so the earliest entries have unlocked
+    for i in range(20):
+        eps_staker.mint(alice, 10000 + i, {'from': alice})
+        eps_staker.stake(20000 + i, True, {'from': alice})
+        chain.sleep(604800)
+    chain.mine()
+
+    earnings = eps_staker.earnedBalances(alice)[1]
+    assert 0 < len(earnings) < 20
+    pages = [eps_staker.earnedBalancesPage(alice, offset, 5) for offset in range(0, len(earnings), 5)]
+    assert max(len(i) for i in pages) == 5
+    assert sum(pages, []) == earnings
+    assert eps_staker.earnedBalancesPage(alice, len(earnings), 5) == []
+
+    locks = eps_staker.lockedBalances(alice)[3]
+    assert eps_staker.lockedBalancesPage(alice, 0, 100) == locks
+    assert eps_staker.lockedBalancesPage(alice, 3, 4) == locks[3:7]
+
+
+def test_balance_summaries(eps_staker, alice):
+    for i in range(20):
+        eps_staker.mint(alice, 10000 + i, {'from': alice})
+        eps_staker.stake(20000 + i, True, {'from': alice})
+        chain.sleep(604800)
+    chain.mine()
+
+    total, unlockable, locked, locks = eps_staker.lockedBalances(alice)
+    assert unlockable > 0
+    assert eps_staker.lockedBalancesSummary(alice) == [total, unlockable, locked, len(locks), locks[0][1]]
+
+    eps_staker.withdrawExpiredLocks({'from': alice})
+    eps_staker.withdraw(30000, {'from': alice})
+    total, unlockable, locked, locks = eps_staker.lockedBalances(alice)
+    assert eps_staker.lockedBalancesSummary(alice) == [total, 0, locked, len(locks), locks[0][1]]
+
+    vesting, earnings = eps_staker.earnedBalances(alice)
+    # nothing is unlocked, so the rest of the total balance is earned
+    unlocked = eps_staker.totalBalance(alice) - total - vesting
+    assert unlocked > 0
+    assert eps_staker.earnedBalancesSummary(alice) == [vesting, unlocked, len(earnings), earnings[0][1]]
+
+
+def test_balance_summaries_empty(eps_staker, alice):
+    assert eps_staker.earnedBalancesSummary(alice) == [0, 0, 0, 0]
+    assert eps_staker.lockedBalancesSummary(alice) == [0, 0, 0, 0, 0]
+    assert eps_staker.earnedBalancesPage(alice, 0, 10) == []
+
+
+def test_get_selected_rewards(eps_staker, alice, bob, token, token2):
+    eps_staker.addReward(token, alice, {'from': alice})
+    eps_staker.addReward(token2, alice, {'from': alice})
+    token.approve(eps_staker, 2**256-1, {'from': alice})
+    token2.approve(eps_staker, 2**256-1, {'from': alice})
+
+    eps_staker.stake(10**18, False, {'from': alice})
+    eps_staker.stake(10**18, False, {'from': bob})
+    eps_staker.notifyRewardAmount(token, 100000 * 10**18, {'from': alice})
+    eps_staker.notifyRewardAmount(token2, 500000 * 10**18, {'from': alice})
+    chain.sleep(86400 * 2)
+    chain.mine()
+
+    initial_alice = [token.balanceOf(alice), token2.balanceOf(alice)]
+    initial_bob = [token.balanceOf(bob), token2.balanceOf(bob)]
+
+    tx = eps_staker.getReward([token], {'from': alice})
+    assert [i['rewardsToken'] for i in tx.events['RewardPaid']] == [token]
+    assert eps_staker.claimableRewards(alice)[1][1] == 0
+    assert eps_staker.claimableRewards(alice)[2][1] > 0
+    eps_staker.getReward({'from': bob})
+
+    # a balance change runs the full update over the tokens that were skipped
+    chain.sleep(86400)
+    eps_staker.stake(10**18, False, {'from': alice})
+    eps_staker.stake(10**18, False, {'from': bob})
+    chain.sleep(604800)
+    chain.mine()
+
+    eps_staker.getReward([token, token2], {'from': alice})
+    eps_staker.getReward({'from': bob})
+
+    # claimed in parts by alice and in full by bob, over identical balances
+    received_alice = [token.balanceOf(alice) - initial_alice[0], token2.balanceOf(alice) - initial_alice[1]]
+    received_bob = [token.balanceOf(bob) - initial_bob[0], token2.balanceOf(bob) - initial_bob[1]]
+    for amount, alice_amount, bob_amount in zip([100000 * 10**18, 500000 * 10**18], received_alice, received_bob):
+        assert abs(alice_amount - bob_amount) < amount // 1000
+        assert amount - (alice_amount + bob_amount) < 10**7
+    assert [i[1] for i in eps_staker.claimableRewards(alice)] == [0, 0, 0]
+
+
+def test_get_selected_rewards_unknown_token(eps_staker, alice, token):
+    with brownie.reverts("Unknown reward token"):
+        eps_staker.getReward([token], {'from': alice})
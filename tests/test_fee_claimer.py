@@ -0,0 +1,123 @@
+import brownie
+import pytest
+
+
+@pytest.fixture(scope="module")
+def swap2(alice, StableSwap, Token, pool_coins, fee_converter):
+    lp = Token.deploy("Ellipsis.finance BUSD/USDC/USDT", "3EPS", 0, {"from": alice})
+    swap = StableSwap.deploy(alice, pool_coins, lp, 1500, 4000000, 5000000000, fee_converter, {"from": alice})
+    lp.set_minter(swap, {"from": alice})
+    for coin in pool_coins:
+        coin.approve(swap, 2**256-1, {"from": alice})
+    swap.add_liquidity([1000000 * 10**18] * 3, 0, {"from": alice})
+    yield swap
+
+
+@pytest.fixture(scope="module")
+def claimer(FeeClaimer, alice, swap, swap2, pool_coins, fee_converter, eps_staker):
+    claimer = FeeClaimer.deploy({"from": alice})
+    fee_converter.setFeeClaimer(claimer, {"from": alice})
+    eps_staker.addReward(pool_coins[0], fee_converter, {"from": alice})
+    for pool in (swap, swap2):
+        pool.exchange(0, 1, 10000 * 10**18, 0, {"from": alice})
+    claimer.addPools([swap, swap2], {"from": alice})
+    yield claimer
+
+
+def _trade(pool, alice):
+    pool.exchange(0, 1, 10000 * 10**18, 0, {"from": alice})
+    pool.exchange(1, 2, 10000 * 10**18, 0, {"from": alice})
+
+
+def test_harvest_notifies_once(alice, bob, claimer, swap, swap2, pool_coins, eps_staker):
+    _trade(swap, alice)
+    _trade(swap2, alice)
+    assert claimer.harvestablePools() == [0, 1]
+
+    balance = pool_coins[0].balanceOf(eps_staker)
+    tx = claimer.harvest([0, 1], {"from": bob})
+
+    assert len(tx.events["FeeClaimSuccess"]) == 2
+    assert len(tx.events["RewardAdded"]) == 1
+    assert tx.events["RewardAdded"]["reward"] == pool_coins[0].balanceOf(eps_staker) - balance
+    for pool in (swap, swap2):
+        assert [pool.admin_balances(i) for i in range(3)] == [0, 0, 0]
+
+
+def test_harvest_below_threshold(alice, bob, claimer, swap, swap2):
+    _trade(swap, alice)
+    _trade(swap2, alice)
+    admin_balances = [swap.admin_balances(i) for i in range(3)]
+    claimer.setMinAdminBalances(0, [i + 1 for i in admin_balances], {"from": alice})
+    assert claimer.harvestablePools() == [1]
+
+    tx = claimer.harvest([0, 1], {"from": bob})
+    assert tx.events["FeeClaimSkipped"]["pool"] == swap
+    assert tx.events["FeeClaimSuccess"]["pool"] == swap2
+    assert [swap.admin_balances(i) for i in range(3)] == admin_balances
+
+
+def test_harvest_nothing_to_claim(bob, claimer, swap, swap2):
+    assert claimer.harvestablePools() == []
+    tx = claimer.harvest([0, 1], {"from": bob})
+    assert len(tx.events["FeeClaimSkipped"]) == 2
+    assert "RewardAdded" not in tx.events
+
+
+def test_set_min_admin_balances_only_owner(bob, claimer):
+    with brownie.reverts():
+        claimer.setMinAdminBalances(0, [1, 1, 1], {"from": bob})
+
+
+def test_set_notify_deferred_only_claimer(alice, fee_converter):
+    with brownie.reverts():
+        fee_converter.setNotifyDeferred(True, {"from": alice})
+
+
+def test_set_fee_claimer_only_owner(alice, bob, FeeConverter):
+    converter = FeeConverter.deploy({"from": alice})
+    with brownie.reverts():
+        converter.setFeeClaimer(bob, {"from": bob})
+    converter.setFeeClaimer(bob, {"from": alice})
+    assert converter.feeClaimer() == bob
+
+
+@pytest.fixture(scope="module")
+def failing_swap(alice, StableSwap, Token, FeeConverter, pool_coins, eps_staker, claimer):
+    converter = FeeConverter.deploy({"from": alice})
+    converter.setFeeDistributor(eps_staker, {"from": alice})
+    converter.setFeeClaimer(claimer, {"from": alice})
+    eps_staker.approveRewardDistributor(pool_coins[0], converter, True, {"from": alice})
+
+    lp = Token.deploy("Ellipsis.finance BUSD/USDC/USDT", "3EPS", 0, {"from": alice})
+    swap = StableSwap.deploy(alice, pool_coins, lp, 1500, 4000000, 5000000000, converter, {"from": alice})
+    lp.set_minter(swap, {"from": alice})
+    for coin in pool_coins:
+        coin.approve(swap, 2**256-1, {"from": alice})
+    swap.add_liquidity([1000000 * 10**18] * 3, 0, {"from": alice})
+    swap.exchange(0, 1, 10000 * 10**18, 0, {"from": alice})
+    claimer.addPools([swap], {"from": alice})
+
+    # notifyRewardAmount now reverts for this converter
+    eps_staker.approveRewardDistributor(pool_coins[0], converter, False, {"from": alice})
+    yield swap
+
+
+def test_harvest_failing_notify(alice, bob, claimer, swap, swap2, failing_swap, pool_coins, eps_staker, FeeConverter):
+    converter = FeeConverter.at(failing_swap.fee_converter())
+    for pool in (swap, swap2, failing_swap):
+        _trade(pool, alice)
+
+    balance = pool_coins[0].balanceOf(eps_staker)
+    tx = claimer.harvest([0, 1, 2], {"from": bob})
+
+    assert len(tx.events["FeeClaimSuccess"]) == 3
+    assert tx.events["NotifyFailed"]["coin"] == pool_coins[0]
+    assert len(tx.events["RewardAdded"]) == 1
+    assert pool_coins[0].balanceOf(eps_staker) > balance
+    for pool in (swap, swap2, failing_swap):
+        assert [pool.admin_balances(i) for i in range(3)] == [0, 0, 0]
+
+    # the fees stay with the converter, which is no longer deferred
+    assert pool_coins[0].balanceOf(converter) > 0
+    assert not converter.notifyDeferred()
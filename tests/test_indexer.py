@@ -0,0 +1,109 @@
+import sqlite3
+
+import pytest
+from brownie import chain, web3
+
+from scripts.indexer import EventIndexer
+from scripts.merkle import build_distribution
+
+
+@pytest.fixture(scope="module")
+def contracts(swap, meta_swap, lp_staker, eps_staker, merkle):
+    return {i.address: i.abi for i in (swap, meta_swap, lp_staker, eps_staker, merkle)}
+
+
+@pytest.fixture
+def indexer(tmp_path, contracts):
+    indexer = EventIndexer(web3, tmp_path / "events.db", contracts, batch_size=4)
+    yield indexer
+    indexer.close()
+
+
+def _count(db_path, table):
+    return sqlite3.connect(db_path).execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+
+def test_index_all_events(tmp_path, indexer, swap, meta_swap, lp_staker, eps_staker, merkle, alice, bob):
+    swap.exchange(0, 1, 10**18, 0, {'from': alice})
+    meta_swap.exchange(0, 1, 10**6, 0, {'from': alice})
+    meta_swap.exchange_underlying(0, 2, 10**6, 0, {'from': alice})
+    swap.remove_liquidity_one_coin(10**18, 2, 0, {'from': alice})
+    lp_staker.deposit(1, 10**18, {'from': alice})
+    lp_staker.withdraw(1, 10**18, {'from': alice})
+    eps_staker.mint(alice, 10**18, {'from': alice})
+    eps_staker.withdraw(10**17, {'from': alice})
+
+    tree, elements = build_distribution([(alice.address, 10**18), (bob.address, 10**18)], workers=1)
+    merkle.proposewMerkleRoot(tree.root, {'from': alice})
+    merkle.reviewPendingMerkleRoot(True, {'from': bob})
+    merkle.claim(0, 0, 10**18, tree.get_proof(elements[0][3]), {'from': alice})
+
+    indexer.sync()
+    assert indexer.last_block == web3.eth.block_number
+
+    db_path = tmp_path / "events.db"
+    assert _count(db_path, "TokenExchange") == 2
+    assert _count(db_path, "TokenExchangeUnderlying") == 1
+    assert _count(db_path, "AddLiquidity") == 2
+    # `exchange_underlying` withdraws the base pool coin
+    assert _count(db_path, "RemoveLiquidityOne") == 2
+    assert _count(db_path, "Deposit") == 1
+    assert _count(db_path, "Withdraw") == 1
+    assert _count(db_path, "Staked") >= 2
+    assert _count(db_path, "Withdrawn") == 1
+    assert _count(db_path, "Claimed") == 1
+
+    row = sqlite3.connect(db_path).execute(
+        "SELECT address, buyer, sold_id, tokens_sold FROM TokenExchange ORDER BY block_number LIMIT 1"
+    ).fetchone()
+    assert row == (swap.address, alice.address, "0", str(10**18))
+
+
+def test_adaptive_range(tmp_path, contracts, swap, alice):
+    for i in range(6):
+        swap.exchange(0, 1, 10**18, 0, {'from': alice})
+
+    indexer = EventIndexer(web3, tmp_path / "events.db", contracts, batch_size=64)
+    get_logs = indexer._get_logs
+    requests = []
+
+    def limited(from_block, to_block):
+        requests.append((from_block, to_block))
+        if to_block - from_block > 2:
+            raise ValueError("query returned more than 10000 results")
+        return get_logs(from_block, to_block)
+
+    indexer._get_logs = limited
+    indexer.sync()
+
+    assert _count(tmp_path / "events.db", "TokenExchange") == 6
+    assert max(b - a for a, b in requests) > 2
+    assert indexer.batch_size <= 64
+
+
+def test_resume(tmp_path, contracts, swap, alice):
+    swap.exchange(0, 1, 10**18, 0, {'from': alice})
+    indexer = EventIndexer(web3, tmp_path / "events.db", contracts)
+    indexer.sync()
+    indexer.close()
+
+    swap.exchange(0, 1, 10**18, 0, {'from': alice})
+    indexer = EventIndexer(web3, tmp_path / "events.db", contracts)
+    assert indexer.sync() == 1
+    assert _count(tmp_path / "events.db", "TokenExchange") == 2
+
+
+def test_reorg(tmp_path, indexer, swap, alice, bob):
+    swap.exchange(0, 1, 10**18, 0, {'from': alice})
+    swap.exchange(0, 1, 10**18, 0, {'from': alice})
+    indexer.sync()
+
+    # replace the last two blocks with a different chain of three
+    chain.undo(2)
+    swap.exchange(1, 2, 10**18, 0, {'from': alice})
+    chain.mine(2)
+    indexer.sync()
+
+    rows = sqlite3.connect(tmp_path / "events.db").execute("SELECT sold_id FROM TokenExchange").fetchall()
+    assert rows == [("1",)]
+    assert indexer.last_block == web3.eth.block_number
@@ -0,0 +1,144 @@
+import asyncio
+import sqlite3
+
+import pytest
+from brownie import chain, web3
+
+from scripts.keeper import Keeper
+
+DAY = 86400
+
+
+@pytest.fixture(scope="module")
+def meta_swap2(alice, StableSwapMeta, MetapoolFeeConverter, Token, swap, swap_lp, meta_coin, pool_coins, eps_staker):
+    converter = MetapoolFeeConverter.deploy({"from": alice})
+    converter.setFeeDistributor(eps_staker, {"from": alice})
+    lp = Token.deploy("Ellipsis.finance USD/3EPS", "usd3EPS", 0, {"from": alice})
+    meta = StableSwapMeta.deploy(
+        alice, [meta_coin, swap_lp], lp, swap, 600, 4000000, 5000000000, converter, {"from": alice}
+    )
+    lp.set_minter(meta, {"from": alice})
+    meta_coin.approve(meta, 2**256-1, {"from": alice})
+    swap_lp.approve(meta, 2**256-1, {"from": alice})
+    meta.add_liquidity([700000 * 10**6, 1000000 * 10**18], 0, {"from": alice})
+    eps_staker.approveRewardDistributor(pool_coins[0], converter, True, {"from": alice})
+    yield meta
+
+
+@pytest.fixture(scope="module", autouse=True)
+def setup(alice, eps_staker, fee_converter, pool_coins, meta_swap2):
+    eps_staker.addReward(pool_coins[0], fee_converter, {"from": alice})
+
+
+@pytest.fixture
+def keeper(tmp_path, bob, swap, meta_swap2):
+    keeper = Keeper(web3, bob, [swap.address, meta_swap2.address], tmp_path / "keeper.db", 300, gas_price=5 * 10**9)
+    yield keeper
+    keeper.close()
+
+
+def _trade(alice, swap, meta_swap, volume):
+    swap.exchange(0, 1, volume * 10**18, 0, {"from": alice})
+    swap.exchange(1, 2, volume * 10**18, 0, {"from": alice})
+    meta_swap.exchange(0, 1, volume * 10**6, 0, {"from": alice})
+
+
+def test_simulated_week(tmp_path, alice, keeper, swap, meta_swap2, pool_coins, eps_staker):
+    # one quiet day, when the fees do not pay for the gas
+    volumes = [50000, 20000, 10, 80000, 30000, 5000, 40000]
+    reward = pool_coins[0].balanceOf(eps_staker)
+    for volume in volumes:
+        _trade(alice, swap, meta_swap2, volume)
+        chain.sleep(DAY)
+        chain.mine()
+
+        values = asyncio.run(keeper.pool_values("latest"))
+        harvests = asyncio.run(keeper.run_once())
+        for harvest in harvests:
+            assert harvest.status == 1
+            assert harvest.value == values[harvest.pool]
+            assert harvest.value >= 2 * harvest.cost
+        if volume == 10:
+            assert harvests == []
+        else:
+            assert {i.pool for i in harvests} == {swap.address, meta_swap2.address}
+
+    assert pool_coins[0].balanceOf(eps_staker) > reward
+
+    db = sqlite3.connect(tmp_path / "keeper.db")
+    assert db.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 7
+    harvested = db.execute("SELECT SUM(harvested) FROM runs").fetchone()[0]
+    assert harvested == db.execute("SELECT COUNT(*) FROM harvests WHERE status = 1").fetchone()[0] == 12
+
+
+def test_pipelined_nonces(alice, bob, keeper, swap, meta_swap2):
+    _trade(alice, swap, meta_swap2, 50000)
+    nonce = bob.nonce
+    harvests = asyncio.run(keeper.run_once())
+    assert sorted(i.nonce for i in harvests) == [nonce, nonce + 1]
+    assert bob.nonce == nonce + 2
+
+    # after a transaction sent from elsewhere the first submission fails, and
+    # the nonce is read again for the next one
+    bob.transfer(alice, 0)
+    _trade(alice, swap, meta_swap2, 50000)
+    harvests = asyncio.run(keeper.run_once())
+    assert harvests[0].error is not None
+    assert harvests[1].status == 1
+    assert harvests[1].nonce == nonce + 3
+
+    harvests = asyncio.run(keeper.run_once())
+    assert len(harvests) == 1
+    assert harvests[0].status == 1
+    assert harvests[0].nonce == nonce + 4
+
+
+def test_gas_too_expensive(tmp_path, alice, bob, swap, meta_swap2):
+    _trade(alice, swap, meta_swap2, 50000)
+    keeper = Keeper(
+        web3, bob, [swap.address, meta_swap2.address], tmp_path / "expensive.db", 10**6, gas_price=5 * 10**9
+    )
+    assert asyncio.run(keeper.run_once()) == []
+    row = sqlite3.connect(tmp_path / "expensive.db").execute("SELECT harvested, cost FROM runs").fetchone()
+    assert row == (0, 0)
+    keeper.close()
+
+
+def test_claimer_batch(alice, bob, tmp_path, FeeClaimer, fee_converter, swap, meta_swap2):
+    claimer = FeeClaimer.deploy({"from": alice})
+    fee_converter.setFeeClaimer(claimer, {"from": alice})
+    _trade(alice, swap, meta_swap2, 50000)
+    claimer.addPools([swap, meta_swap2], {"from": alice})
+
+    _trade(alice, swap, meta_swap2, 50000)
+    keeper = Keeper(
+        web3, bob, [swap.address, meta_swap2.address], tmp_path / "batch.db", 300,
+        claimer=claimer.address, gas_price=5 * 10**9
+    )
+    harvests = asyncio.run(keeper.run_once())
+    keeper.close()
+
+    assert {i.pool for i in harvests} == {swap.address, meta_swap2.address}
+    assert len({i.tx_hash for i in harvests}) == 1
+    assert harvests[0].status == 1
+
+
+def test_claimer_with_unregistered_pool(alice, bob, tmp_path, FeeClaimer, fee_converter, swap, meta_swap2):
+    claimer = FeeClaimer.deploy({"from": alice})
+    fee_converter.setFeeClaimer(claimer, {"from": alice})
+    _trade(alice, swap, meta_swap2, 50000)
+    claimer.addPools([swap], {"from": alice})
+
+    _trade(alice, swap, meta_swap2, 50000)
+    keeper = Keeper(
+        web3, bob, [swap.address, meta_swap2.address], tmp_path / "mixed.db", 300,
+        claimer=claimer.address, gas_price=5 * 10**9
+    )
+    harvests = asyncio.run(keeper.run_once())
+    keeper.close()
+
+    # the registered pool goes through the claimer, the other one is harvested directly
+    assert {i.pool: i.status for i in harvests} == {swap.address: 1, meta_swap2.address: 1}
+    assert len({i.tx_hash for i in harvests}) == 2
+    assert meta_swap2.admin_balances(0) == 0
+    assert swap.admin_balances(1) == 0
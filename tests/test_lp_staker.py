@@ -116,6 +116,33 @@ def test_claim_multiple_rewards(lp_staker, alice, bob, token, token2):
     assert claimable == lp_staker.claimableReward(2, bob) * 2
 
 
+def test_claimable_rewards(lp_staker, alice, bob, token, token2, oracle):
+    oracle.setAnswer(1200000000, {'from': alice})
+    lp_staker.addOracle(oracle, {'from': alice})
+    lp_staker.addPool(token2, 1, {'from': alice})
+    token2.approve(lp_staker, 2**256-1, {'from': alice})
+    token2.approve(lp_staker, 2**256-1, {'from': bob})
+    deposit = 10000 * 10**18
+    chain.sleep(1001)
+    chain.mine()
+    lp_staker.deposit(0, deposit, {'from': alice})
+    lp_staker.deposit(1, deposit, {'from': alice})
+    lp_staker.deposit(1, deposit * 2, {'from': bob})
+    lp_staker.deposit(2, deposit * 3, {'from': bob})
+    chain.sleep(100)
+    chain.mine()
+
+    pids = [0, 1, 2, 1]
+    expected = [lp_staker.claimableReward(i, alice) for i in pids]
+    assert lp_staker.claimableRewards(alice, pids) == expected
+    assert expected[0] > 0 and expected[1] > 0 and expected[2] == 0
+
+    users = [alice, bob, bob.address, token2.address]
+    assert lp_staker.claimableRewardsMany(1, users) == [lp_staker.claimableReward(1, i) for i in users]
+    assert lp_staker.claimableRewardsMany(2, [alice, bob]) == [0, lp_staker.claimableReward(2, bob)]
+    assert lp_staker.claimableRewards(alice, []) == []
+
+
 def test_alloc_multiple_pools(eps_staker, lp_staker, alice, token, token2):
     lp_staker.addPool(token2, 0, {'from': alice})
     token2.approve(lp_staker, 2**256-1, {'from': alice})
@@ -246,3 +273,38 @@ def test_oracle(eps_staker, lp_staker, alice, bob, token, token2, oracle):
     claimable = lp_staker.claimableReward(1, alice)
     assert claimable > 0
     assert claimable / (lp_staker.claimableReward(2, bob) / 6) == pytest.approx(1, rel=1e-4)
+
+
+def test_untouched_pool_accrues(eps_staker, lp_staker, alice, bob, token, token2):
+    lp_staker.addPool(token2, 0, {'from': alice})
+    token2.approve(lp_staker, 2**256-1, {'from': bob})
+    deposit = 10000 * 10**18
+    chain.sleep(1001)
+    chain.mine()
+    lp_staker.deposit(1, deposit, {'from': alice})
+    start = lp_staker.deposit(2, deposit * 3, {'from': bob}).timestamp
+
+    # pool 2 is not touched while pool 1 is updated repeatedly
+    for i in range(3):
+        chain.sleep(100)
+        lp_staker.claim([1], {'from': alice})
+    chain.sleep(100)
+    chain.mine()
+
+    rate = lp_staker.rewardsPerSecond()
+    period = chain[-1].timestamp - start
+    assert lp_staker.claimableReward(2, bob) == pytest.approx(period * rate * 0.8 * 3 / 4, rel=1e-6)
+    end = lp_staker.claim([2], {'from': bob}).timestamp
+    assert eps_staker.earnedBalances(bob)['total'] == pytest.approx((end - start) * rate * 0.8 * 3 / 4, rel=1e-6)
+
+
+def test_gas_independent_of_pool_count(lp_staker, alice, token):
+    chain.sleep(1001)
+    lp_staker.deposit(1, 10**18, {'from': alice})
+    chain.sleep(100)
+    gas_used = lp_staker.deposit(1, 10**18, {'from': alice}).gas_used
+
+    for i in range(20):
+        lp_staker.addPool(ERC20(), 0, {'from': alice})
+    chain.sleep(100)
+    assert abs(lp_staker.deposit(1, 10**18, {'from': alice}).gas_used - gas_used) < 1000
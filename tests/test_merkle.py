@@ -140,3 +140,65 @@ def test_multiple_distributions(chain, alice, bob, distribution, distribution2,
         eps_staker.exit({'from': acct})
         with brownie.reverts('MerkleDistributor: Invalid merkleIndex'):
             merkle.claim(3, claim['index'], claim['amount'], claim['proof'], {'from': acct})
+
+
+@pytest.fixture(scope="module")
+def three_roots(chain, alice, bob, merkle, distribution, distribution2, distribution3):
+    for dist in (distribution, distribution2, distribution3):
+        merkle.proposewMerkleRoot(dist['merkleRoot'], {'from': alice})
+        merkle.reviewPendingMerkleRoot(True, {'from': bob})
+        chain.sleep(604801)
+        chain.mine()
+    yield [distribution, distribution2, distribution3]
+
+
+def test_claim_multi(three_roots, merkle, eps_staker, accounts):
+    for acct in accounts:
+        claims = [three_roots[i]['claims'][acct.address] for i in range(3)]
+        merkle.claimMulti(
+            [(i, c['index'], c['amount'], c['proof']) for i, c in enumerate(claims)], {'from': acct}
+        )
+        assert eps_staker.totalBalance(acct) == sum(int(c['amount'], 16) for c in claims)
+        for i, c in enumerate(claims):
+            assert merkle.isClaimed(i, c['index'])
+            with brownie.reverts('MerkleDistributor: Drop already claimed.'):
+                merkle.claim(i, c['index'], c['amount'], c['proof'], {'from': acct})
+
+
+def test_claim_multi_partial(three_roots, merkle, eps_staker, alice):
+    claim = three_roots[1]['claims'][alice.address]
+    merkle.claim(1, claim['index'], claim['amount'], claim['proof'], {'from': alice})
+
+    claims = []
+    for i, dist in enumerate(three_roots):
+        c = dist['claims'][alice.address]
+        claims.append((i, c['index'], c['amount'], c['proof']))
+    with brownie.reverts('MerkleDistributor: Drop already claimed.'):
+        merkle.claimMulti(claims, {'from': alice})
+    merkle.claimMulti([claims[0], claims[2]], {'from': alice})
+    assert eps_staker.totalBalance(alice) == sum(int(i[2], 16) for i in claims)
+
+
+def test_claim_multi_duplicate(three_roots, merkle, alice):
+    claim = three_roots[0]['claims'][alice.address]
+    claim = (0, claim['index'], claim['amount'], claim['proof'])
+    with brownie.reverts('MerkleDistributor: Drop already claimed.'):
+        merkle.claimMulti([claim, claim], {'from': alice})
+
+
+def test_claim_multi_invalid(three_roots, merkle, alice, bob):
+    claim = three_roots[0]['claims'][alice.address]
+    with brownie.reverts('MerkleDistributor: Invalid proof.'):
+        merkle.claimMulti([(0, claim['index'], claim['amount'], claim['proof'])], {'from': bob})
+    with brownie.reverts('MerkleDistributor: Invalid merkleIndex'):
+        merkle.claimMulti([(3, claim['index'], claim['amount'], claim['proof'])], {'from': alice})
+
+
+def test_claimed_words(three_roots, merkle, accounts):
+    for acct in accounts[:3]:
+        claim = three_roots[1]['claims'][acct.address]
+        merkle.claim(1, claim['index'], claim['amount'], claim['proof'], {'from': acct})
+
+    assert merkle.claimedWords(1, 0, 2) == [0b111, 0]
+    assert merkle.claimedWords(0, 0, 1) == [0]
+    assert merkle.claimedWords(1, 1, 0) == []
@@ -0,0 +1,124 @@
+import json
+import os
+
+import pytest
+from brownie import chain
+
+from scripts import merkle as builder
+
+
+@pytest.fixture(scope="module")
+def balances(accounts):
+    return [(i.address, c * 10**18) for c, i in enumerate(accounts, start=1)]
+
+
+def _write_csv(path, balances):
+    with open(path, "w") as fp:
+        fp.write("account,amount\n")
+        for account, amount in balances:
+            fp.write(f"{account.lower()},{amount}\n")
+
+
+def test_claim_from_shards(tmp_path, accounts, balances, merkle, eps_staker, alice, bob):
+    _write_csv(tmp_path / "balances.csv", balances)
+    builder.main([str(tmp_path / "balances.csv"), str(tmp_path / "out"), "--workers", "1", "--shard-chars", "1"])
+
+    distribution = json.loads((tmp_path / "out" / "distribution.json").read_text())
+    assert distribution["recipients"] == len(balances)
+    assert int(distribution["tokenTotal"], 16) == sum(i[1] for i in balances)
+
+    merkle.proposewMerkleRoot(distribution["merkleRoot"], {'from': alice})
+    merkle.reviewPendingMerkleRoot(True, {'from': bob})
+    for account, amount in balances:
+        shard = json.loads((tmp_path / "out" / "claims" / f"{account[2].lower()}.json").read_text())
+        claim = shard[account]
+        assert int(claim["amount"], 16) == amount
+        merkle.claim(0, claim["index"], claim["amount"], claim["proof"], {'from': accounts.at(account)})
+        assert eps_staker.totalBalance(account) == amount
+
+
+def test_parallel_matches_serial(monkeypatch):
+    balances = [(builder.to_checksum_address(os.urandom(20).hex()), i * 10**18) for i in range(1, 3001)]
+    tree, elements = builder.build_distribution(balances, workers=1)
+
+    # force every layer through the process pool
+    monkeypatch.setattr(builder, "PARALLEL_THRESHOLD", 2)
+    monkeypatch.setattr(builder, "CHUNK_SIZE", 64)
+    parallel_tree, parallel_elements = builder.build_distribution(balances, workers=2)
+
+    assert parallel_tree.layers == tree.layers
+    assert parallel_elements == elements
+
+
+def test_proofs_verify():
+    balances = [(builder.to_checksum_address(os.urandom(20).hex()), i) for i in range(1, 1026)]
+    tree, elements = builder.build_distribution(balances, workers=1)
+
+    for index, account, amount, leaf in elements:
+        assert leaf == builder.leaf_hash(index, account, amount)
+        node = leaf
+        for sibling in tree.get_proof(leaf):
+            node = builder.keccak(b"".join(sorted([node, sibling])))
+        assert node == tree.root
+
+
+def _claim(merkle, merkle_index, accounts, tree, elements):
+    for index, account, amount, leaf in elements:
+        merkle.claim(merkle_index, index, amount, tree.get_proof(leaf), {'from': accounts.at(account)})
+
+
+def test_incremental_claims(tmp_path, accounts, balances, merkle, eps_staker, alice, bob):
+    incremental = builder.IncrementalBuilder(tmp_path / "merkle.db")
+    for week, weekly in enumerate([balances, balances[3:] + [(balances[0][0], 10**18)]]):
+        tree, elements, diff = incremental.build(weekly, workers=1)
+        merkle.proposewMerkleRoot(tree.root, {'from': alice})
+        merkle.reviewPendingMerkleRoot(True, {'from': bob})
+        _claim(merkle, week, accounts, tree, elements)
+        chain.sleep(604800)
+
+    # the returning recipient keeps its index and the removed indexes are left empty
+    assert [i[0] for i in elements] == [0] + list(range(3, len(balances)))
+    assert diff.removed == [(1,) + balances[1], (2,) + balances[2]]
+    assert diff.changed == [(0, balances[0][0], balances[0][1], 10**18)]
+    assert eps_staker.totalBalance(balances[0][0]) == balances[0][1] + 10**18
+    incremental.close()
+
+
+def test_incremental_rehashes_changes(tmp_path):
+    balances = [(builder.to_checksum_address(os.urandom(20).hex()), i * 10**18) for i in range(1, 1025)]
+    incremental = builder.IncrementalBuilder(tmp_path / "merkle.db")
+    incremental.build(balances, workers=1)
+    assert incremental.hashed == 2 * len(balances) - 1
+
+    balances[100] = (balances[100][0], 1)
+    new = builder.to_checksum_address(os.urandom(20).hex())
+    tree, elements, diff = incremental.build(balances[:500] + [(new, 5)] + balances[501:], workers=1)
+    # two leaves and their paths to the root, which meet below it at layer 9
+    assert incremental.hashed == 2 + 2 * 10 - 2
+    assert diff.added == [(500, new, 5)]
+    assert diff.removed == [(500,) + balances[500]]
+    assert diff.changed == [(100, balances[100][0], 101 * 10**18, 1)]
+
+    for index, account, amount, leaf in elements:
+        node = leaf
+        for sibling in tree.get_proof(leaf):
+            node = builder.keccak(b"".join(sorted([node, sibling])))
+        assert node == tree.root
+
+    # both leaves return to an earlier amount and are found in the cache
+    balances[100] = (balances[100][0], 101 * 10**18)
+    incremental.build(balances, workers=1)
+    assert incremental.hashed == 2 * 10 - 2
+    incremental.close()
+
+
+def test_incremental_dry_run(tmp_path, balances):
+    _write_csv(tmp_path / "balances.csv", balances)
+    args = [str(tmp_path / "balances.csv"), str(tmp_path / "out"), "--workers", "1", "--cache", str(tmp_path / "c.db")]
+    builder.main(args)
+    _write_csv(tmp_path / "balances.csv", balances[1:])
+    for i in range(2):
+        builder.main(args + ["--dry-run"])
+        diff = json.loads((tmp_path / "out" / "diff.json").read_text())
+        assert [i["account"] for i in diff["removed"]] == [balances[0][0]]
+        assert int(diff["tokenTotalChange"], 16) == -balances[0][1]
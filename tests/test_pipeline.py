@@ -0,0 +1,94 @@
+import json
+
+import pytest
+from brownie import FeeConverter, LpTokenStaker, MerkleDistributor, Token, chain
+
+from scripts.deploy import plan
+from scripts.pipeline import Call, Deploy, Pipeline, Ref
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return tmp_path / "deployment.json"
+
+
+def test_deployment_wiring(alice, pool_coins, state_path):
+    results = Pipeline(plan(alice, coins=pool_coins, pancake_router=None), alice, state_path).run()
+
+    assert Token.at(results["eps"]).minter() == results["eps_staker"]
+    assert Token.at(results["lp_token"]).minter() == results["swap"]
+    lp_staker = LpTokenStaker.at(results["lp_staker"])
+    assert lp_staker.rewardMinter() == results["eps_staker"]
+    assert lp_staker.poolInfo(0)[0] == results["cakelp"]
+    assert lp_staker.poolInfo(1)[0] == results["lp_token"]
+    assert FeeConverter.at(results["fee_converter"]).feeDistributor() == results["eps_staker"]
+    assert MerkleDistributor.at(results["airdrop_distro"]).rewardMinter() == results["eps_staker"]
+
+
+def test_independent_steps_share_a_round(alice, pool_coins, state_path):
+    nonce = alice.nonce
+    Pipeline(plan(alice, coins=pool_coins, pancake_router=None), alice, state_path).run()
+
+    steps = json.loads(state_path.read_text())["steps"]
+    first_round = ["lp_token", "fee_converter", "airdrop_distro", "eps", "cakelp"]
+    assert [steps[i]["nonce"] for i in first_round] == list(range(nonce, nonce + 5))
+    # wiring is only sent once the contracts it touches are mined
+    assert steps["lp_token.set_minter"]["block"] > steps["swap"]["block"]
+    assert alice.nonce == nonce + len(steps)
+
+
+def test_resume_after_failure(alice, bob, state_path):
+    steps = [
+        Deploy("token", Token, "Token", "TKN", 0),
+        Deploy("other", Token, "Other", "OTH", 0),
+        # the deployer holds no tokens, so this reverts
+        Call("transfer", Ref("token"), Token, "transfer", bob, 1),
+        Call("set_minter", Ref("token"), Token, "set_minter", bob, after=["transfer"]),
+    ]
+    with pytest.raises(RuntimeError, match="transfer"):
+        Pipeline(steps, alice, state_path).run()
+
+    pipeline = Pipeline(steps, alice, state_path)
+    assert pipeline.status("token") == "done"
+    assert pipeline.status("transfer") == "failed"
+    assert pipeline.status("set_minter") is None
+
+    nonce = alice.nonce
+    steps[2] = Call("transfer", Ref("token"), Token, "transfer", bob, 0)
+    results = Pipeline(steps, alice, state_path).run()
+
+    # only the failed step and the one waiting on it are sent
+    assert alice.nonce == nonce + 2
+    assert Token.at(results["token"]).minter() == bob
+
+
+def test_resume_pending(alice, state_path):
+    tx = Token.deploy("Token", "TKN", 0, {"from": alice}).tx
+    state = {
+        "chain_id": chain.id,
+        "account": alice.address,
+        "steps": {"token": {"status": "pending", "tx": tx.txid, "nonce": tx.nonce}},
+    }
+    state_path.write_text(json.dumps(state))
+
+    nonce = alice.nonce
+    results = Pipeline([Deploy("token", Token, "Token", "TKN", 0)], alice, state_path).run()
+    assert alice.nonce == nonce
+    assert results["token"] == tx.contract_address
+
+
+def test_state_of_other_account(alice, bob, state_path):
+    Pipeline([Deploy("token", Token, "Token", "TKN", 0)], alice, state_path).run()
+    with pytest.raises(ValueError):
+        Pipeline([Deploy("token", Token, "Token", "TKN", 0)], bob, state_path)
+
+
+def test_unknown_dependency(alice):
+    with pytest.raises(ValueError):
+        Pipeline([Call("set_minter", Ref("token"), Token, "set_minter", alice)], alice)
+
+
+def test_state_of_other_plan(alice, state_path):
+    Pipeline([Deploy("token", Token, "Token", "TKN", 0)], alice, state_path).run()
+    with pytest.raises(ValueError, match="token"):
+        Pipeline([Deploy("other", Token, "Other", "OTH", 0)], alice, state_path)
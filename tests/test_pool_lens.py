@@ -0,0 +1,49 @@
+import pytest
+from brownie import ZERO_ADDRESS
+
+from scripts.stableswap import load_pool, load_pools
+
+
+@pytest.fixture(scope="module")
+def lens(PoolLens, alice):
+    yield PoolLens.deploy({'from': alice})
+
+
+def test_pool_states(lens, swap, swap_lp, meta_swap, meta_lp, pool_coins, meta_coin):
+    block_number, timestamp, states = lens.getPoolStates([swap, meta_swap], [swap_lp, ZERO_ADDRESS])
+    base, meta = states
+
+    assert base[3] == pool_coins
+    assert base[5] == [swap.balances(i) for i in range(3)]
+    assert base[6] == [swap.admin_balances(i) for i in range(3)]
+    assert base[7] == swap_lp.totalSupply()
+    assert base[14] == swap.get_virtual_price()
+    assert base[2] == ZERO_ADDRESS
+
+    assert meta[1] == meta_lp
+    assert meta[2] == swap
+    assert meta[3] == [meta_coin, swap_lp]
+    assert meta[4] == [6, 18]
+    assert meta[15] == meta_swap.base_virtual_price()
+    assert meta[16] == meta_swap.base_cache_updated()
+
+
+def test_load_pools(lens, swap, swap_lp, meta_swap):
+    pools = load_pools(lens, [swap, meta_swap], [swap_lp, ZERO_ADDRESS])
+    expected_pools = {swap.address: load_pool(swap, swap_lp), meta_swap.address: load_pool(meta_swap)}
+    for address, expected in expected_pools.items():
+        pool = pools[address]
+        assert vars(pool).keys() == vars(expected).keys()
+        for key, value in vars(expected).items():
+            if key not in ("base_pool", "_D_cache"):
+                assert getattr(pool, key) == value
+
+    assert pools[meta_swap.address].base_pool is pools[swap.address]
+    assert pools[meta_swap.address].get_dy_underlying(0, 2, 10**6) == meta_swap.get_dy_underlying(0, 2, 10**6)
+
+
+def test_load_missing_base_pool(lens, swap, meta_swap):
+    pools = load_pools(lens, [meta_swap])
+    assert list(pools) == [meta_swap.address]
+    assert pools[meta_swap.address].base_pool.balances == [swap.balances(i) for i in range(3)]
+    assert pools[meta_swap.address].get_virtual_price() == meta_swap.get_virtual_price()
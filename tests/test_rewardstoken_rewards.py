@@ -147,3 +147,74 @@ def test_deposited_balance(lp_token, lp_staker, alice, bob, swap, token2):
     assert lp_token.balanceOf(bob) == 0
     assert lp_token.depositedBalanceOf(bob) == 0
     assert lp_token.totalSupply() == 0
+
+
+def test_retire_finished_reward(lp_token, token2, alice, bob, charlie, chain):
+    lp_token.addReward(token2, bob, 86400 * 7, {'from': alice})
+    lp_token.transfer(bob, 10**18, {'from': alice})
+    amount = token2.totalSupply() // 2
+    lp_token.notifyRewardAmount(token2, amount, {'from': bob})
+    assert lp_token.activeRewardTokenCount() == 1
+
+    chain.sleep(86400 * 8)
+    lp_token.transfer(charlie, 10**18, {'from': alice})
+    assert lp_token.activeRewardTokenCount() == 0
+    assert lp_token.retiredRewardTokens(0) == token2
+
+    # bob was not checkpointed when the reward retired, his share is settled on his next transfer
+    lp_token.transfer(charlie, 10**18, {'from': bob})
+    assert lp_token.userRetiredEpoch(bob) == 1
+
+    for acct in (alice, bob, charlie):
+        lp_token.getReward({'from': acct})
+    assert token2.balanceOf(alice) == pytest.approx(amount * 2 // 3, rel=1e-4)
+    assert token2.balanceOf(bob) == pytest.approx(amount // 3, rel=1e-4)
+    assert token2.balanceOf(charlie) == 0
+
+    # adding new rewards reactivates the token
+    lp_token.notifyRewardAmount(token2, amount, {'from': bob})
+    assert lp_token.activeRewardTokenCount() == 1
+    chain.sleep(86400 * 8)
+    chain.mine()
+    assert lp_token.earned(charlie, token2) == pytest.approx(amount * 2 // 3, rel=1e-4)
+    assert lp_token.earned(bob, token2) == 0
+
+
+def test_retire_repeatedly(lp_token, token2, alice, bob, charlie, accounts, chain):
+    lp_token.addReward(token2, bob, 86400 * 7, {'from': alice})
+    lp_token.transfer(charlie, 10**18, {'from': alice})
+    amount = token2.totalSupply() // 4
+
+    # each top-up after the end of a period retires the token and reactivates it
+    for i in range(3):
+        lp_token.notifyRewardAmount(token2, amount, {'from': bob})
+        chain.sleep(86400 * 8)
+    lp_token.transfer(accounts[3], 10**18, {'from': alice})
+    assert lp_token.retiredEpoch() == 3
+    assert lp_token.retiredRewardTokenCount() == 1
+
+    # charlie was not checkpointed over the three periods and holds a third of the supply
+    assert lp_token.userRetiredEpoch(charlie) == 0
+    lp_token.getReward({'from': charlie})
+    assert lp_token.userRetiredEpoch(charlie) == 3
+    assert token2.balanceOf(charlie) == pytest.approx(amount, rel=1e-4)
+
+    # a new holder is settled without being credited for past periods
+    assert lp_token.userRetiredEpoch(accounts[3]) == 3
+    lp_token.notifyRewardAmount(token2, amount, {'from': bob})
+    chain.sleep(86400 * 8)
+    chain.mine()
+    assert lp_token.earned(accounts[3], token2) == pytest.approx(amount // 3, rel=1e-4)
+
+
+def test_reward_data(lp_token, token2, alice, bob, chain):
+    lp_token.addReward(token2, bob, 86400 * 7, {'from': alice})
+    tx = lp_token.notifyRewardAmount(token2, 86400 * 7 * 10**18, {'from': bob})
+
+    distributor, duration, period_finish, rate, last_update, stored = lp_token.rewardData(token2)
+    assert distributor == bob
+    assert duration == 86400 * 7
+    assert period_finish == tx.timestamp + 86400 * 7
+    assert rate == 10**18
+    assert last_update == tx.timestamp
+    assert stored == lp_token.rewardPerToken(token2)
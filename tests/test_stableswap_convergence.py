@@ -0,0 +1,38 @@
+import pytest
+
+from scripts.stableswap import load_pool
+from scripts.stableswap.convergence import count_iterations, iteration_report
+
+
+@pytest.fixture
+def imbalanced(swap, alice):
+    swap.add_liquidity([4000000 * 10**18, 0, 0], 0, {'from': alice})
+
+
+def test_warm_start_matches_chain(swap, swap_lp, alice, imbalanced):
+    pool = load_pool(swap, swap_lp)
+    assert pool.get_dy(0, 1, 10**23) == swap.get_dy(0, 1, 10**23)
+    assert pool.get_dy(1, 0, 10**23) == swap.get_dy(1, 0, 10**23)
+    assert pool.calc_withdraw_one_coin(10**23, 2) == swap.calc_withdraw_one_coin(10**23, 2)
+
+
+def test_fewer_iterations(swap, swap_lp, meta_swap):
+    base = load_pool(swap, swap_lp)
+    meta = load_pool(meta_swap)
+    for pool in (base, meta):
+        rows = iteration_report(pool, imbalance=(0, 4))
+        assert rows
+        for _, _, solver, before, after in rows:
+            if solver == "get_D":
+                assert before == after
+            else:
+                assert after < before
+
+
+def test_count_iterations(swap, swap_lp):
+    pool = load_pool(swap, swap_lp)
+    trace = count_iterations(pool, lambda p: p.exchange(0, 1, 10**21))
+    assert [i[0] for i in trace] == ["get_D", "get_y"]
+    assert 0 < trace[1][1] < count_iterations(pool, lambda p: p.exchange(0, 1, 10**21), warm_start=False)[1][1]
+    # the snapshot itself is not modified
+    assert pool.balances == [swap.balances(i) for i in range(3)]
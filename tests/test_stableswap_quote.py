@@ -0,0 +1,91 @@
+import itertools
+
+import pytest
+from brownie import chain
+
+from scripts.stableswap import load_pool, quote_dy, quote_dy_underlying, quote_token_amount, quote_withdraw_one_coin
+
+
+AMOUNTS = [0, 1, 10**6, 10**15, 10**18, 31337 * 10**18, 500000 * 10**18, 10**27]
+
+
+def test_get_dy(swap, swap_lp):
+    pool = load_pool(swap, swap_lp)
+    trades = [(i, j, dx) for i, j in itertools.permutations(range(3), 2) for dx in AMOUNTS]
+    i, j, dx = zip(*trades)
+
+    exact = quote_dy(pool, i, j, dx)
+    for trade, quote in zip(trades, exact):
+        assert quote == swap.get_dy(*trade)
+
+    approx = quote_dy(pool, i, j, dx, exact=False)
+    for quote, value in zip(exact, approx):
+        assert value == pytest.approx(quote, rel=1e-9, abs=10)
+
+
+def test_reverting_quote(swap, swap_lp):
+    pool = load_pool(swap, swap_lp)
+    total_supply = swap_lp.totalSupply()
+    assert quote_withdraw_one_coin(pool, [10**18, total_supply + 1], 0)[1] is None
+
+
+def test_calc_token_amount(swap, swap_lp):
+    pool = load_pool(swap, swap_lp)
+    amounts = [[0, 10**18, 0], [10**20, 2 * 10**21, 3], [9 * 10**23, 0, 10**23], [5 * 10**23] * 3]
+
+    for deposit in (True, False):
+        exact = quote_token_amount(pool, amounts, deposit)
+        assert exact == [swap.calc_token_amount(i, deposit) for i in amounts]
+        approx = quote_token_amount(pool, amounts, deposit, exact=False)
+        assert approx.tolist() == pytest.approx(exact, rel=1e-9, abs=10)
+
+
+def test_calc_withdraw_one_coin(swap, swap_lp):
+    pool = load_pool(swap, swap_lp)
+    trades = [(amount, i) for i in range(3) for amount in AMOUNTS[1:-1]]
+    amounts, idx = zip(*trades)
+
+    exact = quote_withdraw_one_coin(pool, amounts, idx)
+    assert exact == [swap.calc_withdraw_one_coin(*i) for i in trades]
+    approx = quote_withdraw_one_coin(pool, amounts, idx, exact=False)
+    assert approx.tolist() == pytest.approx(exact, rel=1e-9, abs=10)
+
+
+def test_virtual_price(swap, swap_lp, meta_swap):
+    assert load_pool(swap, swap_lp).get_virtual_price() == swap.get_virtual_price()
+    assert load_pool(meta_swap).get_virtual_price() == meta_swap.get_virtual_price()
+
+
+def test_meta_get_dy(meta_swap):
+    pool = load_pool(meta_swap)
+    trades = [(0, 1, dx) for dx in (1, 10**6, 10**10)] + [(1, 0, dx) for dx in (10**15, 10**18, 10**23)]
+    i, j, dx = zip(*trades)
+
+    exact = quote_dy(pool, i, j, dx)
+    for trade, quote in zip(trades, exact):
+        assert quote == meta_swap.get_dy(*trade)
+
+
+@pytest.mark.parametrize("expired", [False, True])
+def test_meta_get_dy_underlying(alice, swap, meta_swap, pool_coins, expired):
+    # move the base virtual price so the cached value differs from the live one
+    swap.exchange(0, 1, 200000 * 10**18, 0, {"from": alice})
+    meta_swap.exchange(0, 1, 10**6, 0, {"from": alice})
+    if expired:
+        chain.sleep(601)
+        chain.mine()
+
+    pool = load_pool(meta_swap)
+    trades = [
+        (i, j, dx) for i, j in itertools.permutations(range(4), 2)
+        for dx in (10**6, 10**4 * 10**(6 if i == 0 else 18))
+    ]
+    i, j, dx = zip(*trades)
+
+    exact = quote_dy_underlying(pool, i, j, dx)
+    for trade, quote in zip(trades, exact):
+        assert quote == meta_swap.get_dy_underlying(*trade)
+
+    approx = quote_dy_underlying(pool, i, j, dx, exact=False)
+    for quote, value in zip(exact, approx):
+        assert value == pytest.approx(quote, rel=1e-9, abs=10)
@@ -0,0 +1,81 @@
+import pytest
+from brownie import chain, web3
+
+from scripts.indexer import EventIndexer
+from scripts.stableswap import load_pool, read_events, replay
+
+
+@pytest.fixture
+def indexer(tmp_path, swap, meta_swap):
+    # index everything from the next block onwards
+    contracts = {i.address: i.abi for i in (swap, meta_swap)}
+    indexer = EventIndexer(web3, tmp_path / "events.db", contracts, start_block=web3.eth.block_number + 1)
+    yield indexer
+    indexer.close()
+
+
+def _trade(alice, swap, meta_swap, pool_coins):
+    pool_coins[1].approve(meta_swap, 2**256-1, {'from': alice})
+    swap.exchange(0, 1, 10**21, 0, {'from': alice})
+    swap.add_liquidity([10**21, 0, 3 * 10**20], 0, {'from': alice})
+    meta_swap.exchange(0, 1, 10**9, 0, {'from': alice})
+    chain.sleep(601)
+    meta_swap.exchange_underlying(1, 0, 10**21, 0, {'from': alice})
+    meta_swap.exchange_underlying(0, 3, 10**9, 0, {'from': alice})
+    chain.sleep(601)
+    meta_swap.exchange_underlying(1, 2, 10**21, 0, {'from': alice})
+    swap.remove_liquidity_one_coin(10**20, 2, 0, {'from': alice})
+    meta_swap.remove_liquidity_imbalance([10**8, 10**20], 10**24, {'from': alice})
+    swap.remove_liquidity(10**20, [0, 0, 0], {'from': alice})
+
+
+def _timestamps(from_block):
+    return {i: chain[i].timestamp for i in range(from_block, web3.eth.block_number + 1)}
+
+
+def test_base_pool_parity(tmp_path, indexer, alice, swap, swap_lp, meta_swap, pool_coins):
+    pool = load_pool(swap, swap_lp)
+    _trade(alice, swap, meta_swap, pool_coins)
+    indexer.sync()
+
+    events = read_events(tmp_path / "events.db", swap.address)
+    result = replay(pool, events, timestamps=_timestamps(indexer.start_block))
+    assert not result.reverted.any()
+    assert pool.balances == [swap.balances(i) for i in range(3)]
+    assert pool.total_supply == swap_lp.totalSupply()
+    assert result.virtual_price[-1] == swap.get_virtual_price()
+    assert result.admin_fees.sum(axis=0).tolist() == pytest.approx([swap.admin_balances(i) for i in range(3)])
+
+
+def test_meta_pool_parity(tmp_path, indexer, alice, swap, swap_lp, meta_swap, meta_lp, pool_coins):
+    pool = load_pool(meta_swap)
+    _trade(alice, swap, meta_swap, pool_coins)
+    indexer.sync()
+
+    result = replay(
+        pool,
+        read_events(tmp_path / "events.db", meta_swap.address),
+        read_events(tmp_path / "events.db", swap.address),
+        timestamps=_timestamps(indexer.start_block),
+    )
+    assert len(result.virtual_price) == 5
+    assert pool.balances == [meta_swap.balances(i) for i in range(2)]
+    assert pool.total_supply == meta_lp.totalSupply()
+    assert result.virtual_price[-1] == meta_swap.get_virtual_price()
+    assert pool.base_pool.balances == [swap.balances(i) for i in range(3)]
+    assert pool.base_pool.total_supply == swap_lp.totalSupply()
+
+
+def test_higher_fee(tmp_path, indexer, alice, swap, swap_lp, meta_swap, pool_coins):
+    pool = load_pool(swap, swap_lp)
+    new_pool = load_pool(swap, swap_lp)
+    new_pool.fee *= 2
+    _trade(alice, swap, meta_swap, pool_coins)
+    indexer.sync()
+    timestamps = _timestamps(indexer.start_block)
+
+    recorded = replay(pool, read_events(tmp_path / "events.db", swap.address), timestamps=timestamps)
+    simulated = replay(new_pool, read_events(tmp_path / "events.db", swap.address), timestamps=timestamps)
+
+    assert simulated.lp_fees.sum() > recorded.lp_fees.sum()
+    assert simulated.virtual_price[-1] > recorded.virtual_price[-1]
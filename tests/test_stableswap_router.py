@@ -0,0 +1,67 @@
+import pytest
+from brownie import chain
+
+from scripts.stableswap.router import load_router
+
+
+@pytest.fixture(autouse=True)
+def setup(alice, meta_swap, pool_coins):
+    for coin in pool_coins:
+        coin.approve(meta_swap, 2**256-1, {'from': alice})
+
+
+def _execute(route, account, token):
+    balance = token.balanceOf(account)
+    for call in route.calls:
+        account.transfer(call.to, 0, data=call.data)
+    return token.balanceOf(account) - balance
+
+
+@pytest.mark.parametrize("idx", [0, 2])
+def test_meta_to_base(alice, swap, swap_lp, meta_swap, meta_coin, pool_coins, idx):
+    router = load_router(swap, swap_lp, [meta_swap])
+    route = router.route(meta_coin, pool_coins[idx], 300000 * 10**6)
+
+    assert sum(i[1] for i in route.legs) == 300000 * 10**6
+    assert route.amount_out >= route.best_single
+    assert _execute(route, alice, pool_coins[idx]) == route.amount_out
+
+    # compare with sending the whole order through `exchange_underlying`
+    chain.undo(len(route.calls))
+    naive = meta_swap.exchange_underlying(0, idx + 1, 300000 * 10**6, 0, {'from': alice}).return_value
+    assert route.amount_out >= naive
+
+
+def test_base_to_base(alice, swap, swap_lp, meta_swap, pool_coins):
+    swap.exchange(0, 2, 400000 * 10**18, 0, {'from': alice})
+    router = load_router(swap, swap_lp, [meta_swap])
+    route = router.route(pool_coins[0], pool_coins[2], 500000 * 10**18)
+    assert _execute(route, alice, pool_coins[2]) == route.amount_out
+
+    chain.undo(len(route.calls))
+    naive = swap.exchange(0, 2, 500000 * 10**18, 0, {'from': alice}).return_value
+    assert route.amount_out >= naive
+
+
+def test_base_lp(alice, swap, swap_lp, meta_swap, meta_coin, pool_coins):
+    router = load_router(swap, swap_lp, [meta_swap])
+    route = router.route(pool_coins[1], swap_lp, 10**23)
+    assert _execute(route, alice, swap_lp) == route.amount_out
+
+    router = load_router(swap, swap_lp, [meta_swap])
+    route = router.route(swap_lp, meta_coin, 10**23)
+    assert _execute(route, alice, meta_coin) == route.amount_out
+
+
+def test_slippage(alice, swap, swap_lp, meta_swap, meta_coin, pool_coins):
+    router = load_router(swap, swap_lp, [meta_swap])
+    route = router.route(pool_coins[1], meta_coin, 10**23, slippage=0.005)
+    for call in route.calls:
+        assert call.args[-1] == call.amount_out - call.amount_out * 5000 // 10**6
+    assert _execute(route, alice, meta_coin) == route.amount_out
+
+
+def test_no_path(swap, swap_lp, meta_swap, meta_coin, token):
+    router = load_router(swap, swap_lp, [meta_swap])
+    with pytest.raises(ValueError):
+        router.route(meta_coin, token, 10**18)
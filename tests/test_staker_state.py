@@ -0,0 +1,104 @@
+import pytest
+from brownie import chain, web3
+
+from scripts.indexer import EventIndexer
+from scripts.staker_state import StakerState, verify_positions
+
+WEEK = 604800
+
+
+@pytest.fixture
+def indexer(tmp_path, lp_staker, eps_staker):
+    contracts = {i.address: i.abi for i in (lp_staker, eps_staker)}
+    indexer = EventIndexer(web3, tmp_path / "events.db", contracts)
+    yield indexer
+    indexer.close()
+
+
+@pytest.fixture
+def state(tmp_path, indexer, lp_staker, eps_staker):
+    state = StakerState(tmp_path / "events.db", eps_staker.address, lp_staker.address, checkpoint_interval=5)
+    yield state
+    state.close()
+
+
+def _activity(alice, bob, eps_staker, lp_staker, token):
+    eps_staker.stake(10**18, True, {'from': alice})
+    eps_staker.stake(2 * 10**18, False, {'from': alice})
+    eps_staker.stake(3 * 10**18, True, {'from': bob})
+    eps_staker.mint(alice, 10**18, {'from': alice})
+    eps_staker.mint(bob, 10**18, {'from': alice})
+    chain.sleep(1001)
+    lp_staker.deposit(1, 10**18, {'from': alice})
+    lp_staker.deposit(1, 10**18, {'from': bob})
+    chain.sleep(100)
+    lp_staker.withdraw(1, 4 * 10**17, {'from': alice})
+    lp_staker.emergencyWithdraw(1, {'from': bob})
+    # into earnings, paying the penalty
+    eps_staker.withdraw(2 * 10**18 + 10**17, {'from': alice})
+    eps_staker.notifyRewardAmount(token, 10**21, {'from': alice})
+    chain.sleep(WEEK)
+    eps_staker.getReward({'from': bob})
+
+
+@pytest.fixture
+def reward_token(eps_staker, token, alice):
+    eps_staker.addReward(token, alice, {'from': alice})
+    token.approve(eps_staker, 2**256-1, {'from': alice})
+    yield token
+
+
+def test_rebuild(alice, bob, eps_staker, lp_staker, reward_token, indexer, state):
+    _activity(alice, bob, eps_staker, lp_staker, reward_token)
+    middle = web3.eth.block_number
+    balance = reward_token.balanceOf(bob)
+    eps_staker.exit({'from': bob})
+    chain.sleep(WEEK * 14)
+    eps_staker.withdrawExpiredLocks({'from': alice})
+    eps_staker.mint(alice, 10**18, {'from': alice})
+
+    indexer.sync()
+    assert state.sync() > 0
+    assert state.last_block == web3.eth.block_number
+
+    assert verify_positions(state, eps_staker, lp_staker, sample_size=None) == []
+    assert verify_positions(state, eps_staker, lp_staker, block=middle, sample_size=None) == []
+    assert state.position(alice)["locked"] == 0
+    assert state.position(bob)["staked"] == {1: 0}
+    assert state.position(bob, middle)["claimed"][reward_token.address] > 0
+    assert state.position(bob)["claimed"][reward_token.address] == reward_token.balanceOf(bob) - balance + (
+        state.position(bob, middle)["claimed"][reward_token.address]
+    )
+
+
+def test_incremental_sync(alice, bob, eps_staker, lp_staker, reward_token, indexer, state):
+    eps_staker.stake(10**18, True, {'from': alice})
+    indexer.sync()
+    state.sync()
+
+    _activity(alice, bob, eps_staker, lp_staker, reward_token)
+    indexer.sync()
+    state.sync()
+    # one checkpoint per interval with events, and one for the last block
+    checkpoints = state.db.execute("SELECT block_number FROM staker_checkpoints").fetchall()
+    assert checkpoints[-1][0] == state.last_block
+    assert all(i[0] % 5 == 0 for i in checkpoints[:-1])
+
+    assert verify_positions(state, eps_staker, lp_staker, sample_size=None) == []
+
+
+def test_reorg(alice, bob, eps_staker, lp_staker, indexer, state):
+    eps_staker.stake(10**18, True, {'from': alice})
+    eps_staker.stake(10**18, False, {'from': bob})
+    indexer.sync()
+    state.sync()
+
+    chain.undo(1)
+    eps_staker.mint(bob, 5 * 10**18, {'from': alice})
+    chain.mine(2)
+    indexer.sync()
+    state.sync()
+
+    assert state.position(bob)["earned"] == 5 * 10**18
+    assert state.position(bob)["unlocked"] == 0
+    assert verify_positions(state, eps_staker, lp_staker, sample_size=None) == []
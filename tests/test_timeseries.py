@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from brownie import chain, web3
+
+from scripts.timeseries import Sampler, admin_fees, fee_apy, reward_apr
+
+DAY = 86400
+WEEK = 604800
+
+
+@pytest.fixture
+def sampler(tmp_path, swap, meta_swap, eps_staker):
+    sampler = Sampler(web3, [swap.address, meta_swap.address], eps_staker, tmp_path, confirmations=0)
+    yield sampler
+    sampler.close()
+
+
+def _trade(alice, swap, meta_swap):
+    swap.exchange(0, 1, 10**21, 0, {"from": alice})
+    meta_swap.exchange(0, 1, 10**9, 0, {"from": alice})
+    chain.sleep(DAY)
+    chain.mine()
+
+
+def test_sample(alice, swap, meta_swap, sampler):
+    start = web3.eth.block_number
+    for i in range(5):
+        _trade(alice, swap, meta_swap)
+    end = web3.eth.block_number
+
+    assert sampler.sample(start, end, 2) > 0
+    series = sampler.pool(swap)
+    assert np.array_equal(series["block"], np.arange(-(-start // 2) * 2, end + 1, 2))
+    for block, timestamp, virtual_price, admin_balances in zip(
+        series["block"].tolist(), series["timestamp"], series["virtual_price"], series["admin_balances"]
+    ):
+        # samples are stored as floats
+        assert virtual_price == float(swap.get_virtual_price(block_identifier=block))
+        assert admin_balances[1] == float(swap.admin_balances(1, block_identifier=block))
+        assert timestamp == chain[block].timestamp
+
+    apy = fee_apy(series["timestamp"], series["virtual_price"])
+    assert np.isnan(apy[0])
+    assert (apy[1:] >= 0).all()
+    assert (admin_fees(series["admin_balances"]) >= 0).all()
+
+
+def test_only_missing_samples(alice, swap, meta_swap, sampler):
+    start = web3.eth.block_number
+    for i in range(4):
+        _trade(alice, swap, meta_swap)
+    middle = web3.eth.block_number
+    for i in range(4):
+        _trade(alice, swap, meta_swap)
+    end = web3.eth.block_number
+
+    sampler.sample(middle, end, 1)
+    first = sampler.pool(meta_swap)
+    count = sampler.sample(start, end, 1)
+    # the samples already cached are kept and not read again
+    assert count == (middle - start) * (len(sampler.reward_tokens) + 2)
+    assert sampler.sample(start, end, 1) == 0
+
+    series = sampler.pool(meta_swap)
+    assert np.array_equal(series["block"], np.arange(start, end + 1))
+    cached = np.isin(series["block"], first["block"])
+    assert np.array_equal(series["virtual_price"][cached], first["virtual_price"])
+
+
+def test_admin_fees_after_harvest(alice, swap, meta_swap, pool_coins, fee_converter, eps_staker, sampler):
+    eps_staker.addReward(pool_coins[0], fee_converter, {"from": alice})
+    start = web3.eth.block_number
+    _trade(alice, swap, meta_swap)
+    fees = swap.admin_balances(1)
+    swap.withdraw_admin_fees({"from": alice})
+    assert swap.admin_balances(1) == 0
+    _trade(alice, swap, meta_swap)
+
+    sampler.sample(start, web3.eth.block_number, 1)
+    series = sampler.pool(swap)
+    accrued = admin_fees(series["admin_balances"])[:, 1].sum()
+    assert accrued == pytest.approx(fees - series["admin_balances"][0, 1] + swap.admin_balances(1))
+
+
+def test_reward_apr(alice, eps_staker, token, sampler):
+    eps_staker.addReward(token, alice, {"from": alice})
+    token.approve(eps_staker, 2**256-1, {"from": alice})
+    eps_staker.stake(10**20, False, {"from": alice})
+    eps_staker.notifyRewardAmount(token, WEEK * 10**18, {"from": alice})
+    start = web3.eth.block_number
+    chain.sleep(WEEK + 1)
+    chain.mine()
+
+    sampler.sample(start, web3.eth.block_number, 1)
+    series = sampler.reward(token)
+    assert series["reward_rate"][0] == float(eps_staker.rewardData(token)[1])
+    assert series["supply"][0] == float(eps_staker.totalSupply())
+
+    apr = reward_apr(series, reward_price=2, stake_price=4)
+    # one token per second, worth 2, on 100 tokens staked worth 4
+    assert apr[0] == pytest.approx(365 * 86400 * 2 / 400 * 100)
+    assert apr[-1] == 0